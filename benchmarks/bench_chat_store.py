@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark del almacén de estado por chat
+
+Mide creación, búsqueda por chat_id, mutaciones y memoria por chat
+para 10k, 100k y 1M chats.
+
+Uso: python benchmarks/bench_chat_store.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_store import ChatStore  # noqa: E402
+
+LOOKUPS = 200_000
+
+
+def bench_size(n: int) -> dict:
+    store = ChatStore(state_file=None)
+    ids = random.sample(range(-10**12, -10**6), n)
+
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    t0 = time.perf_counter()
+    for chat_id in ids:
+        store.ensure_chat(chat_id)
+    insert_s = time.perf_counter() - t0
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    probe = random.choices(ids, k=LOOKUPS)
+    t0 = time.perf_counter()
+    for chat_id in probe:
+        store.get(chat_id)
+    lookup_s = time.perf_counter() - t0
+
+    today = date.today()
+    t0 = time.perf_counter()
+    for chat_id in probe[:LOOKUPS // 4]:
+        store.mark_done(chat_id, today)
+        store.switch_turn(chat_id)
+    mutate_s = time.perf_counter() - t0
+
+    return {
+        "chats": n,
+        "insert_us": insert_s / n * 1e6,
+        "lookup_ns": lookup_s / LOOKUPS * 1e9,
+        "hecho_us": mutate_s / (LOOKUPS // 4) * 1e6,
+        "bytes_per_chat": (used - base) / n,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'chats':>10} {'insert µs':>10} {'lookup ns':>10} {'hecho µs':>10} {'bytes/chat':>11}")
+    for n in args.sizes:
+        r = bench_size(n)
+        print(
+            f"{r['chats']:>10} {r['insert_us']:>10.2f} {r['lookup_ns']:>10.1f} "
+            f"{r['hecho_us']:>10.2f} {r['bytes_per_chat']:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
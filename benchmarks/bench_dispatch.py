@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark del procesamiento concurrente de updates
+
+Pasa ráfagas de updates por los handlers reales de bot_core.engine con un
+StubBot que simula la latencia de la API, usando tres procesadores:
+secuencial (como antes), concurrente sin orden y concurrente
+serializado por chat (dispatch.PerChatUpdateProcessor). Cada chat envía
+/start, /registrar, /hecho, /hecho y /status seguidos. Reporta updates/s
+según la cantidad de chats activos, los chats cuyas respuestas llegaron
+fuera de orden y los chats cuyo turno no cambió exactamente una vez.
+
+Uso: python benchmarks/bench_dispatch.py [--chats 1,10,100] [--latency 0.02]
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+COMMANDS = ["/start", "/registrar {persona}", "/hecho", "/hecho", "/status"]
+
+
+class Jitter:
+    """Latencia variable por envío para que el orden de las respuestas dependa del procesador"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = itertools.count()
+
+    def next(self) -> float:
+        # Determinista: alterna envíos lentos y rápidos
+        return self.latency * (1.5 if next(self.calls) % 2 else 0.5)
+
+
+async def run_burst(main, processor, chats: int, latency: float, first_chat: int):
+    from telegram import Update
+    from telegram.ext import ApplicationBuilder, CommandHandler
+
+    from fake_api import StubBot, make_command_update
+
+    bot = StubBot()
+    jitter = Jitter(latency)
+    send = bot.send_message
+
+    async def send_with_latency(chat_id, text, *args, **kwargs):
+        await asyncio.sleep(jitter.next())
+        return await send(chat_id, text, *args, **kwargs)
+
+    with bot._unfrozen():
+        bot.send_message = send_with_latency
+
+    app = ApplicationBuilder().bot(bot).concurrent_updates(processor).build()
+    for name in ("start", "registrar", "hecho", "status"):
+        app.add_handler(CommandHandler(name, getattr(main, f"{name}_command")))
+
+    update_ids = itertools.count(1)
+    chat_ids = range(first_chat, first_chat + chats)
+    updates = []
+    for command in COMMANDS:
+        for chat_id in chat_ids:
+            text = command.format(persona=main.PERSONAS[0])
+            updates.append(Update.de_json(make_command_update(next(update_ids), chat_id, chat_id, text), bot))
+
+    # Igual que Application: cada update se lanza al llegar y el procesador decide cuándo corre
+    await app.initialize()
+    t0 = time.perf_counter()
+    await asyncio.gather(*(processor.process_update(u, app.process_update(u)) for u in updates))
+    elapsed = time.perf_counter() - t0
+    await app.shutdown()
+
+    replies = {}
+    for chat_id, text in bot.sent:
+        replies.setdefault(chat_id, []).append(text)
+    out_of_order = 0
+    for chat_id in chat_ids:
+        texts = replies.get(chat_id, [])
+        # El orden esperado: bienvenida, registro, gracias, "no es tu turno", estado
+        markers = ["🤖", "✅ Registrado", "✅ ¡Gracias", "❌", "📊"]
+        if len(texts) != len(markers) or not all(marker in text for marker, text in zip(markers, texts)):
+            out_of_order += 1
+    wrong_turn = sum(1 for chat_id in chat_ids if main.store.get_turn(chat_id) != 1)
+    return len(updates) / elapsed, out_of_order, wrong_turn
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de procesamiento concurrente de updates")
+    parser.add_argument("--chats", default="1,10,100", help="chats activos por ráfaga (lista)")
+    parser.add_argument("--latency", type=float, default=0.02, help="latencia media por envío (s)")
+    parser.add_argument("--concurrency", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from bot_core import engine as bot_main
+        from outbound import OutboundEngine
+        from telegram.ext import SimpleUpdateProcessor
+
+        from dispatch import PerChatUpdateProcessor
+
+        logging.getLogger().setLevel(logging.WARNING)
+        bot_main.outbound = OutboundEngine(global_rate=1e9, chat_rate=1e9, chat_burst=1e9, max_concurrency=10_000)
+        bot_main.init()
+
+        modes = [
+            ("secuencial", lambda: SimpleUpdateProcessor(1)),
+            ("sin orden", lambda: SimpleUpdateProcessor(args.concurrency)),
+            ("por chat", lambda: PerChatUpdateProcessor(args.concurrency)),
+        ]
+        print(f"{'procesador':<12} {'chats':>6} {'updates/s':>10} {'desordenados':>13} {'turno mal':>10}")
+        first_chat = 1
+        for chats in (int(c) for c in args.chats.split(",")):
+            for name, make in modes:
+                rate, out_of_order, wrong_turn = asyncio.run(
+                    run_burst(bot_main, make(), chats, args.latency, first_chat)
+                )
+                first_chat += chats
+                print(f"{name:<12} {chats:>6} {rate:>10.0f} {out_of_order:>13} {wrong_turn:>10}")
+        bot_main.store.close()
+        bot_main.identities.close()
+        bot_main.writer.close()
+        os.chdir(ROOT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Benchmark de los handlers de bot_core.engine (start, registrar, hecho, status, help)
+y de reminder_job
+
+Ejecuta los handlers reales con Updates sintéticos y un StubBot sin red,
+sobre un estado con --chats chats. Reporta latencia p50/p95/p99,
+throughput y memoria asignada por llamada, y guarda los resultados en
+JSON para compararlos contra una línea base. Para reminder_job la
+latencia es por tick (REMINDER_BATCH chats vencidos) y el throughput
+en chats por segundo; el tick solo encola en el outbox, los envíos los
+hacen sus workers.
+
+Uso:
+    python benchmarks/bench_handlers.py --output benchmarks/baseline_handlers.json
+    python benchmarks/bench_handlers.py --baseline benchmarks/baseline_handlers.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+REMINDER_BATCH = 50  # chats vencidos por tick de reminder_job
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Bench:
+    def __init__(self, main, chats: int, calls: int):
+        from telegram import Update
+
+        from fake_api import StubBot, make_command_update
+
+        self.main = main
+        self.Update = Update
+        self.make_command_update = make_command_update
+        self.bot = StubBot()
+        self.calls = calls
+        self.update_ids = itertools.count(1)
+        # Chats sin usar por ningún escenario (cada llamada a /hecho necesita uno nuevo)
+        self.fresh_chats = itertools.count(1)
+        for chat_id in range(1, chats + 1):
+            main.store.ensure_chat(chat_id)
+
+    def update(self, chat_id: int, text: str):
+        data = self.make_command_update(next(self.update_ids), chat_id, chat_id, text)
+        return self.Update.de_json(data, self.bot)
+
+    def context(self, text: str):
+        return SimpleNamespace(args=text.split()[1:], bot=self.bot)
+
+    def prepare(self, name: str) -> list:
+        """Prepara las llamadas de un escenario como pares (preparación, llamada)"""
+        main = self.main
+        calls = []
+        if name == "reminder_job":
+            # Cada tick encuentra REMINDER_BATCH chats vencidos
+            context = SimpleNamespace(bot=self.bot)
+            for _ in range(max(1, self.calls // REMINDER_BATCH)):
+                batch = [next(self.fresh_chats) for _ in range(REMINDER_BATCH)]
+
+                def setup(batch=batch):
+                    for chat_id in batch:
+                        main.scheduler.schedule(chat_id, 0)
+
+                calls.append((setup, lambda: main.reminder_job(context)))
+            return calls
+
+        for _ in range(self.calls):
+            chat_id = next(self.fresh_chats)
+            if name == "hecho":
+                main.identities.register(chat_id, chat_id, main.PERSONAS[main.store.get_turn(chat_id)])
+                text = "/hecho"
+            elif name == "registrar":
+                text = f"/registrar {main.PERSONAS[0]}"
+            else:
+                text = f"/{name}"
+            handler = getattr(main, f"{name}_command")
+            update, context = self.update(chat_id, text), self.context(text)
+            calls.append((None, lambda h=handler, u=update, c=context: h(u, c)))
+        return calls
+
+    async def time_calls(self, calls: list) -> List[float]:
+        latencies = []
+        for setup, call in calls:
+            if setup:
+                setup()
+            t0 = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - t0)
+        return latencies
+
+    async def alloc_calls(self, calls: list) -> float:
+        tracemalloc.start()
+        total = 0
+        for setup, call in calls:
+            if setup:
+                setup()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await call()
+            _, peak = tracemalloc.get_traced_memory()
+            total += peak - before
+        tracemalloc.stop()
+        return total / len(calls)
+
+    async def run(self, name: str) -> Dict[str, float]:
+        latencies = await self.time_calls(self.prepare(name))
+        calls = self.prepare(name)
+        alloc = await self.alloc_calls(calls[: max(1, len(calls) // 10)])
+        total = sum(latencies)
+        # En reminder_job la unidad es el chat recordado, no el tick
+        per_call = REMINDER_BATCH if name == "reminder_job" else 1
+        latencies.sort()
+        return {
+            "calls": len(latencies) * per_call,
+            "p50_us": percentile(latencies, 0.50) * 1e6,
+            "p95_us": percentile(latencies, 0.95) * 1e6,
+            "p99_us": percentile(latencies, 0.99) * 1e6,
+            "ops_per_s": len(latencies) * per_call / total if total else 0.0,
+            "alloc_bytes_per_call": alloc,
+        }
+
+
+def load_main(workdir: str):
+    """Importa el motor con el estado en un directorio temporal y sin límites de envío"""
+    os.chdir(workdir)
+    from bot_core import engine as main
+    from outbound import OutboundEngine
+
+    logging.getLogger().setLevel(logging.WARNING)
+    main.outbound = OutboundEngine(global_rate=1e9, chat_rate=1e9, chat_burst=1e9, max_concurrency=10_000)
+    main.init()
+    return main
+
+
+def compare(results: dict, baseline_file: str, tolerance: float) -> bool:
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    ok = True
+    print(f"\n{'handler':<14} {'p50 base':>10} {'p50 ahora':>10} {'cambio':>8}")
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        change = current["p50_us"] / base["p50_us"] - 1 if base["p50_us"] else 0.0
+        flag = ""
+        if change > tolerance:
+            flag = "  REGRESIÓN"
+            ok = False
+        print(f"{name:<14} {base['p50_us']:>10.1f} {current['p50_us']:>10.1f} {change:>+8.0%}{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de handlers y reminder_job")
+    parser.add_argument("--chats", type=int, default=10_000, help="chats en el estado")
+    parser.add_argument("--calls", type=int, default=2_000, help="llamadas por handler")
+    parser.add_argument("--output", help="archivo JSON donde guardar los resultados")
+    parser.add_argument("--baseline", help="archivo JSON de línea base para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="regresión máxima aceptada en p50")
+    args = parser.parse_args()
+
+    names = ["start", "registrar", "hecho", "status", "help", "reminder_job"]
+    with tempfile.TemporaryDirectory() as workdir:
+        bench = Bench(load_main(workdir), args.chats + args.calls * len(names) * 2, args.calls)
+        results = {}
+        print(f"{'handler':<14} {'p50 µs':>9} {'p95 µs':>9} {'p99 µs':>9} {'ops/s':>10} {'bytes/llamada':>14}")
+        for name in names:
+            r = results[name] = asyncio.run(bench.run(name))
+            print(
+                f"{name:<14} {r['p50_us']:>9.1f} {r['p95_us']:>9.1f} {r['p99_us']:>9.1f} "
+                f"{r['ops_per_s']:>10.0f} {r['alloc_bytes_per_call']:>14.0f}"
+            )
+        os.chdir(ROOT)
+
+    if args.output:
+        payload = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "chats": args.chats,
+                "calls": args.calls,
+                "date": time.strftime("%Y-%m-%d"),
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+        print(f"\nResultados guardados en {args.output}")
+
+    if args.baseline and not compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark del historial de tareas (history.py)
+
+Compara el historial como lista de tuplas (formato anterior) con los
+arreglos tipados de History en memoria, en el tamaño del snapshot JSON y
+en lo que cuesta serializarlo, y mide compute_stats (lo que paga cada
+/stats) con --years años de historial por chat.
+
+Uso: python benchmarks/bench_history.py [--chats 1000] [--years 5]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import History, compute_stats  # noqa: E402
+
+
+def build(chats: int, years: int):
+    start = date(2020, 1, 1).toordinal()
+    entries = []
+    for _ in range(chats):
+        day, chat = start, []
+        while day < start + 365 * years:
+            day += random.choice((1, 1, 1, 2, 3))
+            chat.append((day, random.randrange(2)))
+        entries.append(chat)
+    return entries
+
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria, snapshot y /stats del historial")
+    parser.add_argument("--chats", type=int, default=1000)
+    parser.add_argument("--years", type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(1)
+    entries = build(args.chats, args.years)
+    total = sum(len(chat) for chat in entries)
+    print(f"{args.chats} chats, {total} tareas ({total // args.chats} por chat)\n")
+
+    # Como al cargar el estado: cada día es un int nuevo dentro de una tupla
+    lists, _, list_memory = measure(lambda: [[(date.fromordinal(d).toordinal(), p) for d, p in chat] for chat in entries])
+    histories, _, array_memory = measure(lambda: [History((d for d, _ in chat), (p for _, p in chat)) for chat in entries])
+    print(f"{'formato':<10} {'bytes/tarea':>12} {'snapshot MB':>12} {'serializar ms':>14}")
+    for name, memory, encode in (
+        ("lista", list_memory, lambda: [[[date.fromordinal(d).isoformat(), p] for d, p in chat] for chat in lists]),
+        ("arreglos", array_memory, lambda: [h.to_dict() for h in histories]),
+    ):
+        t0 = time.perf_counter()
+        text = json.dumps(encode())
+        elapsed = time.perf_counter() - t0
+        print(f"{name:<10} {memory / total:>12.1f} {len(text) / 1e6:>12.2f} {elapsed * 1e3:>14.1f}")
+
+    today = max(h.days[-1] for h in histories)
+    compute_stats(histories[0], today, 2)  # importa NumPy fuera de la medición
+    t0 = time.perf_counter()
+    for history in histories:
+        compute_stats(history, today, 2)
+    elapsed = (time.perf_counter() - t0) / len(histories)
+    print(f"\ncompute_stats: {elapsed * 1e6:.0f} µs por chat ({len(histories[0])} tareas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark de arranque en frío (tiempo de import) por punto de entrada y modo
+
+Cada medición corre en un proceso nuevo, con el estado en un directorio
+temporal. Para los modos mide hasta tener la Application armada
+(bot_core.load_mode(modo).build(config)), sin conectarse a Telegram.
+Reporta la mediana del tiempo dentro del proceso, la del proceso
+completo (incluye arrancar el intérprete), los módulos cargados y si se
+cargaron dependencias pesadas.
+
+Uso: python benchmarks/bench_import.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ("telegram", "httpx", "apscheduler", "flask", "numpy")
+
+SNIPPET = """
+import json, sys, time
+t0 = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - t0
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": elapsed, "modules": len(sys.modules), "heavy": heavy}}))
+"""
+
+TARGETS = [
+    ("import bot_core", "import bot_core"),
+    ("import main", "import main"),
+    ("import simple_bot", "import simple_bot"),
+    ("motor", "import bot_core.engine"),
+]
+for _mode in ("polling", "webhook", "simple"):
+    TARGETS.append(
+        (
+            f"modo {_mode}",
+            "from config import Config\nfrom bot_core import load_mode\n"
+            f"config = Config()\nload_mode({_mode!r}).build(config)",
+        )
+    )
+
+
+def measure(code: str, workdir: str) -> dict:
+    env = dict(os.environ, TELEGRAM_TOKEN="123:fake", PYTHONPATH=ROOT, WEBHOOK_URL="https://example.invalid")
+    t0 = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", SNIPPET.format(code=code, heavy=HEAVY)],
+        cwd=workdir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - t0
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque en frío por punto de entrada")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'objetivo':<18} {'import ms':>10} {'proceso ms':>11} {'módulos':>8}  pesados")
+    for name, code in TARGETS:
+        runs = []
+        for _ in range(args.runs):
+            with tempfile.TemporaryDirectory() as workdir:
+                runs.append(measure(code, workdir))
+        seconds = statistics.median(r["seconds"] for r in runs)
+        process = statistics.median(r["process"] for r in runs)
+        last = runs[-1]
+        print(
+            f"{name:<18} {seconds * 1000:>10.1f} {process * 1000:>11.1f} {last['modules']:>8}  "
+            f"{', '.join(last['heavy']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark del costo de logger.info en el hilo que loguea
+
+Compara utils.setup_logging con handlers directos (archivo rotativo +
+consola) contra el modo cola (QueueHandler + QueueListener), en texto y
+JSON, con rotación comprimida. La consola se redirige a /dev/null. Reporta
+el costo medio por llamada y los peores casos, que en modo directo
+incluyen las rotaciones (y su compresión).
+
+Uso: python benchmarks/bench_logging.py [--messages 10000] [--max-bytes 200000] [--pause 0.0002]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils  # noqa: E402
+
+
+def run(mode: str, messages: int, max_bytes: int, pause: float, workdir: str):
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    utils.setup_logging(
+        os.path.join(workdir, f"{mode}.log"),
+        "INFO",
+        max_bytes,
+        backup_count=3,
+        use_queue=mode != "directo",
+        json_format=mode == "cola json",
+        compress=True,
+    )
+    log = logging.getLogger("bench")
+    costs = []
+    for i in range(messages):
+        t0 = time.perf_counter()
+        log.info(f"Recordatorio encolado para Sebastián en chat {i}")
+        costs.append(time.perf_counter() - t0)
+        if pause:
+            # Como en el bot: entre logs el hilo del bucle hace otras cosas
+            time.sleep(pause)
+    t0 = time.perf_counter()
+    utils.stop_logging()
+    drain = time.perf_counter() - t0
+    costs.sort()
+    return sum(costs) / len(costs), costs[int(len(costs) * 0.99)], costs[-1], drain
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo por mensaje de logging")
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--max-bytes", type=int, default=200_000, help="tamaño de rotación")
+    parser.add_argument("--pause", type=float, default=0.0002, help="pausa entre logs (s); 0 = ráfaga")
+    args = parser.parse_args()
+
+    # La consola va a /dev/null para medir el costo sin llenar la terminal
+    devnull = open(os.devnull, "w")
+    real_stderr, sys.stderr = sys.stderr, devnull
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            for mode in ("directo", "cola", "cola json"):
+                results.append((mode, *run(mode, args.messages, args.max_bytes, args.pause, workdir)))
+    finally:
+        sys.stderr = real_stderr
+        devnull.close()
+
+    print(f"{'modo':<10} {'µs/log':>8} {'p99 µs':>8} {'máx ms':>8} {'vaciado ms':>11}")
+    for mode, mean, p99, worst, drain in results:
+        print(f"{mode:<10} {mean * 1e6:>8.1f} {p99 * 1e6:>8.1f} {worst * 1e3:>8.2f} {drain * 1e3:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
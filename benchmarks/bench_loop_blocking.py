@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark del bloqueo del bucle de eventos por la persistencia
+
+Ejecuta comandos /hecho simulados (mark_done + switch_turn) dentro de un
+bucle asyncio, con y sin SerialWriter, mientras una tarea de latido mide
+cuánto se atrasa el bucle. Reporta el tiempo que cada comando pasa dentro
+del bucle (bloqueándolo), el atraso máximo y p99 del latido, y el tiempo
+que se espera la durabilidad cuando se pide.
+
+--fsync-delay simula un disco lento agregando una espera a cada fsync.
+
+Uso: python benchmarks/bench_loop_blocking.py [--chats 10000] [--commands 2000] [--fsync-delay 0.005]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_store import ChatState, ChatStore  # noqa: E402
+from persistence import SerialWriter  # noqa: E402
+
+HEARTBEAT = 0.001
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def heartbeat(lags: List[float], stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + HEARTBEAT
+        await asyncio.sleep(HEARTBEAT)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def run_commands(store: ChatStore, chats: int, commands: int, durable_every: int):
+    blocked: List[float] = []
+    waited: List[float] = []
+    lags: List[float] = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    day = date(2025, 1, 1)
+    for i in range(commands):
+        chat_id = i % chats + 1
+        t0 = time.perf_counter()
+        store.mark_done(chat_id, day + timedelta(days=i // chats))
+        store.switch_turn(chat_id)
+        store.flush_if_due()
+        blocked.append(time.perf_counter() - t0)
+        if durable_every and i % durable_every == 0:
+            t0 = time.perf_counter()
+            await store.wait_durable()
+            waited.append(time.perf_counter() - t0)
+        # Otros chats y el JobQueue corren entre comandos
+        await asyncio.sleep(0)
+    stop.set()
+    await beat
+    return blocked, waited, lags
+
+
+def build_store(workdir: str, chats: int, writer: Optional[SerialWriter]) -> ChatStore:
+    store = ChatStore(os.path.join(workdir, "state.json"), sync_every=64, compact_every=2_000, writer=writer)
+    for chat_id in range(1, chats + 1):
+        store._chats[chat_id] = ChatState(chat_id)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bloqueo del bucle de eventos por persistencia")
+    parser.add_argument("--chats", type=int, default=10_000)
+    parser.add_argument("--commands", type=int, default=2_000)
+    parser.add_argument("--fsync-delay", type=float, default=0.0, help="espera extra por fsync (disco lento)")
+    parser.add_argument("--durable-every", type=int, default=10, help="cada cuántos comandos esperar durabilidad")
+    args = parser.parse_args()
+
+    if args.fsync_delay:
+        real_fsync = os.fsync
+
+        def slow_fsync(fd):
+            time.sleep(args.fsync_delay)
+            real_fsync(fd)
+
+        os.fsync = slow_fsync
+
+    print(
+        f"{'modo':<10} {'bloqueo µs/cmd':>15} {'bloqueo máx ms':>15} {'atraso p99 ms':>14} "
+        f"{'atraso máx ms':>14} {'espera durable ms':>18}"
+    )
+    for mode in ("síncrono", "escritor"):
+        with tempfile.TemporaryDirectory() as workdir:
+            writer = SerialWriter() if mode == "escritor" else None
+            store = build_store(workdir, args.chats, writer)
+            blocked, waited, lags = asyncio.run(run_commands(store, args.chats, args.commands, args.durable_every))
+            store.close()
+            if writer:
+                writer.close()
+        mean_blocked = sum(blocked) / len(blocked) * 1e6
+        mean_waited = sum(waited) / len(waited) * 1e3 if waited else 0.0
+        print(
+            f"{mode:<10} {mean_blocked:>15.1f} {max(blocked) * 1e3:>15.2f} {percentile(lags, 0.99) * 1e3:>14.2f} "
+            f"{max(lags, default=0.0) * 1e3:>14.2f} {mean_waited:>18.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark del costo de las métricas de /metrics
+
+Mide el costo por llamada de Counter.inc e Histogram.observe sobre una
+serie ya resuelta, el recargo del decorador engine.instrumented sobre un
+handler vacío y lo que tarda generar el texto de /metrics con muchas
+series (lo que paga cada consulta del scraper).
+
+Uso: python benchmarks/bench_metrics.py [--calls 200000] [--series 100]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Counter, Histogram, Registry  # noqa: E402
+
+
+def per_call(fn, calls: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - t0) / calls
+
+
+async def handler_overhead(calls: int):
+    from bot_core.engine import instrumented
+
+    async def handler(update, context):
+        pass
+
+    wrapped = instrumented("bench")(handler)
+    results = []
+    for fn in (handler, wrapped):
+        t0 = time.perf_counter()
+        for _ in range(calls):
+            await fn(None, None)
+        results.append((time.perf_counter() - t0) / calls)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de registrar y exponer métricas")
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--series", type=int, default=100, help="series por métrica al generar /metrics")
+    args = parser.parse_args()
+
+    registry = Registry()
+    counter = Counter("bench_total", "contador", ["command"], registry=registry)
+    histogram = Histogram("bench_seconds", "histograma", ["command"], registry=registry)
+    child_counter = counter.labels("status")
+    child_histogram = histogram.labels("status")
+
+    print(f"{'operación':<28} {'ns/llamada':>11}")
+    print(f"{'Counter.inc':<28} {per_call(child_counter.inc, args.calls) * 1e9:>11.0f}")
+    print(f"{'Histogram.observe':<28} {per_call(lambda: child_histogram.observe(0.012), args.calls) * 1e9:>11.0f}")
+    print(f"{'labels() + inc':<28} {per_call(lambda: counter.labels('status').inc(), args.calls) * 1e9:>11.0f}")
+
+    # Importar el motor crea sus archivos de estado: se hace en un directorio temporal
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            plain, wrapped = asyncio.run(handler_overhead(args.calls))
+        finally:
+            os.chdir(cwd)
+    print(f"{'handler instrumentado (extra)':<28} {(wrapped - plain) * 1e9:>11.0f}")
+
+    for i in range(args.series):
+        counter.labels(f"cmd{i}").inc()
+        histogram.labels(f"cmd{i}").observe(i / 1000)
+    t0 = time.perf_counter()
+    text = registry.render()
+    elapsed = time.perf_counter() - t0
+    print(f"\n/metrics con {args.series} series por métrica: {elapsed * 1e3:.2f} ms, {len(text)} bytes")
+
+
+if __name__ == "__main__":
+    main()
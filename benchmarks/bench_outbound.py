@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark del motor de envíos contra una API falsa local
+
+Envía un recordatorio a cada chat a través de OutboundEngine. La API
+falsa simula latencia de red y devuelve RetryAfter con una probabilidad
+dada. Reporta msg/s sostenidos y contadores del motor.
+
+Uso: python benchmarks/bench_outbound.py [--chats 600] [--latency 0.05]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.error import RetryAfter  # noqa: E402
+
+from outbound import OutboundEngine  # noqa: E402
+
+
+class FakeBot:
+    """Bot falso: latencia fija y RetryAfter aleatorio"""
+
+    def __init__(self, latency: float, retry_after_rate: float):
+        self.latency = latency
+        self.retry_after_rate = retry_after_rate
+        self.delivered = 0
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        await asyncio.sleep(self.latency)
+        if random.random() < self.retry_after_rate:
+            raise RetryAfter(1)
+        self.delivered += 1
+        return {"chat_id": chat_id, "text": text}
+
+
+async def run(args):
+    bot = FakeBot(args.latency, args.retry_after_rate)
+    engine = OutboundEngine(global_rate=args.global_rate, max_concurrency=args.concurrency)
+    t0 = time.perf_counter()
+    results = await asyncio.gather(
+        *(engine.send_message(bot, chat_id, "🔔 Recordatorio") for chat_id in range(args.chats)),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - t0
+    errors = sum(isinstance(r, Exception) for r in results)
+    stats = engine.stats()
+    print(f"chats: {args.chats}  entregados: {bot.delivered}  errores: {errors}")
+    print(f"tiempo: {elapsed:.2f}s  sostenido: {bot.delivered / elapsed:.1f} msg/s (límite {args.global_rate})")
+    print(f"intentos: {stats['attempted']}  RetryAfter: {stats['retried']}  fallidos: {stats['failed']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chats", type=int, default=600)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--retry-after-rate", type=float, default=0.0)
+    parser.add_argument("--global-rate", type=float, default=30.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
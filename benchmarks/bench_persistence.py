@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark de persistencia: escritura síncrona vs log de operaciones
+
+Simula comandos /hecho (mark_done + switch_turn + stop_reminding) sobre
+un estado con muchos chats y reporta latencia por comando, fsync por
+comando y bytes escritos por comando.
+
+Uso: python benchmarks/bench_persistence.py [--chats 1000] [--commands 2000]
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_store import ChatState, ChatStore  # noqa: E402
+
+
+class LegacyStore(ChatStore):
+    """Reproduce el comportamiento anterior: json.dump indentado en cada mutación"""
+
+    def __init__(self, state_file: str):
+        super().__init__(state_file=None)
+        self.legacy_file = state_file
+        self.writes = 0
+
+    def _record(self, op: dict):
+        chat = self._apply(op)
+        self.save()
+        return chat
+
+    def save(self):
+        with open(self.legacy_file, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2, default=str)
+        self.writes += 1
+
+
+def populate(store: ChatStore, chats: int) -> list:
+    ids = list(range(1, chats + 1))
+    for chat_id in ids:
+        store._chats[chat_id] = ChatState(chat_id)
+    return ids
+
+
+def run(store: ChatStore, ids: list, commands: int, legacy: bool) -> list:
+    latencies = []
+    day = date(2025, 1, 1)
+    for i in range(commands):
+        chat_id = random.choice(ids)
+        t0 = time.perf_counter()
+        store.mark_done(chat_id, day + timedelta(days=i))
+        store.switch_turn(chat_id)
+        if legacy:
+            store.save()  # stop_reminding reescribía el archivo otra vez
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def report(name: str, latencies: list, syncs: int, written: int, commands: int):
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1e6
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1e6
+    print(f"{name:<10} {p50:>10.1f} {p99:>10.1f} {syncs / commands:>10.3f} {written / commands:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--chats", type=int, default=1000)
+    parser.add_argument("--commands", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'modo':<10} {'p50 µs':>10} {'p99 µs':>10} {'fsync/cmd':>10} {'bytes/cmd':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = LegacyStore(os.path.join(tmp, "legacy.json"))
+        ids = populate(legacy, args.chats)
+        latencies = run(legacy, ids, args.commands, legacy=True)
+        written = os.path.getsize(legacy.legacy_file) * legacy.writes
+        report("antes", latencies, legacy.writes, written, args.commands)
+
+        store = ChatStore(os.path.join(tmp, "state.json"))
+        ids = populate(store, args.chats)
+        store.compact()
+        store.snapshots = store.snapshot_bytes = 0
+        journal = store._journal
+        latencies = run(store, ids, args.commands, legacy=False)
+        store.flush()
+        written = journal.bytes_written + store.snapshot_bytes
+        report("log", latencies, journal.syncs + store.snapshots, written, args.commands)
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
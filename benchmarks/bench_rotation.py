@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la rotación de turnos (rotation.py)
+
+Simula --rounds rondas con --members personas y pesos al azar, y compara lo
+que cuesta cada ronda (consultar quién tiene el turno y quién sigue, y
+avanzar) con la lista de próximos turnos mantenida en forma incremental
+contra recalcularla entera en cada consulta, como haría una rotación sin
+caché. También mide /turnos (los próximos 7) con la lista ya armada.
+
+Uso: python benchmarks/bench_rotation.py [--members 6] [--rounds 20000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rotation import UPCOMING, Rotation  # noqa: E402
+
+
+def build(members: int) -> Rotation:
+    rotation = Rotation()
+    for person in range(members):
+        rotation.set_weight(person, random.randint(1, 3))
+    return rotation
+
+
+def run(rotation: Rotation, members: int, rounds: int, day: int, rebuild: bool) -> list:
+    served = []
+    for i in range(rounds):
+        if rebuild:
+            rotation._invalidate()
+        served.append(rotation.current(members, day + i))
+        rotation.upcoming(members, day + i, 2)
+        rotation.advance(members, day + i)
+    return served
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo por ronda de la rotación")
+    parser.add_argument("--members", type=int, default=6)
+    parser.add_argument("--rounds", type=int, default=20_000)
+    args = parser.parse_args()
+
+    random.seed(1)
+    base = build(args.members)
+    day = 740_000
+
+    print(f"{args.members} personas, {args.rounds} rondas ({UPCOMING} precalculadas)\n")
+    print(f"{'método':<14} {'µs/ronda':>9}")
+    results = []
+    for name, rebuild in (("incremental", False), ("recalcular", True)):
+        rotation = base.copy()
+        t0 = time.perf_counter()
+        results.append(run(rotation, args.members, args.rounds, day, rebuild))
+        elapsed = (time.perf_counter() - t0) / args.rounds
+        print(f"{name:<14} {elapsed * 1e6:>9.2f}")
+    assert results[0] == results[1]
+
+    rotation = base.copy()
+    rotation.current(args.members, day)
+    t0 = time.perf_counter()
+    for _ in range(args.rounds):
+        rotation.upcoming(args.members, day, 7)
+    elapsed = (time.perf_counter() - t0) / args.rounds
+    print(f"\nPróximos 7 turnos: {elapsed * 1e9:.0f} ns por consulta")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark del renderizado de mensajes
+
+Compara el costo por mensaje de la construcción anterior (f-strings con
+`message +=` en cada llamada) contra las plantillas precalculadas y las
+salidas cacheadas de templates.py.
+
+Uso: python benchmarks/bench_templates.py [--number 200000]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from templates import format_day, help_text, personas_list, reminder_text, render  # noqa: E402
+
+PERSONAS = ("Sebastián", "Francisca")
+NOMBRE = "Sebastián"
+TURNO = 1
+LAST_DAY = date(2025, 6, 28)
+NOW = datetime(2025, 6, 28, 15, 30)
+
+
+def legacy_status() -> str:
+    saludo = f"👋 ¡Hola {NOMBRE}!\n\n" if NOMBRE else ""
+    message = (
+        saludo +
+        f"📊 Estado:\n\n"
+        f"👤 Turno: {PERSONAS[TURNO]}\n"
+        f"📅 Último día: {LAST_DAY.strftime('%d/%m/%Y') if LAST_DAY else 'Nunca'}\n"
+        f"🕐 Hora Chile: {NOW.strftime('%d/%m/%Y %H:%M')}\n\n"
+        f"Personas:\n"
+    )
+    for i, persona in enumerate(PERSONAS):
+        icon = "👉" if i == TURNO else "   "
+        message += f"{icon} {persona}\n"
+    return message
+
+
+def template_status() -> str:
+    return render(
+        "status",
+        None,
+        saludo=render("saludo", None, nombre=NOMBRE) if NOMBRE else "",
+        persona=PERSONAS[TURNO],
+        ultimo_dia=format_day(LAST_DAY),
+        hora=NOW.strftime('%d/%m/%Y %H:%M'),
+        zona="America/Santiago",
+        personas=personas_list(PERSONAS, TURNO),
+    )
+
+
+def legacy_help() -> str:
+    return (
+        f"🤖 Bot de Recordatorios\n\n"
+        f"Comandos:\n"
+        f"/start - Iniciar bot\n"
+        f"/registrar <nombre> - Identificarte (ej: /registrar Sebastián)\n"
+        f"/hecho - Marcar tarea realizada\n"
+        f"/status - Ver estado\n"
+        f"/help - Ayuda\n\n"
+        f"👥 Personas: {', '.join(PERSONAS)}\n"
+        f"🌍 Zona horaria: Chile"
+    )
+
+
+def template_help() -> str:
+    return help_text(None, PERSONAS, "America/Santiago")
+
+
+def legacy_reminder() -> str:
+    return f"🔔 {PERSONAS[TURNO]}, te toca recoger las cacas 💩\nMarca /hecho cuando termines"
+
+
+def template_reminder() -> str:
+    return reminder_text(None, PERSONAS[TURNO])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark de plantillas")
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    cases = [
+        ("status", legacy_status, template_status),
+        ("help", legacy_help, template_help),
+        ("recordatorio", legacy_reminder, template_reminder),
+    ]
+    print(f"{'mensaje':<14} {'antes ns':>10} {'plantilla ns':>13} {'speedup':>8}")
+    for name, legacy, template in cases:
+        before = timeit.timeit(legacy, number=args.number) / args.number * 1e9
+        after = timeit.timeit(template, number=args.number) / args.number * 1e9
+        print(f"{name:<14} {before:>10.0f} {after:>13.0f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
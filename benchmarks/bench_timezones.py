@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la resolución de horarios por chat en un tick de recordatorios
+
+Compara, para --chats chats repartidos en --zones zonas, localizar la
+hora de cada chat con datetime (día local y si está dentro del horario)
+contra las tablas precalculadas de timezones.get_window (búsquedas
+binarias sobre epoch enteros). También mide lo que cuesta armar una
+tabla, que se paga una vez por zona y horario cada HORIZON_DAYS días.
+
+Uso: python benchmarks/bench_timezones.py [--chats 10000] [--zones 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timezones import HORIZON_DAYS, ReminderWindow, get_window, get_zone, in_window  # noqa: E402
+
+ZONES = ("America/Santiago", "America/Punta_Arenas", "Europe/Madrid", "America/New_York", "Pacific/Easter")
+WINDOW = (8, 23)
+
+
+def localized(chats, now: float) -> int:
+    open_count = 0
+    for zone_name in chats:
+        local = datetime.fromtimestamp(now, get_zone(zone_name))
+        local.date().toordinal()
+        if in_window(local.hour, *WINDOW):
+            open_count += 1
+    return open_count
+
+
+def precomputed(chats, now: int) -> int:
+    open_count = 0
+    for zone_name in chats:
+        window = get_window(zone_name, *WINDOW)
+        window.day_of(now)
+        if window.is_open(now):
+            open_count += 1
+    return open_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de resolver el horario de cada chat")
+    parser.add_argument("--chats", type=int, default=10_000)
+    parser.add_argument("--zones", type=int, default=4, choices=range(1, len(ZONES) + 1))
+    parser.add_argument("--ticks", type=int, default=20)
+    args = parser.parse_args()
+
+    chats = [ZONES[i % args.zones] for i in range(args.chats)]
+    now = int(time.time())
+    assert localized(chats, now) == precomputed(chats, now)
+
+    print(f"{'método':<14} {'ms/tick':>9} {'ns/chat':>9}")
+    for name, fn in (("datetime", localized), ("tablas", precomputed)):
+        t0 = time.perf_counter()
+        for tick in range(args.ticks):
+            fn(chats, now + tick * 60)
+        elapsed = (time.perf_counter() - t0) / args.ticks
+        print(f"{name:<14} {elapsed * 1e3:>9.2f} {elapsed / args.chats * 1e9:>9.0f}")
+
+    t0 = time.perf_counter()
+    ReminderWindow(ZONES[0], *WINDOW).day_of(now)
+    print(f"\nArmar una tabla ({HORIZON_DAYS} días): {(time.perf_counter() - t0) * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Núcleo compartido del bot de recordatorios
+
+Todos los puntos de entrada (main.py, simple_bot.py y las versiones
+anteriores) llaman a run(). Importar este paquete es barato: el motor
+(bot_core.engine, que trae telegram y carga el estado) y cada modo de
+ejecución se importan recién al elegir el modo, y cada modo importa solo
+lo que usa.
+
+Modos (BOT_MODE o run("...")):
+- polling: getUpdates, con servidor HTTP para / y /metrics
+- webhook: Telegram envía los updates por HTTP (webhook.py)
+- simple: getUpdates sin servidor HTTP
+"""
+
+import importlib
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Nombre del modo -> módulo con run(config); se pueden registrar otros
+MODES: Dict[str, str] = {
+    "polling": "bot_core.modes.polling",
+    "webhook": "bot_core.modes.webhook",
+    "simple": "bot_core.modes.simple",
+}
+
+
+def load_mode(mode: str):
+    """Importa el módulo del modo (solo entonces se cargan sus dependencias)"""
+    try:
+        return importlib.import_module(MODES[mode])
+    except KeyError:
+        raise ValueError(f"Modo desconocido: {mode} (opciones: {', '.join(MODES)})") from None
+
+
+def run(mode: Optional[str] = None):
+    """Configura el logging y ejecuta el bot en el modo pedido (o BOT_MODE)"""
+    from config import Config
+    from utils import setup_logging
+
+    config = Config()  # Token en la variable de entorno TELEGRAM_TOKEN (o TOKEN)
+    if mode:
+        config.RUN_MODE = mode
+    # Logging en un hilo aparte: en los handlers cada log solo se encola
+    setup_logging(
+        config.LOG_FILE,
+        config.LOG_LEVEL,
+        config.LOG_MAX_BYTES,
+        config.LOG_BACKUP_COUNT,
+        use_queue=True,
+        json_format=config.LOG_JSON,
+        compress=config.LOG_COMPRESS,
+    )
+    logger.info(f"Iniciando bot de Telegram en modo {config.RUN_MODE}...")
+    if not config.validate():
+        logger.error("Configuración inválida: revisa BOT_MODE, WEBHOOK_URL y CONCURRENT_UPDATES")
+        return
+
+    load_mode(config.RUN_MODE).run(config)
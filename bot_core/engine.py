@@ -0,0 +1,722 @@
+"""
+Motor del bot de recordatorios: estado, handlers, jobs y ciclo de vida
+
+Importarlo no toca el disco ni arranca hilos: init() carga el estado
+(state.json, identities.json, outbox.json, updates.json) y
+build_application lo llama antes de armar la Application de Telegram con
+los handlers y jobs; los modos de bot_core.modes la ejecutan. El servidor
+HTTP con el watchdog, el perfilado y la grabación de updates se importan
+y arman solo si el modo o la configuración los piden.
+"""
+
+import functools
+import json
+import logging
+import os
+import time
+
+# Para medir cuánto tarda el arranque hasta poder atender (ver on_startup)
+BOOT_STARTED = time.perf_counter()
+from datetime import date
+from typing import Optional, Tuple
+
+from telegram import Update
+from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes, TypeHandler
+
+from bot_core.request import GET_UPDATES_POOL_SIZE, POOL_SIZE, PollingRequest, SharedTLSRequest
+from chat_store import ChatState, ChatStore
+from dedup import UpdateDeduplicator
+from dispatch import PerChatUpdateProcessor
+from history import compute_stats
+from identity import IdentityRegistry
+from metrics import Counter, Gauge, Histogram
+from outbound import OutboundEngine
+from outbox import Outbox
+from persistence import SerialWriter
+import shutdown
+from scheduler import REMINDER_INTERVAL, ReminderScheduler, next_reminder_at
+from templates import LOCALES, format_day, get_renderer, help_text, options_text, personas_list, reminder_text, render
+from timezones import (
+    DEFAULT_TIMEZONE,
+    DEFAULT_WINDOW,
+    ReminderWindow,
+    format_window,
+    get_window,
+    is_valid_timezone,
+    parse_window,
+)
+
+logger = logging.getLogger(__name__)
+
+# Configuración (build_application toma PERSONAS de config.PERSONAS)
+PERSONAS = ("Sebastián", "Francisca")
+VACATION_MAX_DAYS = 365
+WEIGHT_MAX = 10
+FLUSH_INTERVAL = 1  # segundos máximos que una operación espera su fsync
+SCHEDULER_TICK = 60  # cada cuánto se revisan los recordatorios vencidos
+FIRST_REMINDER_DELAY = 30
+LEGACY_STATE_FILE = "bot_state.json"  # de telegram_bot_final.py / telegram_bot_improved.py
+CHECKPOINT_FILE = "checkpoint.json"  # lo escribe el apagado ordenado, lo consume el arranque
+OUTBOX_DRAIN_TIMEOUT = 5  # sin plazo de apagado en curso (p. ej. replay.py)
+
+scheduler = ReminderScheduler()
+outbound = OutboundEngine()
+
+# Estado en disco: lo carga init()
+writer: Optional[SerialWriter] = None  # escrituras en un hilo aparte, en orden, fuera del bucle de eventos
+store: Optional[ChatStore] = None
+identities: Optional[IdentityRegistry] = None
+# update_id ya procesados: al reiniciar se reanuda desde dedup.offset y se ignoran los repetidos
+dedup: Optional[UpdateDeduplicator] = None
+outbox: Optional[Outbox] = None  # recordatorios: cola persistente con reintentos (sobrevive reinicios)
+
+def on_chat_blocked(chat_id: int, reason: str):
+    """El bot ya no puede escribir en el chat: se dejan de programar recordatorios"""
+    store.set_blocked(chat_id, True)
+    scheduler.cancel(chat_id)
+    logger.warning(f"Chat {chat_id} marcado como bloqueado: {reason}")
+
+def on_chat_migrated(old_id: int, new_id: int):
+    """El grupo pasó a supergrupo: estado, registros y recordatorio siguen con el id nuevo"""
+    store.move_chat(old_id, new_id)
+    identities.move_chat(old_id, new_id)
+    when = scheduler.due_at(old_id)
+    scheduler.cancel(old_id)
+    if when is not None:
+        scheduler.schedule(new_id, when)
+    logger.info(f"Chat {old_id} migrado a {new_id}")
+
+def init():
+    """Carga el estado de disco y arma el outbox (una sola vez; build_application lo llama)"""
+    global writer, store, identities, dedup, outbox
+    if store is not None:
+        return
+    writer = SerialWriter()
+    store = ChatStore("state.json", sync_interval=FLUSH_INTERVAL, writer=writer)
+    if not len(store) and os.path.exists(LEGACY_STATE_FILE):
+        # Primer arranque con el motor común desde una de las versiones anteriores
+        try:
+            with open(LEGACY_STATE_FILE, "r", encoding="utf-8") as f:
+                store.load_dict(json.load(f))
+            store.compact()
+        except Exception as e:
+            logger.error(f"Error importando {LEGACY_STATE_FILE}: {e}")
+    identities = IdentityRegistry("identities.json", sync_interval=FLUSH_INTERVAL, writer=writer)
+    if identities.migrate(store.pop_legacy_users()):
+        store.compact()  # el snapshot ya no necesita guardar los usuarios
+    dedup = UpdateDeduplicator("updates.json", sync_interval=FLUSH_INTERVAL, writer=writer)
+    outbox = Outbox(
+        "outbox.json",
+        engine=outbound,
+        on_blocked=on_chat_blocked,
+        on_migrated=on_chat_migrated,
+        sync_interval=FLUSH_INTERVAL,
+        writer=writer,
+    )
+
+# Métricas para /metrics
+COMMANDS = Counter("bot_commands_total", "Comandos procesados por resultado", ["command", "outcome"])
+COMMAND_SECONDS = Histogram("bot_command_duration_seconds", "Duración de los handlers de comandos", ["command"])
+REMINDER_JOB_SECONDS = Histogram("bot_reminder_job_duration_seconds", "Duración de cada tick de recordatorios")
+Counter("bot_sends_attempted_total", "Llamadas a la API de Telegram intentadas", fn=lambda: outbound.attempted)
+Counter("bot_sends_succeeded_total", "Llamadas a la API de Telegram exitosas", fn=lambda: outbound.sent)
+Counter("bot_sends_failed_total", "Llamadas a la API de Telegram fallidas", fn=lambda: outbound.failed)
+Counter("bot_updates_duplicate_total", "Updates repetidos ignorados", fn=lambda: dedup.duplicates)
+Gauge("bot_update_offset", "Siguiente update_id esperado", fn=lambda: dedup.offset)
+Gauge("bot_outbox_depth", "Mensajes pendientes en el outbox", fn=lambda: len(outbox))
+Gauge("bot_outbound_waiting", "Envíos esperando cupo del rate limiter", fn=lambda: outbound.waiting)
+Gauge("bot_outbound_in_flight", "Envíos en curso hacia la API", fn=lambda: outbound.in_flight)
+
+# Servidor HTTP en el bucle de eventos (salud para Railway y /metrics), con la medición del
+# bucle y el watchdog (/healthz, /readyz; vuelca la pila si el bucle se bloquea). Solo en
+# polling con servidor y en webhook: los arma serve_http
+http_server = None
+http_address: Optional[Tuple[str, int]] = None  # en polling lo levanta on_startup
+loop_lag = None
+watchdog = None
+
+# Perfilado bajo demanda (BOT_PROFILE o /profile); solo si hay BOT_PROFILE o ADMIN_IDS
+profiler = None
+admin_ids: frozenset = frozenset()  # build_application los toma de ADMIN_IDS
+
+# Grabación de los updates recibidos para replay.py (BOT_RECORD_UPDATES)
+recorder = None
+
+# Zona y horario por defecto (BOT_TIMEZONE y REMINDER_*_HOUR); cada chat puede cambiarlos
+default_zone = DEFAULT_TIMEZONE
+default_window = DEFAULT_WINDOW
+
+def serve_http(config):
+    """Arma el servidor HTTP con /, /healthz, /readyz y /metrics, y el watchdog que los responde"""
+    global http_server, loop_lag, watchdog
+    if http_server is not None:
+        return
+    from health import Watchdog
+    from httpd import HTTPServer
+    from metrics import LoopLagMonitor, serve_metrics
+
+    http_server = HTTPServer()
+    loop_lag = LoopLagMonitor()
+    watchdog = Watchdog(loop_lag, config.HEALTH_MAX_LAG, config.HEALTH_MAX_POLL_AGE, config.HEALTH_MAX_JOB_AGE)
+    http_server.route("GET", "/", home)
+    http_server.route("GET", "/healthz", watchdog.healthz)
+    http_server.route("GET", "/readyz", watchdog.readyz)
+    http_server.route("GET", "/metrics", serve_metrics)
+
+async def home(request):
+    """Salud para Railway: "Bot activo" solo si el bot está listo (ver watchdog.readyz)"""
+    return watchdog.render(watchdog.readiness(), b"Bot activo")
+
+def chat_window(chat: Optional[ChatState]) -> ReminderWindow:
+    """Tabla de horario del chat, compartida con los chats de la misma zona y horario"""
+    if chat is None:
+        return get_window(default_zone, *default_window)
+    return get_window(chat.zona or default_zone, *(chat.horario or default_window))
+
+def current_turn(chat: ChatState, today: Optional[int] = None) -> int:
+    """Índice en PERSONAS de quien tiene el turno hoy (según la zona del chat)"""
+    if today is None:
+        today = chat_window(chat).day_of(int(time.time()))
+    return chat.get_turn(len(PERSONAS), today)
+
+def person_index(nombre: str) -> Optional[int]:
+    nombre = nombre.capitalize()
+    return PERSONAS.index(nombre) if nombre in PERSONAS else None
+
+def instrumented(command: str):
+    """Cuenta las llamadas al handler y mide su duración"""
+    ok = COMMANDS.labels(command, "ok")
+    error = COMMANDS.labels(command, "error")
+    seconds = COMMAND_SECONDS.labels(command)
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+            start = time.perf_counter()
+            try:
+                await handler(update, context)
+            except Exception:
+                error.inc()
+                raise
+            else:
+                ok.inc()
+            finally:
+                seconds.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+@instrumented("start")
+async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Comando /start con saludo"""
+    chat_id = update.effective_chat.id
+    user_id = update.effective_user.id
+    chat = store.ensure_chat(chat_id)
+    nombre = identities.resolve(chat_id, user_id)
+    idioma = chat.idioma
+
+    if chat.bloqueado:
+        # Si llega un /start, el chat volvió a aceptar mensajes
+        store.set_blocked(chat_id, False)
+        logger.info(f"Chat {chat_id} desbloqueado")
+
+    if chat_id not in scheduler:
+        schedule_chat(chat_id, int(time.time()), FIRST_REMINDER_DELAY)
+
+    message = render(
+        "start",
+        idioma,
+        saludo=render("saludo", idioma, nombre=nombre) if nombre else "",
+        persona=PERSONAS[current_turn(chat)],
+        ultimo_dia=format_day(chat.get_last_day(), idioma),
+        ejemplo=PERSONAS[0],
+    )
+
+    await outbound.reply(update, message)
+    logger.info(f"Bot iniciado en chat {chat_id} por {nombre if nombre else 'usuario no registrado'}")
+
+@instrumented("registrar")
+async def registrar_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Comando /registrar para asociar usuario con nombre."""
+    chat_id = update.effective_chat.id
+    idioma = store.get_locale(chat_id)
+    args = context.args
+    if not args:
+        await outbound.reply(update, render("registrar_uso", idioma, opciones=options_text(idioma, PERSONAS)))
+        return
+
+    nombre = args[0].capitalize()
+    if nombre not in PERSONAS:
+        await outbound.reply(update, render("registrar_invalido", idioma, personas=", ".join(PERSONAS)))
+        return
+
+    user_id = update.effective_user.id
+
+    # Guardar registro
+    identities.register(chat_id, user_id, nombre)
+
+    await outbound.reply(update, render("registrado", idioma, nombre=nombre))
+
+@instrumented("hecho")
+async def hecho_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Comando /hecho con validación de usuario registrado"""
+    chat_id = update.effective_chat.id
+    user = update.effective_user
+    user_id = user.id
+    idioma = store.get_locale(chat_id)
+
+    # Verificar si el usuario está registrado
+    usuario_registrado = identities.resolve(chat_id, user_id)
+
+    if not usuario_registrado:
+        await outbound.reply(update, render("no_registrado", idioma, opciones=options_text(idioma, PERSONAS)))
+        return
+
+    # El día es el de la zona del chat
+    chat = store.ensure_chat(chat_id)
+    members = len(PERSONAS)
+    now = int(time.time())
+    today = chat_window(chat).day_of(now)
+    turn = chat.get_turn(members, today)
+    expected_person = PERSONAS[turn]
+
+    if usuario_registrado != expected_person:
+        message = render("no_es_tu_turno", idioma, nombre=usuario_registrado, persona=expected_person)
+        await outbound.reply(update, message)
+        return
+
+    if chat.ultimo_dia == today:
+        await outbound.reply(update, render("ya_marcado", idioma))
+        return
+
+    # La ronda se cierra antes de marcar el día: una vez marcado, la ronda actual pasa a ser la de mañana
+    store.switch_turn(chat_id, members, today)
+    store.mark_done(chat_id, date.fromordinal(today), turn)
+    schedule_chat(chat_id, now)
+
+    next_person = PERSONAS[chat.get_turn(members, today)]
+
+    # El cambio de turno se confirma solo cuando ya está en disco
+    await store.wait_durable()
+
+    message = render(
+        "hecho", idioma, nombre=usuario_registrado, persona=next_person, dia=format_day(date.fromordinal(today), idioma)
+    )
+
+    await outbound.reply(update, message)
+    logger.info(f"Tarea marcada por {usuario_registrado} en chat {chat_id}")
+
+@instrumented("status")
+async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Comando /status con saludo"""
+    chat_id = update.effective_chat.id
+    user_id = update.effective_user.id
+    nombre = identities.resolve(chat_id, user_id)
+    idioma = store.get_locale(chat_id)
+
+    chat = store.get(chat_id)
+    window = chat_window(chat)
+    now = int(time.time())
+    turn = current_turn(chat, window.day_of(now)) if chat else 0
+
+    message = render(
+        "status",
+        idioma,
+        saludo=render("saludo", idioma, nombre=nombre) if nombre else "",
+        persona=PERSONAS[turn],
+        ultimo_dia=format_day(store.get_last_day(chat_id), idioma),
+        hora=window.local_time(now).strftime('%d/%m/%Y %H:%M'),
+        zona=window.zone_name,
+        personas=personas_list(PERSONAS, turn),
+    )
+
+    await outbound.reply(update, message)
+
+@instrumented("turnos")
+async def turnos_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Comando /turnos: próximos turnos; saltar, cambiar <nombre>, vacaciones <nombre> <días|off>, peso <nombre> <n>"""
+    chat_id = update.effective_chat.id
+    chat = store.ensure_chat(chat_id)
+    idioma = chat.idioma
+    members = len(PERSONAS)
+    today = chat_window(chat).day_of(int(time.time()))
+    args = context.args or []
+    action = args[0].lower() if args else ""
+
+    if not action:
+        line = get_renderer("turnos_linea", idioma)
+        first = chat.round_day(today)
+        upcoming = store.upcoming(chat_id, members, today, 7)
+        lista = "".join(
+            line(dia=format_day(date.fromordinal(first + i), idioma), persona=PERSONAS[person])
+            for i, person in enumerate(upcoming)
+        )
+        await outbound.reply(update, render("turnos", idioma, lista=lista))
+        return
+
+    nombre = identities.resolve(chat_id, update.effective_user.id)
+    if not nombre:
+        await outbound.reply(update, render("no_registrado", idioma, opciones=options_text(idioma, PERSONAS)))
+        return
+
+    turn = chat.get_turn(members, today)
+    rotation = chat.rotation()
+    target = person_index(args[1]) if len(args) > 1 else None
+
+    if action in ("saltar", "cambiar"):
+        # Solo quien tiene el turno lo puede pasar
+        if nombre != PERSONAS[turn]:
+            await outbound.reply(update, render("no_es_tu_turno", idioma, nombre=nombre, persona=PERSONAS[turn]))
+            return
+        if action == "saltar":
+            store.skip_turn(chat_id, members, today)
+            message = render("turno_saltado", idioma, nombre=nombre, persona=PERSONAS[chat.get_turn(members, today)])
+        else:
+            day = chat.round_day(today)
+            if target is None or target == turn or rotation.weight(target) <= 0 or rotation.on_vacation(target, day):
+                await outbound.reply(update, render("turno_no_disponible", idioma, nombre=args[1] if len(args) > 1 else "?"))
+                return
+            store.swap_turn(chat_id, members, today, target)
+            message = render("turno_cambiado", idioma, nombre=PERSONAS[target], persona=nombre)
+    elif action == "vacaciones" and target is not None and len(args) > 2:
+        if args[2].lower() == "off":
+            store.set_vacation(chat_id, target, None, None)
+            message = render("vacaciones_fin", idioma, nombre=PERSONAS[target])
+        elif args[2].isdigit() and 1 <= int(args[2]) <= VACATION_MAX_DAYS:
+            end = today + int(args[2]) - 1
+            store.set_vacation(chat_id, target, today, end)
+            message = render("vacaciones", idioma, nombre=PERSONAS[target], dia=format_day(date.fromordinal(end), idioma))
+        else:
+            message = render("turnos_uso", idioma)
+    elif action == "peso" and target is not None and len(args) > 2 and args[2].isdigit():
+        weight = int(args[2])
+        others = sum(rotation.weight(i) > 0 for i in range(members) if i != target)
+        if weight > WEIGHT_MAX or (weight == 0 and not others):
+            message = render("peso_invalido", idioma, maximo=WEIGHT_MAX)
+        else:
+            store.set_weight(chat_id, target, weight)
+            message = render("peso", idioma, nombre=PERSONAS[target], peso=weight)
+    else:
+        message = render("turnos_uso", idioma)
+
+    await outbound.reply(update, message)
+
+@instrumented("stats")
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Comando /stats: quién la hizo más, rachas, atraso y equidad del reparto"""
+    chat = store.get(update.effective_chat.id)
+    idioma = chat.idioma if chat else None
+    if chat is None or not chat.historial:
+        await outbound.reply(update, render("stats_vacio", idioma))
+        return
+
+    today = chat_window(chat).day_of(int(time.time()))
+    stats = compute_stats(chat.historial, today, len(PERSONAS))
+
+    persona_line = get_renderer("stats_persona", idioma)
+    personas = "".join(
+        persona_line(nombre=nombre, mes=mes, total=total, atraso="-" if atraso is None else f"{atraso:.1f}")
+        for nombre, mes, total, atraso in zip(PERSONAS, stats.month_counts, stats.counts, stats.lateness)
+    )
+    message = render(
+        "stats",
+        idioma,
+        total=stats.total,
+        racha=stats.streak,
+        record=stats.best_streak,
+        equidad=round(stats.fairness * 100),
+        personas=personas,
+    )
+    await outbound.reply(update, message)
+
+@instrumented("help")
+async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Comando /help"""
+    chat = store.get(update.effective_chat.id)
+    if chat is None:
+        await outbound.reply(update, help_text(None, PERSONAS, default_zone))
+        return
+    await outbound.reply(update, help_text(chat.idioma, PERSONAS, chat.zona or default_zone))
+
+@instrumented("idioma")
+async def idioma_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Comando /idioma para cambiar el idioma del chat"""
+    chat_id = update.effective_chat.id
+    idioma = context.args[0].lower() if context.args else None
+
+    if idioma not in LOCALES:
+        await outbound.reply(update, render("idioma_uso", store.get_locale(chat_id), idiomas=", ".join(LOCALES)))
+        return
+
+    store.set_locale(chat_id, idioma)
+    await outbound.reply(update, render("idioma_cambiado", idioma))
+
+@instrumented("zona")
+async def zona_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Comando /zona para cambiar la zona horaria del chat (nombre IANA)"""
+    chat_id = update.effective_chat.id
+    chat = store.ensure_chat(chat_id)
+
+    if not context.args:
+        await outbound.reply(update, render("zona_uso", chat.idioma, zona=chat.zona or default_zone))
+        return
+
+    zona = context.args[0]
+    if not is_valid_timezone(zona):
+        await outbound.reply(update, render("zona_invalida", chat.idioma, zona=zona))
+        return
+
+    store.set_timezone(chat_id, None if zona == default_zone else zona)
+    window = reschedule_in_window(chat)
+    hora = window.local_time(time.time()).strftime('%d/%m/%Y %H:%M')
+    await outbound.reply(update, render("zona_cambiada", chat.idioma, zona=zona, hora=hora))
+
+@instrumented("horario")
+async def horario_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Comando /horario para elegir las horas locales en que se recuerda (p. ej. 8-23)"""
+    chat_id = update.effective_chat.id
+    chat = store.ensure_chat(chat_id)
+
+    try:
+        horario = parse_window(" ".join(context.args or ()))
+    except ValueError:
+        actual = format_window(*(chat.horario or default_window))
+        await outbound.reply(update, render("horario_uso", chat.idioma, horario=actual))
+        return
+
+    store.set_window(chat_id, None if horario == default_window else horario)
+    window = reschedule_in_window(chat)
+    await outbound.reply(update, render("horario_cambiado", chat.idioma, horario=format_window(*horario), zona=window.zone_name))
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Comando /profile (solo administradores): on [comandos|all] [mem], off, dump, reset"""
+    if update.effective_user.id not in admin_ids:
+        logger.warning(f"/profile rechazado para el usuario {update.effective_user.id}")
+        return
+
+    args = [arg.lower() for arg in context.args or []]
+    action = args[0] if args else "status"
+
+    if action == "on":
+        from profiling import parse_targets
+
+        memory = "mem" in args[1:]
+        targets = parse_targets(",".join(arg for arg in args[1:] if arg != "mem")) or parse_targets("all")
+        profiler.enable(targets, memory=memory)
+        message = profiler.status()
+    elif action == "off":
+        profiler.disable()
+        message = profiler.status()
+    elif action == "reset":
+        profiler.reset()
+        message = "Perfil reiniciado"
+    elif action == "dump":
+        summary, paths = await profiler.dump()
+        # Telegram corta en 4096 caracteres; el resumen completo queda en el archivo
+        message = summary[:3500] + "\n\n" + "\n".join(paths)
+    else:
+        message = profiler.status() + "\n\nUso: /profile on [comandos|all] [mem] | off | dump | reset"
+
+    await outbound.reply(update, message)
+
+def schedule_chat(chat_id: int, now: int, delay: int = REMINDER_INTERVAL):
+    """Reprograma el próximo recordatorio de un chat según su estado"""
+    chat = store.get(chat_id)
+    last_day = chat.ultimo_dia if chat else None
+    scheduler.schedule(chat_id, next_reminder_at(now, last_day, chat_window(chat), delay))
+
+def reschedule_in_window(chat: ChatState) -> ReminderWindow:
+    """Tras cambiar la zona o el horario, corre el recordatorio pendiente al nuevo horario"""
+    window = chat_window(chat)
+    due = scheduler.due_at(chat.chat_id)
+    if due is not None:
+        scheduler.schedule(chat.chat_id, window.clamp(int(due)))
+    return window
+
+def schedule_all_chats():
+    """Programa todos los chats conocidos (al arrancar); tras un apagado ordenado, desde el checkpoint"""
+    now = int(time.time())
+    checkpoint = shutdown.load_checkpoint(CHECKPOINT_FILE, seq=store.seq, horarios=[default_zone, *default_window])
+    if checkpoint:
+        chats, due = checkpoint["chats"], checkpoint["due"]
+        scheduler.restore(chats, due)
+        # Lo que venció con el bot apagado se programa como en un arranque en frío
+        for chat_id, when in zip(chats, due):
+            if when < now + FIRST_REMINDER_DELAY:
+                schedule_chat(chat_id, now, FIRST_REMINDER_DELAY)
+        logger.info(f"{len(scheduler)} chats programados desde el checkpoint")
+        return
+    for chat in store:
+        if not chat.bloqueado:
+            schedule_chat(chat.chat_id, now, FIRST_REMINDER_DELAY)
+    logger.info(f"{len(scheduler)} chats programados para recordatorios")
+
+def queue_reminder(chat_id: int, now: int):
+    """Encola el recordatorio de un chat (si corresponde) y lo reprograma"""
+    chat = store.get(chat_id)
+    if chat is None or chat.bloqueado:
+        return
+
+    # Días como ordinales en la zona del chat: sin armar fechas por chat
+    today = chat_window(chat).day_of(now)
+    last_day = chat.ultimo_dia
+    if last_day is None or last_day < today:
+        current_person = PERSONAS[current_turn(chat, today)]
+        days_passed = 0 if last_day is None else today - last_day
+
+        if days_passed <= 1:
+            message = reminder_text(chat.idioma, current_person)
+        else:
+            message = render("recordatorio_atrasado", chat.idioma, persona=current_person, dias=days_passed)
+
+        # Un recordatorio nuevo reemplaza al anterior si este no se alcanzó a enviar
+        outbox.enqueue(chat_id, message, key="recordatorio")
+        logger.info(f"Recordatorio encolado para {current_person} en chat {chat_id}")
+
+    schedule_chat(chat_id, now)
+
+async def reminder_job(context: ContextTypes.DEFAULT_TYPE):
+    """Encola recordatorios solo para los chats vencidos; el outbox los envía"""
+    start = time.perf_counter()
+    now = int(time.time())
+    due = scheduler.pop_due(now)
+    for chat_id in due:
+        queue_reminder(chat_id, now)
+    REMINDER_JOB_SECONDS.observe(time.perf_counter() - start)
+    if due:
+        logger.info(f"Tick de recordatorios: {len(due)} chats vencidos, {len(outbox)} mensajes en cola")
+
+async def flush_job(context: ContextTypes.DEFAULT_TYPE):
+    """Sincroniza las operaciones del log más antiguas que el intervalo"""
+    # Primero los update_id: si se corta entre ambos, un update puede perderse pero no aplicarse dos veces
+    dedup.flush_if_due()
+    store.flush_if_due()
+    identities.flush_if_due()
+    outbox.flush_if_due()
+
+async def on_startup(application):
+    """Arranca los workers del outbox, la medición del bucle y (en polling) el servidor HTTP"""
+    outbox.start(application.bot)
+    if watchdog:
+        loop_lag.start()
+        watchdog.start()
+    if profiler:
+        profiler.start()
+    if http_address:
+        await http_server.start(*http_address)
+    logger.info(f"Listo para atender en {(time.perf_counter() - BOOT_STARTED) * 1e3:.0f} ms desde que se cargó el motor")
+
+async def on_stop(application):
+    """Envía lo que el outbox ya tiene listo (con el plazo que quede) y lo detiene; el resto queda en disco"""
+    await outbox.drain(shutdown.remaining(OUTBOX_DRAIN_TIMEOUT))
+    await outbox.stop()
+    if watchdog:
+        await loop_lag.stop()
+        watchdog.stop()
+    if profiler:
+        profiler.close()
+    if http_address:
+        await http_server.stop()
+
+async def on_shutdown(application):
+    """Escritura final del estado y del checkpoint para el próximo arranque"""
+    dedup.close()
+    store.close()
+    identities.close()
+    outbox.close()
+    if recorder:
+        recorder.close()
+    chats, due = scheduler.entries()
+    checkpoint = {
+        "seq": store.seq,
+        "horarios": [default_zone, *default_window],
+        "chats": chats,
+        "due": due,
+    }
+    shutdown.write_checkpoint(CHECKPOINT_FILE, checkpoint, writer)
+    writer.close()
+    logger.info("Estado guardado antes de apagar")
+
+def build_application(config, webhook: bool = False, bot=None, address: Optional[Tuple[str, int]] = None):
+    """Application con los handlers y jobs del bot
+
+    Con webhook=True no tiene Updater y arma el servidor HTTP (lo levanta
+    webhook.py). Con address (polling) arma el servidor y on_startup lo
+    levanta ahí. bot reemplaza al cliente de la API (replay.py usa un
+    StubBot); en ese caso tampoco hay Updater.
+    """
+    global PERSONAS, admin_ids, default_zone, default_window, recorder, profiler, http_address
+    init()
+    PERSONAS = tuple(config.PERSONAS)
+    admin_ids = frozenset(config.ADMIN_IDS)
+    default_zone = config.TIMEZONE
+    default_window = (config.REMINDER_START_HOUR, config.REMINDER_END_HOUR)
+    if webhook or address:
+        serve_http(config)
+    http_address = address
+    if config.PROFILE or admin_ids:
+        from profiling import Profiler, parse_targets
+
+        profiler = Profiler(parse_targets(config.PROFILE), config.PROFILE_MEMORY, config.PROFILE_DIR)
+
+    builder = ApplicationBuilder()
+    if bot is not None:
+        builder = builder.bot(bot).updater(None)
+    else:
+        builder = builder.token(config.TOKEN)
+        get_updates_request = PollingRequest(GET_UPDATES_POOL_SIZE)
+        builder = builder.request(SharedTLSRequest(POOL_SIZE)).get_updates_request(get_updates_request)
+        if watchdog:
+            # En webhook no hay getUpdates que vigilar
+            watchdog.polling = None if webhook else get_updates_request
+        if config.API_BASE_URL:
+            builder = builder.base_url(config.API_BASE_URL)
+        if webhook:
+            builder = builder.updater(None)
+    builder = builder.post_init(on_startup).post_stop(on_stop).post_shutdown(on_shutdown)
+    # Chats distintos en paralelo; los updates de un mismo chat, en orden
+    builder = builder.concurrent_updates(PerChatUpdateProcessor(config.CONCURRENT_UPDATES))
+    app = builder.build()
+    if watchdog:
+        watchdog.application = app
+    if app.updater and dedup.window.high:
+        # Se reanuda desde el último update visto; PTB no expone el offset inicial de getUpdates
+        app.updater._last_update_id = dedup.offset
+
+    # Antes que los comandos: se graban todos los updates tal como llegan (grupo -2)
+    # y los repetidos no pasan del grupo -1
+    if config.RECORD_UPDATES:
+        from replay import UpdateRecorder
+
+        recorder = UpdateRecorder(config.RECORD_UPDATES, writer)
+        app.add_handler(TypeHandler(Update, recorder.record), group=-2)
+    app.add_handler(TypeHandler(Update, dedup.handle), group=-1)
+
+    # Registrar comandos
+    app.add_handler(CommandHandler("start", start_command))
+    app.add_handler(CommandHandler("registrar", registrar_command))
+    app.add_handler(CommandHandler("hecho", hecho_command))
+    app.add_handler(CommandHandler("status", status_command))
+    app.add_handler(CommandHandler("help", help_command))
+    app.add_handler(CommandHandler("stats", stats_command))
+    app.add_handler(CommandHandler("turnos", turnos_command))
+    app.add_handler(CommandHandler("idioma", idioma_command))
+    app.add_handler(CommandHandler("zona", zona_command))
+    app.add_handler(CommandHandler("horario", horario_command))
+    if profiler:
+        app.add_handler(CommandHandler("profile", profile_command))
+
+    # Recordatorios cada 3 horas por chat, revisando solo los vencidos
+    job_queue = app.job_queue
+    if job_queue:
+        schedule_all_chats()
+        job_queue.run_repeating(reminder_job, interval=SCHEDULER_TICK, first=SCHEDULER_TICK)
+        job_queue.run_repeating(flush_job, interval=FLUSH_INTERVAL, first=FLUSH_INTERVAL)
+        if watchdog:
+            from health import HEARTBEAT_INTERVAL
+
+            job_queue.run_repeating(watchdog.heartbeat_job, interval=HEARTBEAT_INTERVAL, first=0)
+
+    if profiler:
+        # Los handlers y jobs quedan envueltos para poder perfilarlos sin reiniciar
+        profiler.instrument(app)
+    return app
@@ -0,0 +1,7 @@
+"""
+Modos de ejecución del bot
+
+Cada módulo expone build(config), que importa el motor y lo que el modo
+necesita y arma la Application, y run(config), que además la ejecuta.
+bot_core.MODES los registra por nombre.
+"""
@@ -0,0 +1,24 @@
+"""
+Modo polling: getUpdates y servidor HTTP para / (Railway) y /metrics
+
+Con http=False es el modo simple: sin servidor HTTP ni watchdog.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def build(config, http: bool = True):
+    from bot_core import engine
+
+    return engine.build_application(config, address=(config.HOST, config.PORT) if http else None)
+
+
+def run(config, http: bool = True):
+    from supervisor import run_polling
+
+    app = build(config, http)
+    logger.info(f"Bot configurado. Iniciando polling{'' if http else ' (modo simple)'}...")
+    # Sin drop_pending_updates: los pendientes se procesan y engine.dedup salta los repetidos
+    run_polling(app, config.SHUTDOWN_TIMEOUT)
@@ -0,0 +1,17 @@
+"""
+Modo simple: solo getUpdates, sin servidor HTTP
+
+Para correr el bot en una máquina propia, donde nadie consulta / ni
+/metrics y no hace falta abrir un puerto. Es el modo polling sin el
+servidor HTTP ni el watchdog que lo responde.
+"""
+
+from bot_core.modes import polling
+
+
+def build(config):
+    return polling.build(config, http=False)
+
+
+def run(config):
+    polling.run(config, http=False)
@@ -0,0 +1,22 @@
+"""
+Modo webhook: Telegram envía los updates al servidor HTTP del proceso
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def build(config):
+    from bot_core import engine
+
+    return engine.build_application(config, webhook=True)
+
+
+def run(config):
+    from bot_core import engine
+    from webhook import run_webhook
+
+    app = build(config)
+    logger.info("Bot configurado. Iniciando webhook...")
+    run_webhook(app, config, engine.http_server)
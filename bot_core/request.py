@@ -0,0 +1,52 @@
+"""
+Cliente HTTP de la Bot API con un solo contexto TLS por proceso
+
+PTB arma dos clientes httpx (envíos y getUpdates) y cada uno carga de
+nuevo los certificados de certifi, ~30 ms por cliente, también al
+reconstruirlos tras un shutdown. SharedTLSRequest reutiliza un
+contexto cargado una vez.
+
+PollingRequest, el cliente de getUpdates, además recuerda cuándo fue la
+última respuesta exitosa: el watchdog la usa para /readyz.
+"""
+
+import functools
+import ssl
+import time
+
+import httpx
+from telegram.request import HTTPXRequest
+
+# Igual que ApplicationBuilder: muchos envíos en paralelo, getUpdates de a uno
+POOL_SIZE = 256
+GET_UPDATES_POOL_SIZE = 1
+
+
+@functools.lru_cache(maxsize=None)
+def shared_ssl_context() -> ssl.SSLContext:
+    return httpx.create_ssl_context()
+
+
+class SharedTLSRequest(HTTPXRequest):
+    """HTTPXRequest que usa shared_ssl_context() en lugar de cargar uno propio"""
+
+    __slots__ = ()
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(**self._client_kwargs, verify=shared_ssl_context())
+
+
+class PollingRequest(SharedTLSRequest):
+    """SharedTLSRequest que anota el instante (monotónico) de la última respuesta 200"""
+
+    __slots__ = ("last_ok",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_ok = time.monotonic()  # al crearlo cuenta como reciente: el primer long poll tarda
+
+    async def do_request(self, *args, **kwargs):
+        code, payload = await super().do_request(*args, **kwargs)
+        if code == 200:
+            self.last_ok = time.monotonic()
+        return code, payload
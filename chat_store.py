@@ -0,0 +1,412 @@
+"""
+Almacenamiento del estado por chat (multi-hogar)
+
+Cada chat tiene su propio turno e historial; los usuarios registrados
+viven en identity.IdentityRegistry. La búsqueda por chat_id es O(1) y la
+memoria crece linealmente con la cantidad de chats.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from history import History
+from journal import Journal
+from persistence import SerialWriter, atomic_write, dump_json_mapping
+from rotation import Rotation
+
+logger = logging.getLogger(__name__)
+
+STORE_VERSION = 2
+LEGACY_MEMBERS = 2  # las operaciones anteriores a rotation.py suponían dos personas
+
+
+class ChatState:
+    """Estado de un chat. Usa __slots__ para mantener el costo por chat bajo."""
+
+    __slots__ = ("chat_id", "rotacion", "ultimo_dia", "historial", "idioma", "bloqueado", "zona", "horario")
+
+    def __init__(self, chat_id: int):
+        self.chat_id = chat_id
+        # Se crea al primer cambio de turno; sin ella el turno es de la primera persona
+        self.rotacion: Optional[Rotation] = None
+        # Día como ordinal (date.toordinal) para no guardar objetos date
+        self.ultimo_dia: Optional[int] = None
+        # Se crea al primer uso: la mayoría de los chats no lo necesita
+        self.historial: Optional[History] = None
+        self.idioma: Optional[str] = None  # None = idioma por defecto
+        self.bloqueado = False  # el bot ya no puede escribir en el chat
+        self.zona: Optional[str] = None  # None = zona por defecto
+        self.horario: Optional[Tuple[int, int]] = None  # (apertura, cierre); None = por defecto
+
+    def get_last_day(self) -> Optional[date]:
+        if self.ultimo_dia is None:
+            return None
+        return date.fromordinal(self.ultimo_dia)
+
+    def rotation(self) -> Rotation:
+        if self.rotacion is None:
+            self.rotacion = Rotation()
+        return self.rotacion
+
+    def round_day(self, today: Optional[int]) -> Optional[int]:
+        """Día de la ronda actual: hoy, o mañana si la tarea de hoy ya se hizo"""
+        if today is None or self.ultimo_dia is None or self.ultimo_dia < today:
+            return today
+        return self.ultimo_dia + 1
+
+    def get_turn(self, members: int = LEGACY_MEMBERS, today: Optional[int] = None) -> int:
+        """Índice de quien tiene el turno (today = ordinal local, para las vacaciones)"""
+        if self.rotacion is None:
+            return 0
+        return self.rotacion.current(members, self.round_day(today))
+
+    def copy(self) -> "ChatState":
+        chat = ChatState(self.chat_id)
+        chat.rotacion = self.rotacion.copy() if self.rotacion else None
+        chat.ultimo_dia = self.ultimo_dia
+        chat.historial = self.historial.copy() if self.historial else None
+        chat.idioma = self.idioma
+        chat.bloqueado = self.bloqueado
+        chat.zona = self.zona
+        chat.horario = self.horario
+        return chat
+
+    def to_dict(self) -> dict:
+        data = {
+            "ultimo_dia": self.get_last_day().isoformat() if self.ultimo_dia else None,
+            "historial": self.historial.to_dict() if self.historial else [],
+        }
+        if self.idioma:
+            data["idioma"] = self.idioma
+        if self.bloqueado:
+            data["bloqueado"] = True
+        if self.zona:
+            data["zona"] = self.zona
+        if self.horario:
+            data["horario"] = list(self.horario)
+        if self.rotacion:
+            data["rotacion"] = self.rotacion.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, chat_id: int, data: dict) -> "ChatState":
+        chat = cls(chat_id)
+        if "rotacion" in data:
+            chat.rotacion = Rotation.from_dict(data["rotacion"])
+        elif data.get("turno"):
+            # Formato anterior: solo el índice del turno
+            chat.rotacion = Rotation.starting_at(data["turno"])
+        chat.ultimo_dia = _parse_day(data.get("ultimo_dia"))
+        chat.idioma = data.get("idioma")
+        chat.bloqueado = data.get("bloqueado", False)
+        chat.zona = data.get("zona")
+        horario = data.get("horario")
+        chat.horario = tuple(horario) if horario else None
+        historial = data.get("historial")
+        if historial:
+            chat.historial = History.from_dict(historial)
+        return chat
+
+
+def _parse_day(value) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value).toordinal()
+    except (ValueError, TypeError):
+        logger.warning(f"Fecha inválida en estado: {value}")
+        return None
+
+
+class ChatStore:
+    """Almacén de estados indexado por chat_id
+
+    Si se indica state_file, cada mutación se registra como operación en un
+    log append-only (state_file + ".log") y el estado completo se compacta
+    periódicamente en state_file.
+    """
+
+    def __init__(
+        self,
+        state_file: Optional[str] = "state.json",
+        sync_interval: float = 1.0,
+        sync_every: int = 64,
+        compact_every: int = 10_000,
+        writer: Optional[SerialWriter] = None,
+    ):
+        self.state_file = state_file
+        self.compact_every = compact_every
+        self._chats: Dict[int, ChatState] = {}
+        self._journal: Optional[Journal] = None
+        # Usuarios registrados en formatos anteriores, pendientes de pasar
+        # al registro de identidades (ver pop_legacy_users)
+        self._legacy_users: Dict[int, Dict[int, str]] = {}
+        # Métricas
+        self.snapshots = 0
+        self.snapshot_bytes = 0
+        if state_file:
+            self._journal = Journal(state_file + ".log", sync_interval, sync_every, writer)
+            self.load()
+
+    # --- Acceso ---
+
+    def __len__(self) -> int:
+        return len(self._chats)
+
+    @property
+    def seq(self) -> int:
+        """Última operación registrada (identifica el estado en el checkpoint de apagado)"""
+        return self._journal.seq if self._journal else 0
+
+    def __contains__(self, chat_id: int) -> bool:
+        return chat_id in self._chats
+
+    def __iter__(self) -> Iterator[ChatState]:
+        return iter(self._chats.values())
+
+    def get(self, chat_id: int) -> Optional[ChatState]:
+        return self._chats.get(chat_id)
+
+    def chat_ids(self) -> List[int]:
+        return list(self._chats)
+
+    def ensure_chat(self, chat_id: int) -> ChatState:
+        """Devuelve el estado del chat, creándolo si no existe"""
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._record({"op": "set_chat_id", "chat": chat_id})
+            logger.info(f"Chat registrado: {chat_id}")
+        return chat
+
+    def get_turn(self, chat_id: int, members: int = LEGACY_MEMBERS, today: Optional[int] = None) -> int:
+        chat = self._chats.get(chat_id)
+        return chat.get_turn(members, today) if chat else 0
+
+    def upcoming(self, chat_id: int, members: int, today: Optional[int], count: int) -> List[int]:
+        """Quién hace cada una de las próximas `count` rondas (una por día desde la actual)"""
+        chat = self.ensure_chat(chat_id)
+        return chat.rotation().upcoming(members, chat.round_day(today), count)
+
+    def get_last_day(self, chat_id: int) -> Optional[date]:
+        chat = self._chats.get(chat_id)
+        return chat.get_last_day() if chat else None
+
+    # --- Mutaciones ---
+
+    # Las operaciones de turno guardan el día de la ronda: al reaplicar el log
+    # dan el mismo resultado aunque haya vacaciones de por medio
+
+    def switch_turn(self, chat_id: int, members: int = LEGACY_MEMBERS, today: Optional[int] = None):
+        """Cierra la ronda actual (antes de mark_done, que ya cuenta la tarea como hecha hoy)"""
+        self._record({"op": "switch_turn", "chat": chat_id, "members": members, "day": self._round_day(chat_id, today)})
+
+    def skip_turn(self, chat_id: int, members: int, today: Optional[int]):
+        self._record({"op": "skip_turn", "chat": chat_id, "members": members, "day": self._round_day(chat_id, today)})
+
+    def swap_turn(self, chat_id: int, members: int, today: Optional[int], person: int):
+        op = {"op": "swap_turn", "chat": chat_id, "members": members, "day": self._round_day(chat_id, today), "person": person}
+        self._record(op)
+
+    def set_weight(self, chat_id: int, person: int, weight: int):
+        self._record({"op": "set_weight", "chat": chat_id, "person": person, "weight": weight})
+
+    def set_vacation(self, chat_id: int, person: int, start: Optional[int], end: Optional[int]):
+        """Vacaciones entre los días start y end (ordinales, inclusive); start=None las quita"""
+        self._record({"op": "set_vacation", "chat": chat_id, "person": person, "from": start, "to": end})
+
+    def _round_day(self, chat_id: int, today: Optional[int]) -> Optional[int]:
+        chat = self._chats.get(chat_id)
+        return chat.round_day(today) if chat else today
+
+    def mark_done(self, chat_id: int, day: date, person: Optional[int] = None):
+        op = {"op": "mark_done", "chat": chat_id, "day": day.toordinal()}
+        if person is not None:
+            op["person"] = person
+        self._record(op)
+
+    def set_locale(self, chat_id: int, locale: Optional[str]):
+        self._record({"op": "set_locale", "chat": chat_id, "locale": locale})
+
+    def set_blocked(self, chat_id: int, blocked: bool):
+        self._record({"op": "set_blocked", "chat": chat_id, "blocked": blocked})
+
+    def set_timezone(self, chat_id: int, zone: Optional[str]):
+        self._record({"op": "set_timezone", "chat": chat_id, "zone": zone})
+
+    def set_window(self, chat_id: int, window: Optional[Tuple[int, int]]):
+        self._record({"op": "set_window", "chat": chat_id, "window": list(window) if window else None})
+
+    def move_chat(self, old_id: int, new_id: int):
+        """Pasa el estado de un grupo a su nuevo id (el grupo se convirtió en supergrupo)"""
+        if old_id in self._chats:
+            self._record({"op": "move_chat", "chat": old_id, "to": new_id})
+
+    def is_blocked(self, chat_id: int) -> bool:
+        chat = self._chats.get(chat_id)
+        return chat.bloqueado if chat else False
+
+    def get_locale(self, chat_id: int) -> Optional[str]:
+        chat = self._chats.get(chat_id)
+        return chat.idioma if chat else None
+
+    def _record(self, op: dict) -> ChatState:
+        chat = self._apply(op)
+        if self._journal:
+            self._journal.append(op)
+            if self._journal.entries >= self.compact_every:
+                self.compact()
+        return chat
+
+    def _apply(self, op: dict) -> ChatState:
+        """Aplica una operación al estado en memoria (también al reaplicar el log)"""
+        chat_id = op["chat"]
+        kind = op["op"]
+        if kind == "move_chat":
+            return self._move(chat_id, op["to"])
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = ChatState(chat_id)
+        if kind == "switch_turn":
+            chat.rotation().advance(op.get("members", LEGACY_MEMBERS), op.get("day"))
+        elif kind == "mark_done":
+            # Sin "person" (formato anterior) la hizo quien tenía el turno: el
+            # switch_turn venía después
+            person = op.get("person")
+            if person is None:
+                person = chat.get_turn()
+            chat.ultimo_dia = op["day"]
+            if chat.historial is None:
+                chat.historial = History()
+            chat.historial.append(op["day"], person)
+        elif kind == "skip_turn":
+            chat.rotation().skip(op["members"], op["day"])
+        elif kind == "swap_turn":
+            chat.rotation().swap(op["members"], op["day"], op["person"])
+        elif kind == "set_weight":
+            chat.rotation().set_weight(op["person"], op["weight"])
+        elif kind == "set_vacation":
+            chat.rotation().set_vacation(op["person"], op["from"], op["to"])
+        elif kind == "register_user":
+            # Operación de versiones anteriores: se migra a identity.py
+            self._legacy_users.setdefault(chat_id, {})[op["user"]] = op["name"]
+        elif kind == "set_locale":
+            chat.idioma = op["locale"]
+        elif kind == "set_blocked":
+            chat.bloqueado = op["blocked"]
+        elif kind == "set_timezone":
+            chat.zona = op["zone"]
+        elif kind == "set_window":
+            chat.horario = tuple(op["window"]) if op["window"] else None
+        elif kind != "set_chat_id":
+            logger.warning(f"Operación desconocida en el log: {kind}")
+        return chat
+
+    def _move(self, old_id: int, new_id: int) -> ChatState:
+        chat = self._chats.pop(old_id, None)
+        existing = self._chats.get(new_id)
+        if existing is not None:
+            return existing  # el supergrupo ya se usó con el id nuevo: manda ese estado
+        if chat is None:
+            chat = ChatState(new_id)
+        chat.chat_id = new_id
+        self._chats[new_id] = chat
+        return chat
+
+    # --- Persistencia ---
+
+    def to_dict(self) -> dict:
+        return {
+            "version": STORE_VERSION,
+            "chats": {str(chat_id): chat.to_dict() for chat_id, chat in self._chats.items()},
+        }
+
+    def load_dict(self, data: dict):
+        """Carga el estado, migrando el formato antiguo de un solo chat"""
+        self._chats = {}
+        self._legacy_users = {}
+        if "chats" not in data:
+            chat_id = data.get("chat_id")
+            if chat_id is None:
+                return
+            legacy = {
+                "turno": data.get("turno", 0),
+                "ultimo_dia": data.get("ultimo_dia") or data.get("ultimo_dia_realizado"),
+                "usuarios": data.get("usuarios_registrados", {}),
+            }
+            self._chats[int(chat_id)] = ChatState.from_dict(int(chat_id), legacy)
+            self._add_legacy_users(int(chat_id), legacy["usuarios"])
+            logger.info(f"Estado antiguo migrado al chat {chat_id}")
+            return
+        for key, value in data["chats"].items():
+            chat_id = int(key)
+            self._chats[chat_id] = ChatState.from_dict(chat_id, value)
+            self._add_legacy_users(chat_id, value.get("usuarios"))
+
+    def _add_legacy_users(self, chat_id: int, usuarios: Optional[dict]):
+        if usuarios:
+            self._legacy_users.setdefault(chat_id, {}).update({int(k): v for k, v in usuarios.items()})
+
+    def pop_legacy_users(self) -> Dict[int, Dict[int, str]]:
+        """Entrega (y olvida) los usuarios del formato antiguo para migrarlos"""
+        legacy, self._legacy_users = self._legacy_users, {}
+        return legacy
+
+    def load(self):
+        """Carga el snapshot y reaplica las operaciones posteriores del log"""
+        seq = 0
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.load_dict(data)
+                seq = data.get("seq", 0)
+        except Exception as e:
+            logger.error(f"Error cargando snapshot {self.state_file}: {e}")
+        self._journal.replay(self._apply, after_seq=seq)
+        logger.info(f"Estado cargado: {len(self._chats)} chats")
+
+    def compact(self):
+        """Escribe un snapshot completo y vacía el log
+
+        Aquí solo se copian los estados; el formateo, la serialización y la
+        escritura se hacen en el escritor, si hay uno.
+        """
+        if not self._journal:
+            return
+        chats = [chat.copy() for chat in self._chats.values()]
+        self._journal.checkpoint(self._write_snapshot, (chats, self._journal.seq))
+
+    def _write_snapshot(self, snapshot: Tuple[List[ChatState], int]) -> int:
+        chats, seq = snapshot
+        try:
+            header = {"version": STORE_VERSION, "seq": seq}
+            payload = dump_json_mapping(header, "chats", ((chat.chat_id, chat.to_dict()) for chat in chats))
+            atomic_write(self.state_file, payload)
+        except Exception as e:
+            logger.error(f"Error escribiendo snapshot {self.state_file}: {e}")
+            return 0
+        self.snapshots += 1
+        self.snapshot_bytes += len(payload)
+        logger.debug(f"Snapshot escrito ({len(payload)} bytes, seq {seq})")
+        return len(payload)
+
+    def flush_if_due(self) -> bool:
+        return self._journal.sync_if_due() if self._journal else False
+
+    def flush(self) -> bool:
+        return self._journal.sync() if self._journal else False
+
+    async def wait_durable(self):
+        """Espera a que las mutaciones hechas hasta ahora estén en disco"""
+        if self._journal:
+            await asyncio.wrap_future(self._journal.durable())
+
+    def close(self):
+        """Sincroniza el log y compacta antes de apagar"""
+        if self._journal:
+            self.compact()
+            self._journal.close()
@@ -5,12 +5,14 @@ Configuración del bot de Telegram
 import os
 from typing import List
 
+from timezones import DEFAULT_TIMEZONE, is_valid_timezone, validate_window
+
 class Config:
     """Clase de configuración del bot"""
     
     def __init__(self):
         # Token del bot (obligatorio)
-        self.TOKEN = os.getenv("TELEGRAM_TOKEN", "TU_TOKEN_AQUI")
+        self.TOKEN = os.getenv("TELEGRAM_TOKEN") or os.getenv("TOKEN", "TU_TOKEN_AQUI")
         
         # Validar token
         if self.TOKEN == "TU_TOKEN_AQUI":
@@ -19,32 +21,92 @@ class Config:
                 "o modifica el valor por defecto en config.py"
             )
         
-        # Nombres de las personas (modificar según necesidad)
-        self.PERSONAS: List[str] = ["Sebastián", "Francisca"]
+        # Nombres de las personas de la rotación, separados por coma (una o más)
+        self.PERSONAS: List[str] = [
+            nombre.strip().capitalize() for nombre in os.getenv("BOT_PERSONAS", "Sebastián,Francisca").split(",") if nombre.strip()
+        ]
         
-        # Configuración de recordatorios
+        # Configuración de recordatorios (por defecto; cada chat puede usar /zona y /horario)
         self.REMINDER_INTERVAL_HOURS = 3
-        self.REMINDER_START_HOUR = 8  # 8 AM
-        self.REMINDER_END_HOUR = 22   # 10 PM
+        self.TIMEZONE = os.getenv("BOT_TIMEZONE", DEFAULT_TIMEZONE)
+        self.REMINDER_START_HOUR = int(os.getenv("REMINDER_START_HOUR", 8))  # 8 AM
+        self.REMINDER_END_HOUR = int(os.getenv("REMINDER_END_HOUR", 23))  # hasta las 23:00 (la hora 22 incluida)
         
         # Archivos de persistencia
-        self.STATE_FILE = "bot_state.json"
         self.LOG_FILE = "telegram_bot.log"
         
         # Configuración de logging
         self.LOG_LEVEL = "INFO"
         self.LOG_MAX_BYTES = 10 * 1024 * 1024  # 10 MB
         self.LOG_BACKUP_COUNT = 5
+        self.LOG_JSON = os.getenv("LOG_FORMAT", "text").lower() == "json"
+        self.LOG_COMPRESS = os.getenv("LOG_COMPRESS", "1") != "0"  # rotaciones en .gz
         
         # Chat ID por defecto (se puede obtener dinámicamente)
         self.DEFAULT_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", None)
         
+        # URL base de la Bot API (para apuntar a fake_api.py en pruebas de carga)
+        self.API_BASE_URL = os.getenv("TELEGRAM_API_URL") or None
+        
+        # Modo de ejecución: "polling", "webhook" o "simple" (polling sin servidor HTTP)
+        self.RUN_MODE = os.getenv("BOT_MODE", "polling").lower()
+        
+        # Servidor HTTP (webhook y endpoint de salud)
+        self.HOST = os.getenv("HOST", "0.0.0.0")
+        self.PORT = int(os.getenv("PORT", 8000))
+        
+        # Updates procesados en paralelo (de chats distintos; cada chat va en orden)
+        self.CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", 256))
+        
+        # Webhook: URL pública, ruta y secret token que envía Telegram
+        self.WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+        self.WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+        self.WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or None
+        
+        # Usuarios (IDs de Telegram) que pueden usar comandos de administración como /profile
+        self.ADMIN_IDS = {int(uid) for uid in os.getenv("ADMIN_IDS", "").split(",") if uid.strip()}
+        
+        # Perfilado desde el arranque: "hecho,status" o "all"; también se activa con /profile
+        self.PROFILE = os.getenv("BOT_PROFILE", "")
+        self.PROFILE_MEMORY = os.getenv("BOT_PROFILE_MEMORY", "0") != "0"  # tracemalloc (costoso)
+        self.PROFILE_DIR = os.getenv("BOT_PROFILE_DIR", "profiles")
+        
+        # Segundos para drenar updates y mensajes pendientes al apagar (SIGTERM)
+        self.SHUTDOWN_TIMEOUT = float(os.getenv("BOT_SHUTDOWN_TIMEOUT", 10))
+        
+        # Límites de /healthz y /readyz (segundos): atraso del bucle de eventos (y volcado de
+        # su pila), último getUpdates exitoso y último latido de la JobQueue
+        self.HEALTH_MAX_LAG = float(os.getenv("BOT_HEALTH_MAX_LAG", 1.0))
+        self.HEALTH_MAX_POLL_AGE = float(os.getenv("BOT_HEALTH_MAX_POLL_AGE", 60))
+        self.HEALTH_MAX_JOB_AGE = float(os.getenv("BOT_HEALTH_MAX_JOB_AGE", 60))
+        
+        # Grabar los updates recibidos en este JSONL para reproducirlos con replay.py
+        self.RECORD_UPDATES = os.getenv("BOT_RECORD_UPDATES") or None
+        
     def validate(self) -> bool:
         """Valida la configuración"""
         if not self.TOKEN or self.TOKEN == "TU_TOKEN_AQUI":
             return False
             
-        if not self.PERSONAS or len(self.PERSONAS) < 2:
+        # El historial guarda el índice de la persona en un byte con signo
+        if not self.PERSONAS or len(self.PERSONAS) > 100 or len(set(self.PERSONAS)) != len(self.PERSONAS):
+            return False
+            
+        if self.RUN_MODE not in ("polling", "webhook", "simple"):
+            return False
+            
+        if self.RUN_MODE == "webhook" and not self.WEBHOOK_URL:
+            return False
+            
+        if self.CONCURRENT_UPDATES < 1:
+            return False
+            
+        if not is_valid_timezone(self.TIMEZONE):
+            return False
+            
+        try:
+            validate_window(self.REMINDER_START_HOUR, self.REMINDER_END_HOUR)
+        except ValueError:
             return False
             
         return True
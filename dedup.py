@@ -0,0 +1,235 @@
+"""
+Deduplicación de updates de Telegram por update_id
+
+Tras un reinicio Telegram vuelve a entregar los updates que el bot no
+alcanzó a confirmar (en polling, los traídos después del último
+getUpdates; en webhook, los que no recibieron respuesta). Antes se
+descartaban todos los pendientes con drop_pending_updates; ahora se
+entregan y los que ya se procesaron se ignoran, así un /hecho no se
+aplica dos veces ni se pierde uno que nadie procesó.
+
+Los update_id crecen de a uno, así que basta una ventana deslizante: el
+mayor id visto y un bitmap circular con los WINDOW ids anteriores.
+Revisar y marcar un id es O(1) y la memoria es fija (WINDOW / 8 bytes).
+Un id mayor que el último visto nunca se rechaza. Uno anterior a la
+ventana se da por procesado (una reentrega vieja) salvo que empiece una
+secuencia nueva: Telegram reinicia los update_id en un valor al azar tras
+pasar de webhook a polling o una semana sin updates. Se toma como
+secuencia nueva, y se vacía la ventana, si está a más de RESET_GAP del
+mayor visto, si es el primer update tras un reinicio (con el offset
+guardado Telegram no reentrega los anteriores) o si llegan RESET_RUN ids
+seguidos anteriores a la ventana. Cada id nuevo se agrega a un log de
+operaciones, como el resto del estado, y el log se compacta en un
+snapshot del tamaño de la ventana.
+
+UpdateDeduplicator.offset es el offset con que se reanuda getUpdates
+(engine.build_application se lo pasa al Updater).
+"""
+
+import base64
+import json
+import logging
+import os
+from typing import Optional
+
+from telegram.ext import ApplicationHandlerStop
+
+from journal import Journal
+from persistence import SerialWriter, atomic_write, dump_json
+
+logger = logging.getLogger(__name__)
+
+DEDUP_VERSION = 1
+WINDOW = 4096  # update_ids recordados hacia atrás desde el mayor
+RESET_GAP = 1_000_000  # un id tanto menor que el mayor visto empieza una secuencia nueva
+RESET_RUN = 3  # ids seguidos anteriores a la ventana que también la empiezan
+
+
+class UpdateWindow:
+    """Mayor update_id visto y bitmap circular de los WINDOW anteriores"""
+
+    __slots__ = ("size", "high", "bits", "reset_gap", "reset_run", "run", "run_last")
+
+    def __init__(self, size: int = WINDOW, reset_gap: int = RESET_GAP, reset_run: int = RESET_RUN):
+        self.size = size
+        self.high = 0
+        self.bits = bytearray(size // 8)
+        self.reset_gap = reset_gap
+        self.reset_run = reset_run
+        # Racha de ids seguidos anteriores a la ventana (ver add)
+        self.run = 0
+        self.run_last = 0
+
+    def __contains__(self, update_id: int) -> bool:
+        if update_id > self.high:
+            return False
+        if update_id <= self.high - self.size:
+            return self.high - update_id <= self.reset_gap  # reentrega vieja (ver add)
+        i = update_id % self.size
+        return bool(self.bits[i >> 3] & (1 << (i & 7)))
+
+    def add(self, update_id: int, restart: bool = False) -> bool:
+        """Marca el id; False si ya estaba visto
+
+        Con restart=True (primer update tras un reinicio, o al reaplicar el
+        log) un id anterior a la ventana empieza una secuencia nueva sin
+        esperar la racha.
+        """
+        if update_id <= self.high - self.size:
+            if self.high - update_id <= self.reset_gap and not restart:
+                self.run = self.run + 1 if update_id == self.run_last + 1 else 1
+                self.run_last = update_id
+                if self.run < self.reset_run:
+                    return False
+            # Secuencia nueva
+            self.bits = bytearray(self.size // 8)
+            self.high = update_id
+        elif update_id > self.high:
+            if update_id - self.high >= self.size:
+                self.bits = bytearray(self.size // 8)
+            else:
+                # Los ids salteados entran a la ventana sin marcar (cada uno se limpia una vez)
+                for skipped in range(self.high + 1, update_id):
+                    i = skipped % self.size
+                    self.bits[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+            self.high = update_id
+        elif update_id in self:
+            self.run = 0
+            return False
+        self.run = 0
+        i = update_id % self.size
+        self.bits[i >> 3] |= 1 << (i & 7)
+        return True
+
+    def ids(self):
+        """Ids marcados dentro de la ventana, de menor a mayor"""
+        for update_id in range(max(1, self.high - self.size + 1), self.high + 1):
+            if update_id in self:
+                yield update_id
+
+
+class UpdateDeduplicator:
+    """Registro persistente de los updates ya procesados
+
+    Se registra con TypeHandler(Update, dedup.handle) en un grupo anterior
+    al de los comandos: un update repetido corta el procesamiento con
+    ApplicationHandlerStop.
+    """
+
+    def __init__(
+        self,
+        state_file: Optional[str] = "updates.json",
+        window: int = WINDOW,
+        sync_interval: float = 1.0,
+        sync_every: int = 64,
+        writer: Optional[SerialWriter] = None,
+    ):
+        self.state_file = state_file
+        self.window = UpdateWindow(window)
+        self._journal: Optional[Journal] = None
+        self._restart = True  # el próximo update es el primero desde que arrancó el proceso
+        # Métricas
+        self.accepted = 0
+        self.duplicates = 0
+        self.snapshots = 0
+        if state_file:
+            self._journal = Journal(state_file + ".log", sync_interval, sync_every, writer)
+            self.load()
+
+    @property
+    def offset(self) -> int:
+        """Siguiente update_id esperado (el offset con que se reanuda)"""
+        return self.window.high + 1
+
+    def check(self, update_id: int) -> bool:
+        """True si el update es nuevo (y queda registrado); False si ya se procesó"""
+        restart, self._restart = self._restart, False
+        if not self.window.add(update_id, restart):
+            self.duplicates += 1
+            return False
+        self.accepted += 1
+        if self._journal:
+            self._journal.append({"id": update_id})
+            # El log nunca supera una ventana de operaciones
+            if self._journal.entries >= self.window.size:
+                self.compact()
+        return True
+
+    async def handle(self, update, context=None):
+        if not self.check(update.update_id):
+            logger.info(f"Update {update.update_id} repetido: se ignora")
+            raise ApplicationHandlerStop
+
+    # --- Persistencia ---
+
+    def _apply(self, op: dict):
+        # Cada op es un id aceptado: si quedó antes de la ventana, fue porque empezó una secuencia nueva
+        self.window.add(op["id"], restart=True)
+
+    def load(self):
+        """Carga el snapshot y reaplica las operaciones posteriores del log"""
+        seq = 0
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.load_dict(data)
+                seq = data.get("seq", 0)
+        except Exception as e:
+            logger.error(f"Error cargando updates procesados {self.state_file}: {e}")
+        self._journal.replay(self._apply, after_seq=seq)
+        if self.window.high:
+            logger.info(f"Updates procesados hasta el {self.window.high}; se reanuda desde el {self.offset}")
+
+    def load_dict(self, data: dict):
+        high = data.get("high", 0)
+        bits = base64.b64decode(data.get("bits", ""))
+        if data.get("size") == self.window.size and len(bits) == len(self.window.bits):
+            self.window.high = high
+            self.window.bits = bytearray(bits)
+            return
+        # Otra ventana: se pasan los ids marcados uno por uno
+        saved = UpdateWindow(data.get("size", WINDOW))
+        saved.high = high
+        if len(bits) == len(saved.bits):
+            saved.bits = bytearray(bits)
+        for update_id in saved.ids():
+            self.window.add(update_id)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": DEDUP_VERSION,
+            "size": self.window.size,
+            "high": self.window.high,
+            "bits": base64.b64encode(bytes(self.window.bits)).decode("ascii"),
+        }
+
+    def compact(self):
+        """Escribe un snapshot de la ventana y vacía el log"""
+        if not self._journal:
+            return
+        data = self.to_dict()
+        data["seq"] = self._journal.seq
+        self._journal.checkpoint(self._write_snapshot, data)
+
+    def _write_snapshot(self, data: dict) -> int:
+        try:
+            payload = dump_json(data)
+            atomic_write(self.state_file, payload)
+        except Exception as e:
+            logger.error(f"Error escribiendo updates procesados {self.state_file}: {e}")
+            return 0
+        self.snapshots += 1
+        return len(payload)
+
+    def flush_if_due(self) -> bool:
+        return self._journal.sync_if_due() if self._journal else False
+
+    def flush(self) -> bool:
+        return self._journal.sync() if self._journal else False
+
+    def close(self):
+        """Sincroniza el log y compacta antes de apagar"""
+        if self._journal:
+            self.compact()
+            self._journal.close()
@@ -0,0 +1,140 @@
+"""
+Procesamiento concurrente de updates serializado por chat
+
+Los updates de chats distintos se procesan en paralelo; los de un mismo
+chat, uno a la vez y en orden de llegada, con un asyncio.Lock por chat.
+Así dos /hecho seguidos del mismo chat no pueden pasar ambos la
+validación del día ni cambiar el turno dos veces. Los locks se crean al
+primer update del chat y se descartan apenas nadie los usa, por lo que
+la memoria depende de los chats activos y no de los chats conocidos.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Dict, Optional, Set
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENT_UPDATES = 256
+
+
+class _ChatLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0  # dueño + en espera
+
+
+class ChatLocks:
+    """Locks por chat creados bajo demanda y descartados al quedar libres"""
+
+    def __init__(self):
+        self._locks: Dict[int, _ChatLock] = {}
+        # Métricas
+        self.acquired = 0
+        self.contended = 0  # veces que hubo que esperar a otro update del chat
+        self.max_active = 0
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def is_busy(self, chat_id: int) -> bool:
+        return chat_id in self._locks
+
+    @asynccontextmanager
+    async def hold(self, chat_id: int) -> AsyncIterator[None]:
+        entry = self._locks.get(chat_id)
+        if entry is None:
+            entry = self._locks[chat_id] = _ChatLock()
+            if len(self._locks) > self.max_active:
+                self.max_active = len(self._locks)
+        elif entry.users:
+            self.contended += 1
+        entry.users += 1
+        try:
+            async with entry.lock:
+                self.acquired += 1
+                yield
+        finally:
+            entry.users -= 1
+            if not entry.users:
+                del self._locks[chat_id]
+
+
+def update_chat_id(update: object) -> Optional[int]:
+    """Chat al que pertenece el update, o None si no tiene chat"""
+    if isinstance(update, Update):
+        chat = update.effective_chat
+        if chat is not None:
+            return chat.id
+    return None
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """Update processor de PTB: paralelo entre chats, secuencial dentro de un chat
+
+    Se usa con ApplicationBuilder().concurrent_updates(PerChatUpdateProcessor()).
+    max_concurrent_updates limita el total de updates en curso (incluidos
+    los que esperan el lock de su chat).
+    """
+
+    def __init__(self, max_concurrent_updates: int = DEFAULT_CONCURRENT_UPDATES):
+        super().__init__(max_concurrent_updates)
+        self.locks = ChatLocks()
+        self._tasks: Set[asyncio.Task] = set()
+        self._cancelled: Set[asyncio.Task] = set()  # cancelados por cancel_in_flight
+        # Métricas
+        self.processed = 0
+        self.in_flight = 0
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        chat_id = update_chat_id(update)
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        self.in_flight += 1
+        try:
+            if chat_id is None:
+                await coroutine
+            else:
+                async with self.locks.hold(chat_id):
+                    await coroutine
+        except asyncio.CancelledError:
+            # PTB marca el update como terminado (task_done) solo si esto
+            # retorna: si no, Application.stop() espera la cola para siempre
+            if task not in self._cancelled:
+                raise
+            task.uncancel()
+            logger.warning(f"Update del chat {chat_id} cancelado por el apagado")
+        finally:
+            self._cancelled.discard(task)
+            self._tasks.discard(task)
+            self.in_flight -= 1
+            self.processed += 1
+
+    def cancel_in_flight(self) -> int:
+        """Cancela los updates en curso (al vencer el plazo de apagado); devuelve cuántos eran"""
+        for task in self._tasks:
+            task.cancel()
+        self._cancelled.update(self._tasks)
+        return len(self._tasks)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        if self.in_flight:
+            logger.warning(f"Procesador detenido con {self.in_flight} updates en curso")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "processed": self.processed,
+            "in_flight": self.in_flight,
+            "active_chats": len(self.locks),
+            "max_active_chats": self.locks.max_active,
+            "contended": self.locks.contended,
+        }
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Servidor falso de la Bot API de Telegram para pruebas de carga
+
+Implementa getMe, getUpdates, setWebhook, deleteWebhook, sendMessage,
+editMessageText y answerCallbackQuery con latencia configurable e
+inyección de errores y RetryAfter. Cada petición se registra como una
+línea JSON con el mismo formato que requests.jsonl (request_id, title,
+body), y cada update entregado como title "update" con su hora (ts), que
+es lo que reproduce replay.py.
+
+Los handlers reales se conectan con TELEGRAM_API_URL:
+
+    python fake_api.py --port 8081 --chats 100 --rate 50
+    TELEGRAM_TOKEN=123:fake TELEGRAM_API_URL=http://127.0.0.1:8081/bot python main.py
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+from telegram import Bot, Chat, Message, User
+
+from httpd import HTTPServer, Request, Response
+
+logger = logging.getLogger(__name__)
+
+BOT_USER = {
+    "id": 1,
+    "is_bot": True,
+    "first_name": "FakeBot",
+    "username": "fake_bot",
+    "can_join_groups": True,
+    "can_read_all_group_messages": False,
+    "supports_inline_queries": False,
+}
+
+
+def make_command_update(update_id: int, chat_id: int, user_id: int, text: str, first_name: str = "Usuario") -> dict:
+    """Construye un update con un mensaje de comando (p. ej. "/hecho")"""
+    command = text.split()[0]
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": first_name},
+            "text": text,
+            "entities": [{"type": "bot_command", "offset": 0, "length": len(command)}],
+        },
+    }
+
+
+class StubBot(Bot):
+    """Bot en proceso sin red: registra los mensajes y devuelve Message falsos
+
+    Sirve para medir handlers sin el costo (ni la variabilidad) de HTTP.
+    """
+
+    def __init__(self, token: str = "123:stub"):
+        super().__init__(token)
+        with self._unfrozen():
+            self.sent: List[tuple] = []
+            self._next_message_id = itertools.count(1)
+
+    async def get_me(self, *args, **kwargs) -> User:
+        # Permite Application.initialize() sin red
+        self._bot_user = User.de_json(BOT_USER, self)
+        return self._bot_user
+
+    async def send_message(self, chat_id, text, *args, **kwargs) -> Message:
+        self.sent.append((chat_id, text))
+        message = Message(
+            message_id=next(self._next_message_id),
+            date=None,
+            chat=Chat(id=int(chat_id), type=Chat.PRIVATE),
+            text=text,
+        )
+        message.set_bot(self)
+        return message
+
+
+class FakeTelegramAPI:
+    """Bot API falsa servida sobre httpd.HTTPServer"""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after_rate: float = 0.0,
+        retry_after: int = 1,
+        record_file: Optional[str] = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after_rate = retry_after_rate
+        self.retry_after = retry_after
+        self.server = HTTPServer()
+        self.server.fallback = self.handle
+        self.updates: List[dict] = []
+        self._new_updates = asyncio.Event()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self.webhook_url = ""
+        self.webhook_secret: Optional[str] = None
+        self._record = open(record_file, "a", encoding="utf-8") if record_file else None
+        self._request_ids = itertools.count(1)
+        # Mensajes enviados por el bot: chat_id -> [texto, ...]
+        self.sent: Dict[int, List[str]] = {}
+        self.calls: Dict[str, int] = {}
+
+    # --- Control desde pruebas ---
+
+    def push_update(self, update: dict):
+        """Encola un update para getUpdates (o lo envía al webhook)"""
+        if self._record:
+            record = {"request_id": next(self._request_ids), "title": "update", "ts": time.time(), "body": update}
+            self._record.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if self.webhook_url:
+            asyncio.get_running_loop().create_task(self._deliver(update))
+            return
+        self.updates.append(update)
+        self._new_updates.set()
+
+    def push_command(self, chat_id: int, user_id: int, text: str, first_name: str = "Usuario") -> dict:
+        update = make_command_update(next(self._update_ids), chat_id, user_id, text, first_name)
+        self.push_update(update)
+        return update
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081):
+        await self.server.start(host, port)
+
+    async def stop(self):
+        await self.server.stop()
+        if self._record:
+            self._record.close()
+            self._record = None
+
+    # --- HTTP ---
+
+    async def handle(self, request: Request) -> Response:
+        parts = request.path.strip("/").split("/")
+        if len(parts) != 2 or not parts[0].startswith("bot"):
+            return Response(404)
+        method = parts[1]
+        params = self._parse_params(request)
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if self._record:
+            record = {"request_id": next(self._request_ids), "title": method, "body": params}
+            self._record.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        if method != "getUpdates":
+            delay = self.latency + random.uniform(0, self.jitter)
+            if delay:
+                await asyncio.sleep(delay)
+            if self.retry_after_rate and random.random() < self.retry_after_rate:
+                return self._error(
+                    429, f"Too Many Requests: retry after {self.retry_after}", retry_after=self.retry_after
+                )
+            if self.error_rate and random.random() < self.error_rate:
+                return self._error(500, "Internal Server Error")
+
+        api_method = getattr(self, f"api_{method}", None)
+        if api_method is None:
+            return self._error(404, "Not Found: method not found")
+        result = await api_method(params)
+        if isinstance(result, Response):
+            return result
+        return self._ok(result)
+
+    @staticmethod
+    def _parse_params(request: Request) -> Dict[str, Any]:
+        params: Dict[str, Any] = dict(request.query)
+        content_type = request.headers.get("content-type", "")
+        if request.body and "json" in content_type:
+            params.update(json.loads(request.body))
+        elif request.body:
+            for key, value in parse_qsl(request.body.decode("utf-8"), keep_blank_values=True):
+                try:
+                    params[key] = json.loads(value)
+                except ValueError:
+                    params[key] = value
+        return params
+
+    @staticmethod
+    def _ok(result: Any) -> Response:
+        body = json.dumps({"ok": True, "result": result}, ensure_ascii=False).encode("utf-8")
+        return Response(200, body, "application/json")
+
+    @staticmethod
+    def _error(code: int, description: str, retry_after: Optional[int] = None) -> Response:
+        payload: Dict[str, Any] = {"ok": False, "error_code": code, "description": description}
+        if retry_after is not None:
+            payload["parameters"] = {"retry_after": retry_after}
+        return Response(code, json.dumps(payload).encode("utf-8"), "application/json")
+
+    # --- Métodos de la API ---
+
+    async def api_getMe(self, params: dict):
+        return BOT_USER
+
+    async def api_getUpdates(self, params: dict):
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+        if offset:
+            self.updates = [u for u in self.updates if u["update_id"] >= offset]
+        if not self.updates and timeout:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.updates[:limit]
+
+    async def api_setWebhook(self, params: dict):
+        self.webhook_url = params.get("url", "")
+        self.webhook_secret = params.get("secret_token")
+        if params.get("drop_pending_updates"):
+            self.updates.clear()
+        pending, self.updates = self.updates, []
+        for update in pending:
+            self.push_update(update)
+        return True
+
+    async def api_deleteWebhook(self, params: dict):
+        self.webhook_url = ""
+        self.webhook_secret = None
+        if params.get("drop_pending_updates"):
+            self.updates.clear()
+        return True
+
+    async def api_getWebhookInfo(self, params: dict):
+        return {"url": self.webhook_url, "has_custom_certificate": False, "pending_update_count": len(self.updates)}
+
+    async def api_sendMessage(self, params: dict):
+        chat_id = int(params["chat_id"])
+        text = params.get("text", "")
+        self.sent.setdefault(chat_id, []).append(text)
+        return self._message(chat_id, next(self._message_ids), text)
+
+    async def api_editMessageText(self, params: dict):
+        chat_id = int(params.get("chat_id") or 0)
+        return self._message(chat_id, int(params.get("message_id") or 0), params.get("text", ""))
+
+    async def api_answerCallbackQuery(self, params: dict):
+        return True
+
+    @staticmethod
+    def _message(chat_id: int, message_id: int, text: str) -> dict:
+        return {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": text,
+        }
+
+    async def _deliver(self, update: dict):
+        """Entrega un update al webhook configurado (cliente HTTP mínimo)"""
+        url = urlsplit(self.webhook_url)
+        body = json.dumps(update).encode("utf-8")
+        headers = f"POST {url.path or '/'} HTTP/1.1\r\nHost: {url.hostname}\r\n"
+        headers += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n"
+        if self.webhook_secret:
+            headers += f"X-Telegram-Bot-Api-Secret-Token: {self.webhook_secret}\r\n"
+        try:
+            reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+            writer.write(headers.encode("latin-1") + b"\r\n" + body)
+            await writer.drain()
+            await reader.read()
+            writer.close()
+        except OSError as e:
+            logger.error(f"Error entregando update {update['update_id']} al webhook: {e}")
+
+
+async def _drive(api: FakeTelegramAPI, chats: int, rate: float, duration: float):
+    """Genera comandos sintéticos a `rate` updates/s repartidos en `chats` chats"""
+    commands = ["/status", "/hecho", "/start", "/help"]
+    interval = 1.0 / rate
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        chat_id = random.randint(1, chats)
+        api.push_command(chat_id, chat_id, random.choice(commands))
+        await asyncio.sleep(interval)
+
+
+async def _main(args):
+    api = FakeTelegramAPI(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        retry_after_rate=args.retry_after_rate,
+        record_file=args.record,
+    )
+    await api.start(args.host, args.port)
+    logger.info(f"Bot API falsa en http://{args.host}:{args.port}/bot")
+    try:
+        if args.rate:
+            await _drive(api, args.chats, args.rate, args.duration)
+        else:
+            await asyncio.Event().wait()
+    finally:
+        await api.stop()
+        logger.info(f"Peticiones por método: {api.calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor falso de la Bot API de Telegram")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="latencia fija por llamada (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latencia aleatoria adicional (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probabilidad de error 500")
+    parser.add_argument("--retry-after-rate", type=float, default=0.0, help="probabilidad de 429 RetryAfter")
+    parser.add_argument("--record", help="archivo JSONL donde registrar cada petición")
+    parser.add_argument("--chats", type=int, default=100, help="chats para la carga sintética")
+    parser.add_argument("--rate", type=float, default=0.0, help="updates/s sintéticos (0 = ninguno)")
+    parser.add_argument("--duration", type=float, default=60.0, help="duración de la carga (s)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Watchdog del proceso: salud del bucle de eventos, del polling y de los jobs
+
+Antes / respondía "Bot activo" aunque el polling estuviera muerto. Ahora
+se miden tres cosas:
+
+- atraso del bucle de eventos (el último tick de metrics.LoopLagMonitor);
+- segundos desde el último getUpdates exitoso (bot_core.request.PollingRequest);
+- latido de la JobQueue: un job que solo anota la hora (heartbeat_job).
+
+/healthz (vivo) falla si el bucle está atrasado o los jobs no corren;
+/readyz (listo) además exige que la Application esté corriendo y, en
+polling, que getUpdates haya respondido hace poco. Ambos responden 200 o
+503 con una línea por chequeo.
+
+Un bucle bloqueado no puede avisar de sí mismo, así que un hilo aparte
+revisa cada CHECK_INTERVAL cuánto se atrasó el tick esperado. Si pasa
+de max_lag, vuelca la pila del hilo del bucle (lo que lo está
+bloqueando en ese momento) al log, una vez por bloqueo y como mucho
+cada DUMP_COOLDOWN segundos.
+"""
+
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import List, Optional, Tuple
+
+from httpd import Request, Response
+from metrics import Counter, Gauge, LoopLagMonitor
+
+logger = logging.getLogger(__name__)
+
+CHECK_INTERVAL = 0.25  # segundos entre revisiones del hilo
+HEARTBEAT_INTERVAL = 5  # segundos entre latidos de la JobQueue
+DUMP_COOLDOWN = 60.0
+MAX_LAG = 1.0
+MAX_POLL_AGE = 60.0  # getUpdates hace long polling de 10 s
+MAX_JOB_AGE = 60.0
+
+STALLS = Counter("bot_event_loop_stalls_total", "Veces que el bucle de eventos quedó bloqueado más que el límite")
+
+
+class Watchdog:
+    """Chequeos de vida y disponibilidad, y volcado de pila si el bucle se bloquea"""
+
+    def __init__(
+        self,
+        loop_lag: LoopLagMonitor,
+        max_lag: float = MAX_LAG,
+        max_poll_age: float = MAX_POLL_AGE,
+        max_job_age: float = MAX_JOB_AGE,
+    ):
+        self.loop_lag = loop_lag
+        self.max_lag = max_lag
+        self.max_poll_age = max_poll_age
+        self.max_job_age = max_job_age
+        self.application = None  # para /readyz; la asigna build_application
+        self.polling = None  # PollingRequest de getUpdates (None en webhook)
+        self.last_job = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # Métricas
+        self.stalls = 0
+        self.dumps = 0
+        Gauge("bot_job_heartbeat_age_seconds", "Segundos desde el último latido de la JobQueue", fn=self.job_age)
+        Gauge("bot_get_updates_age_seconds", "Segundos desde el último getUpdates exitoso", fn=self.poll_age)
+
+    # --- Mediciones ---
+
+    def stalled_for(self) -> float:
+        """Cuánto lleva atrasado el próximo tick del bucle (0 si no está atrasado)"""
+        overdue = time.monotonic() - self.loop_lag.last_tick - self.loop_lag.interval
+        return max(0.0, overdue)
+
+    def job_age(self) -> float:
+        return time.monotonic() - self.last_job
+
+    def poll_age(self) -> float:
+        return time.monotonic() - self.polling.last_ok if self.polling else 0.0
+
+    async def heartbeat_job(self, context):
+        self.last_job = time.monotonic()
+
+    # --- Chequeos ---
+
+    def liveness(self) -> List[Tuple[str, float, float]]:
+        """(nombre, valor, límite) de lo que debe cumplirse para considerar vivo al proceso"""
+        lag = max(self.loop_lag.last_lag, self.stalled_for())
+        return [("loop_lag", lag, self.max_lag), ("jobs", self.job_age(), self.max_job_age)]
+
+    def readiness(self) -> List[Tuple[str, float, float]]:
+        checks = self.liveness()
+        app = self.application
+        running = app is not None and app.running and (app.updater is None or app.updater.running)
+        checks.append(("stopped", 0.0 if running else 1.0, 0.0))
+        if self.polling:
+            checks.append(("get_updates", self.poll_age(), self.max_poll_age))
+        return checks
+
+    @staticmethod
+    def render(checks: List[Tuple[str, float, float]], ok_body: Optional[bytes] = None) -> Response:
+        ok = all(value <= limit for _, value, limit in checks)
+        if ok and ok_body is not None:
+            return Response(200, ok_body)
+        lines = [f"{name} {value:.3f} {'ok' if value <= limit else 'FALLA'} (límite {limit:g})" for name, value, limit in checks]
+        return Response(200 if ok else 503, ("\n".join(lines) + "\n").encode("utf-8"))
+
+    async def healthz(self, request: Request) -> Response:
+        return self.render(self.liveness())
+
+    async def readyz(self, request: Request) -> Response:
+        return self.render(self.readiness())
+
+    # --- Hilo vigilante ---
+
+    def start(self):
+        """Arranca el hilo (llamar desde el bucle de eventos, cuyo hilo se vigila)"""
+        self._loop_thread = threading.get_ident()
+        self.last_job = time.monotonic()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="watchdog", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self):
+        stalled_tick = None  # tick del bloqueo ya contado
+        last_dump = 0.0
+        while not self._stop.wait(CHECK_INTERVAL):
+            stalled = self.stalled_for()
+            if stalled <= self.max_lag or self.loop_lag.last_tick == stalled_tick:
+                continue
+            stalled_tick = self.loop_lag.last_tick
+            self.stalls += 1
+            STALLS.inc()
+            now = time.monotonic()
+            if now - last_dump < DUMP_COOLDOWN:
+                logger.warning(f"Bucle de eventos bloqueado hace {stalled:.1f}s")
+                continue
+            last_dump = now
+            self.dumps += 1
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame)) if frame else "(sin pila)\n"
+            logger.warning(f"Bucle de eventos bloqueado hace {stalled:.1f}s; pila del hilo del bucle:\n{stack.rstrip()}")
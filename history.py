@@ -0,0 +1,134 @@
+"""
+Historial compacto de tareas realizadas por chat y sus estadísticas
+
+Cada chat guarda sus tareas como dos arreglos tipados paralelos: el día
+(ordinal de date) y el índice de la persona que la hizo. Agregar es O(1)
+amortizado y cuesta 5 bytes por tarea, contra ~100 de una lista de
+tuplas, así que años de historial en muchos chats caben sin problema.
+
+compute_stats calcula conteos, rachas, atraso y equidad con operaciones
+vectorizadas de NumPy sobre vistas de esos arreglos (sin copiarlos).
+NumPy se importa recién en el primer /stats para no encarecer el arranque.
+"""
+
+import logging
+from array import array
+from datetime import date
+from itertools import accumulate
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class History:
+    """Días y personas de las tareas realizadas, en orden de llegada"""
+
+    __slots__ = ("days", "people")
+
+    def __init__(self, days: Iterable[int] = (), people: Iterable[int] = ()):
+        self.days = array("i", days)
+        self.people = array("b", people)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __iter__(self):
+        return zip(self.days, self.people)
+
+    def append(self, day: int, person: int):
+        self.days.append(day)
+        self.people.append(person)
+
+    def copy(self) -> "History":
+        history = History()
+        history.days = array("i", self.days)
+        history.people = array("b", self.people)
+        return history
+
+    def to_dict(self) -> dict:
+        """Días como diferencias con el anterior (el primero absoluto): el JSON queda chico"""
+        days = self.days
+        deltas = [days[0]] if days else []
+        deltas.extend(b - a for a, b in zip(days, days[1:]))
+        return {"dias": deltas, "personas": self.people.tolist()}
+
+    @classmethod
+    def from_dict(cls, data) -> "History":
+        """Acepta el formato compacto y el anterior ([["AAAA-MM-DD", turno], ...])"""
+        if isinstance(data, dict):
+            return cls(accumulate(data.get("dias", ())), data.get("personas", ()))
+        history = cls()
+        for dia, turno in data:
+            try:
+                history.append(date.fromisoformat(dia).toordinal(), turno)
+            except (ValueError, TypeError):
+                logger.warning(f"Fecha inválida en historial: {dia}")
+        return history
+
+
+class Stats:
+    """Resultado de compute_stats para un chat"""
+
+    __slots__ = ("total", "counts", "month_counts", "lateness", "streak", "best_streak", "fairness")
+
+    def __init__(self):
+        self.total = 0
+        self.counts: List[int] = []
+        self.month_counts: List[int] = []
+        self.lateness: List[Optional[float]] = []  # días de atraso promedio por persona
+        self.streak = 0
+        self.best_streak = 0
+        self.fairness = 1.0
+
+
+def compute_stats(history: History, today: int, people: int) -> Stats:
+    """Estadísticas del historial al día `today` (ordinal local del chat)
+
+    - counts / month_counts: tareas por persona, en total y en el mes de today
+    - lateness: días que la tarea quedó sin hacer antes de cada vez que la
+      hizo esa persona, en promedio
+    - streak / best_streak: días seguidos con la tarea hecha (la racha actual
+      sigue viva si la última fue hoy o ayer)
+    - fairness: índice de Jain sobre counts (1.0 = reparto perfecto)
+    """
+    import numpy as np
+
+    stats = Stats()
+    stats.total = len(history)
+    if not stats.total:
+        stats.counts = stats.month_counts = [0] * people
+        stats.lateness = [None] * people
+        return stats
+
+    # Vistas sin copia sobre los arreglos del historial
+    days = np.frombuffer(history.days, dtype=np.intc)
+    persons = np.frombuffer(history.people, dtype=np.int8).astype(np.intp)
+    size = max(people, int(persons.max()) + 1)
+
+    counts = np.bincount(persons, minlength=size)
+    month_start = date.fromordinal(today).replace(day=1).toordinal()
+    month_counts = np.bincount(persons[days >= month_start], minlength=size)
+
+    gaps = np.diff(days, prepend=days[0]) - 1
+    late = np.maximum(gaps, 0)
+    late_sum = np.bincount(persons, weights=late, minlength=size)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lateness = late_sum / counts
+
+    # Rachas sobre días únicos: cortes donde la diferencia no es 1
+    unique = np.unique(days)
+    breaks = np.flatnonzero(np.diff(unique) != 1)
+    bounds = np.concatenate(([0], breaks + 1, [len(unique)]))
+    runs = np.diff(bounds)
+    stats.best_streak = int(runs.max())
+    stats.streak = int(runs[-1]) if unique[-1] >= today - 1 else 0
+
+    shown = counts[:people].astype(np.float64)
+    squares = float(np.dot(shown, shown))
+    stats.fairness = float(shown.sum() ** 2 / (people * squares)) if squares else 1.0
+
+    stats.counts = counts[:people].tolist()
+    stats.month_counts = month_counts[:people].tolist()
+    stats.lateness = [None if np.isnan(x) else float(x) for x in lateness[:people]]
+    return stats
+
@@ -0,0 +1,157 @@
+"""
+Servidor HTTP mínimo sobre asyncio
+
+Corre en el mismo bucle de eventos que la Application de Telegram, sin
+hilos ni dependencias externas. Soporta HTTP/1.1 con keep-alive y
+cuerpos con Content-Length, que es todo lo que necesitan el webhook de
+Telegram y los endpoints de salud.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+REASONS = {
+    200: "OK",
+    204: "No Content",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    query: Dict[str, str]
+    headers: Dict[str, str]
+    body: bytes
+
+
+class Response(NamedTuple):
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "text/plain; charset=utf-8"
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+
+class HTTPServer:
+    """Servidor HTTP con tabla de rutas (método, path) -> handler"""
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], Handler] = {}
+        # Handler para peticiones sin ruta exacta (p. ej. /bot<token>/<método>)
+        self.fallback: Optional[Handler] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.requests = 0
+
+    def route(self, method: str, path: str, handler: Handler):
+        self.routes[(method.upper(), path)] = handler
+
+    async def start(self, host: str = "0.0.0.0", port: int = 8000):
+        self._server = await asyncio.start_server(self._handle, host, port)
+        logger.info(f"Servidor HTTP escuchando en {host}:{port}")
+
+    @property
+    def port(self) -> Optional[int]:
+        if not self._server or not self._server.sockets:
+            return None
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self._write(writer, Response(413), keep_alive=False)
+                    return
+                if len(head) > MAX_HEADER_BYTES:
+                    await self._write(writer, Response(413), keep_alive=False)
+                    return
+
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._write(writer, Response(400), keep_alive=False)
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._write(writer, Response(400), keep_alive=False)
+                    return
+                if length > MAX_BODY_BYTES:
+                    await self._write(writer, Response(413), keep_alive=False)
+                    return
+                body = await reader.readexactly(length) if length else b""
+
+                url = urlsplit(target)
+                request = Request(method.upper(), url.path, dict(parse_qsl(url.query)), headers, body)
+                response = await self._dispatch(request)
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self._write(writer, response, keep_alive)
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # El servidor se está cerrando con la conexión abierta (p. ej. long polling)
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, request: Request) -> Response:
+        self.requests += 1
+        handler = self.routes.get((request.method, request.path)) or self.fallback
+        if handler is None:
+            if any(path == request.path for _, path in self.routes):
+                return Response(405)
+            return Response(404)
+        try:
+            return await handler(request)
+        except Exception as e:
+            logger.error(f"Error en {request.method} {request.path}: {e}")
+            return Response(500)
+
+    @staticmethod
+    async def _write(writer: asyncio.StreamWriter, response: Response, keep_alive: bool):
+        reason = REASONS.get(response.status, "")
+        head = (
+            f"HTTP/1.1 {response.status} {reason}\r\n"
+            f"Content-Type: {response.content_type}\r\n"
+            f"Content-Length: {len(response.body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + response.body)
+        await writer.drain()
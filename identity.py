@@ -0,0 +1,237 @@
+"""
+Registro de identidades: qué persona es cada usuario de Telegram
+
+Los registros se indexan por chat_id y luego por user_id (enteros, sin
+convertir a str), con un índice inverso persona -> user_ids por chat.
+Resolver un usuario es O(1) sin importar cuántos usuarios haya. Se
+persiste aparte del estado de turnos, con su propio log de operaciones
+y snapshot (ver journal.py).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import Dict, FrozenSet, Iterator, Optional, Set, Tuple
+
+from journal import Journal
+from persistence import SerialWriter, atomic_write, dump_json_mapping
+
+logger = logging.getLogger(__name__)
+
+IDENTITY_VERSION = 1
+
+
+class IdentityRegistry:
+    """Índice chat_id -> user_id -> persona con índice inverso por persona"""
+
+    def __init__(
+        self,
+        state_file: Optional[str] = "identities.json",
+        sync_interval: float = 1.0,
+        sync_every: int = 64,
+        compact_every: int = 10_000,
+        writer: Optional[SerialWriter] = None,
+    ):
+        self.state_file = state_file
+        self.compact_every = compact_every
+        self._users: Dict[int, Dict[int, str]] = {}
+        self._personas: Dict[int, Dict[str, Set[int]]] = {}
+        self._count = 0
+        self._journal: Optional[Journal] = None
+        # Métricas
+        self.snapshots = 0
+        self.snapshot_bytes = 0
+        if state_file:
+            self._journal = Journal(state_file + ".log", sync_interval, sync_every, writer)
+            self.load()
+
+    # --- Consultas ---
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Tuple[int, int, str]]:
+        """Itera (chat_id, user_id, persona)"""
+        for chat_id, users in self._users.items():
+            for user_id, persona in users.items():
+                yield chat_id, user_id, persona
+
+    def resolve(self, chat_id: int, user_id: int) -> Optional[str]:
+        """Persona registrada por el usuario en el chat, o None"""
+        users = self._users.get(chat_id)
+        return users.get(user_id) if users else None
+
+    def is_persona(self, chat_id: int, user_id: int, persona: str) -> bool:
+        return self.resolve(chat_id, user_id) == persona
+
+    def users_for(self, chat_id: int, persona: str) -> FrozenSet[int]:
+        """user_ids registrados como `persona` en el chat"""
+        personas = self._personas.get(chat_id)
+        if not personas:
+            return frozenset()
+        return frozenset(personas.get(persona, ()))
+
+    def chat_users(self, chat_id: int) -> Dict[int, str]:
+        return dict(self._users.get(chat_id, {}))
+
+    # --- Mutaciones ---
+
+    def register(self, chat_id: int, user_id: int, persona: str):
+        if self.resolve(chat_id, user_id) == persona:
+            return
+        self._record({"op": "register", "chat": chat_id, "user": user_id, "persona": persona})
+
+    def unregister(self, chat_id: int, user_id: int):
+        if self.resolve(chat_id, user_id) is None:
+            return
+        self._record({"op": "unregister", "chat": chat_id, "user": user_id})
+
+    def move_chat(self, old_id: int, new_id: int):
+        """Pasa los registros de un grupo a su nuevo id (el grupo se convirtió en supergrupo)"""
+        if old_id in self._users:
+            self._record({"op": "move_chat", "chat": old_id, "to": new_id})
+
+    def migrate(self, legacy: Dict[int, Dict[int, str]]) -> int:
+        """Importa registros del estado antiguo sin pisar los ya existentes"""
+        migrated = 0
+        for chat_id, users in legacy.items():
+            for user_id, persona in users.items():
+                if self.resolve(chat_id, user_id) is None:
+                    self.register(chat_id, user_id, persona)
+                    migrated += 1
+        if migrated:
+            logger.info(f"Identidades migradas desde el estado: {migrated}")
+            self.compact()
+        return migrated
+
+    def _record(self, op: dict):
+        self._apply(op)
+        if self._journal:
+            self._journal.append(op)
+            if self._journal.entries >= self.compact_every:
+                self.compact()
+
+    def _apply(self, op: dict):
+        """Aplica una operación a los índices (también al reaplicar el log)"""
+        kind = op["op"]
+        if kind == "register":
+            self._set(op["chat"], op["user"], op["persona"])
+        elif kind == "unregister":
+            self._remove(op["chat"], op["user"])
+        elif kind == "move_chat":
+            # Lo ya registrado con el id nuevo no se pisa
+            for user_id, persona in self.chat_users(op["chat"]).items():
+                self._remove(op["chat"], user_id)
+                if self.resolve(op["to"], user_id) is None:
+                    self._set(op["to"], user_id, persona)
+        else:
+            logger.warning(f"Operación desconocida en el log de identidades: {kind}")
+
+    def _set(self, chat_id: int, user_id: int, persona: str):
+        # Las personas se repiten en millones de registros: una sola copia de cada nombre
+        persona = sys.intern(persona)
+        self._remove(chat_id, user_id)
+        users = self._users.get(chat_id)
+        if users is None:
+            users = self._users[chat_id] = {}
+        users[user_id] = persona
+        personas = self._personas.get(chat_id)
+        if personas is None:
+            personas = self._personas[chat_id] = {}
+        ids = personas.get(persona)
+        if ids is None:
+            ids = personas[persona] = set()
+        ids.add(user_id)
+        self._count += 1
+
+    def _remove(self, chat_id: int, user_id: int):
+        users = self._users.get(chat_id)
+        if not users:
+            return
+        persona = users.pop(user_id, None)
+        if persona is None:
+            return
+        self._count -= 1
+        personas = self._personas[chat_id]
+        ids = personas[persona]
+        ids.discard(user_id)
+        if not ids:
+            del personas[persona]
+        if not users:
+            del self._users[chat_id]
+            del self._personas[chat_id]
+
+    # --- Persistencia ---
+
+    def to_dict(self) -> dict:
+        return {
+            "version": IDENTITY_VERSION,
+            "chats": {
+                str(chat_id): {str(user_id): persona for user_id, persona in users.items()}
+                for chat_id, users in self._users.items()
+            },
+        }
+
+    def load_dict(self, data: dict):
+        self._users = {}
+        self._personas = {}
+        self._count = 0
+        for chat_key, users in data.get("chats", {}).items():
+            chat_id = int(chat_key)
+            for user_key, persona in users.items():
+                self._set(chat_id, int(user_key), persona)
+
+    def load(self):
+        """Carga el snapshot y reaplica las operaciones posteriores del log"""
+        seq = 0
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.load_dict(data)
+                seq = data.get("seq", 0)
+        except Exception as e:
+            logger.error(f"Error cargando identidades {self.state_file}: {e}")
+        self._journal.replay(self._apply, after_seq=seq)
+        logger.info(f"Identidades cargadas: {self._count} usuarios en {len(self._users)} chats")
+
+    def compact(self):
+        """Escribe un snapshot completo y vacía el log"""
+        if not self._journal:
+            return
+        chats = {chat_id: dict(users) for chat_id, users in self._users.items()}
+        self._journal.checkpoint(self._write_snapshot, (chats, self._journal.seq))
+
+    def _write_snapshot(self, snapshot: Tuple[Dict[int, Dict[int, str]], int]) -> int:
+        chats, seq = snapshot
+        try:
+            header = {"version": IDENTITY_VERSION, "seq": seq}
+            items = ((chat_id, {str(k): v for k, v in users.items()}) for chat_id, users in chats.items())
+            payload = dump_json_mapping(header, "chats", items)
+            atomic_write(self.state_file, payload)
+        except Exception as e:
+            logger.error(f"Error escribiendo identidades {self.state_file}: {e}")
+            return 0
+        self.snapshots += 1
+        self.snapshot_bytes += len(payload)
+        logger.debug(f"Snapshot de identidades escrito ({len(payload)} bytes, seq {seq})")
+        return len(payload)
+
+    def flush_if_due(self) -> bool:
+        return self._journal.sync_if_due() if self._journal else False
+
+    def flush(self) -> bool:
+        return self._journal.sync() if self._journal else False
+
+    async def wait_durable(self):
+        """Espera a que las mutaciones hechas hasta ahora estén en disco"""
+        if self._journal:
+            await asyncio.wrap_future(self._journal.durable())
+
+    def close(self):
+        """Sincroniza el log y compacta antes de apagar"""
+        if self._journal:
+            self.compact()
+            self._journal.close()
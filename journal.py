@@ -0,0 +1,190 @@
+"""
+Log de operaciones append-only
+
+Cada mutación del estado se agrega como una línea JSON con número de
+secuencia. Los fsync se agrupan (cada N operaciones o cada intervalo)
+y el log se compacta periódicamente en un snapshot. Al arrancar se
+carga el snapshot y se reaplica la cola del log; una última línea
+truncada por un corte se descarta.
+
+Con un SerialWriter la escritura, el fsync y la compactación se hacen en
+el hilo escritor, en orden; el llamador solo serializa la operación.
+La duración de cada fsync y snapshot y los bytes escritos se publican en
+/metrics con el nombre del archivo como etiqueta.
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from metrics import Counter, Histogram
+from persistence import SerialWriter, dump_json, run_io
+
+logger = logging.getLogger(__name__)
+
+SAVE_SECONDS = Histogram("bot_state_save_duration_seconds", "Duración de fsync y snapshots del estado", ["file", "kind"])
+SAVE_BYTES = Counter("bot_state_bytes_written_total", "Bytes escritos en logs y snapshots del estado", ["file", "kind"])
+
+
+class Journal:
+    """Log append-only con fsync agrupado"""
+
+    def __init__(
+        self,
+        path: str,
+        sync_interval: float = 1.0,
+        sync_every: int = 64,
+        writer: Optional[SerialWriter] = None,
+    ):
+        self.path = path
+        self.writer = writer
+        self.sync_interval = sync_interval
+        self.sync_every = sync_every
+        self.seq = 0
+        self.entries = 0  # operaciones en el log desde el último snapshot
+        self.pending = 0  # operaciones escritas sin fsync
+        self._pending_since: Optional[float] = None
+        self._fh = None
+        # Métricas
+        self.appends = 0
+        self.syncs = 0
+        self.bytes_written = 0
+        name = os.path.basename(path)
+        self._log_bytes = SAVE_BYTES.labels(name, "log")
+        self._snapshot_bytes = SAVE_BYTES.labels(name, "snapshot")
+        self._fsync_seconds = SAVE_SECONDS.labels(name, "fsync")
+        self._snapshot_seconds = SAVE_SECONDS.labels(name, "snapshot")
+
+    def replay(self, apply: Callable[[dict], None], after_seq: int = 0) -> int:
+        """Aplica las operaciones con seq > after_seq y abre el log para escribir"""
+        self.seq = after_seq
+        applied = 0
+        if os.path.exists(self.path):
+            good = 0
+            with open(self.path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        break
+                    good += len(line)
+                    self.entries += 1
+                    seq = op.get("seq", 0)
+                    if seq <= after_seq:
+                        continue
+                    apply(op)
+                    applied += 1
+                    self.seq = seq
+            size = os.path.getsize(self.path)
+            if good < size:
+                logger.warning(f"Log {self.path} truncado: se descartan {size - good} bytes")
+                with open(self.path, "r+b") as f:
+                    f.truncate(good)
+                    os.fsync(f.fileno())
+        self._fh = open(self.path, "ab")
+        if applied:
+            logger.info(f"Log reaplicado: {applied} operaciones")
+        return applied
+
+    def append(self, op: dict):
+        """Agrega una operación; el fsync se hace en bloque"""
+        self.seq += 1
+        op["seq"] = self.seq
+        # Se serializa en el llamador: la operación queda fija aunque se modifique después
+        data = dump_json(op) + b"\n"
+        self.entries += 1
+        self.appends += 1
+        self.bytes_written += len(data)
+        self._log_bytes.inc(len(data))
+        if self._pending_since is None:
+            self._pending_since = time.monotonic()
+        self.pending += 1
+        run_io(self.writer, self._write, data)
+        if self.pending >= self.sync_every:
+            self.sync()
+
+    def sync_if_due(self) -> bool:
+        if self._pending_since is None:
+            return False
+        if time.monotonic() - self._pending_since < self.sync_interval:
+            return False
+        return self.sync()
+
+    def sync(self) -> bool:
+        """Lleva a disco las operaciones pendientes (con escritor, solo lo encola)"""
+        if not self.pending:
+            return False
+        self.pending = 0
+        self._pending_since = None
+        if self.writer is None:
+            return self._fsync()
+        self.writer.submit(self._fsync)
+        return True
+
+    def durable(self) -> Future:
+        """Future que se completa cuando todo lo agregado hasta ahora está en disco"""
+        self.sync()
+        return run_io(self.writer, lambda: None)
+
+    def checkpoint(self, write_snapshot: Callable[[dict], int], data: dict) -> Future:
+        """Escribe un snapshot con self.seq y, si se escribió, vacía el log
+
+        write_snapshot devuelve los bytes escritos, o 0 si falló.
+
+        data debe ser una copia del estado: con escritor se serializa en
+        el hilo de E/S, después de las operaciones ya encoladas.
+        """
+        self.entries = 0
+        self.pending = 0
+        self._pending_since = None
+        return run_io(self.writer, self._checkpoint, write_snapshot, data)
+
+    def close(self):
+        self.sync()
+        run_io(self.writer, self._close_file)
+
+    # --- E/S (en el hilo escritor si hay uno) ---
+
+    def _write(self, data: bytes):
+        if self._fh is None:
+            self._fh = open(self.path, "ab")
+        self._fh.write(data)
+
+    def _fsync(self) -> bool:
+        if self._fh is None:
+            return False
+        start = time.perf_counter()
+        try:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+        except OSError as e:
+            logger.error(f"Error sincronizando log {self.path}: {e}")
+            return False
+        self._fsync_seconds.observe(time.perf_counter() - start)
+        self.syncs += 1
+        return True
+
+    def _checkpoint(self, write_snapshot: Callable[[dict], int], data: dict) -> bool:
+        # El log queda en disco antes del snapshot por si este falla
+        self._fsync()
+        start = time.perf_counter()
+        written = write_snapshot(data)
+        if not written:
+            return False
+        self._snapshot_seconds.observe(time.perf_counter() - start)
+        self._snapshot_bytes.inc(written)
+        if self._fh is not None:
+            self._fh.close()
+        self._fh = open(self.path, "wb")
+        os.fsync(self._fh.fileno())
+        return True
+
+    def _close_file(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
@@ -0,0 +1,252 @@
+"""
+Métricas en formato de texto de Prometheus
+
+Counter, Gauge e Histogram con etiquetas, un registro global y el
+handler de /metrics para httpd. Registrar un valor es una suma en
+memoria (y una búsqueda binaria en los histogramas), sin locks: cada
+serie se actualiza desde un solo hilo (el bucle de eventos o el
+escritor de persistencia), así que se puede dejar activo en producción.
+Las métricas con fn se calculan al momento de la consulta.
+"""
+
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from httpd import Request, Response
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Segundos: de 1 ms a 10 s, pensado para handlers, envíos y fsync
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Registry:
+    """Conjunto de métricas que se exponen juntas"""
+
+    def __init__(self):
+        self._metrics: Dict[str, "Metric"] = {}
+
+    def register(self, metric: "Metric"):
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica duplicada: {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def unregister(self, name: str):
+        self._metrics.pop(name, None)
+
+    def get(self, name: str) -> Optional["Metric"]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                lines.extend(metric.samples())
+            except Exception as e:
+                logger.error(f"Error calculando la métrica {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        fn: Optional[Callable[[], float]] = None,
+        registry: Optional[Registry] = REGISTRY,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+        self._children: Dict[Tuple[str, ...], object] = {}
+        if not self.labelnames and fn is None:
+            self.labels()  # sin etiquetas la serie existe (en cero) desde el inicio
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values) -> "_Value":
+        """Serie para los valores de etiqueta dados (se reutiliza entre llamadas)"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} espera etiquetas {self.labelnames}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self):
+        return _Value()
+
+    def _default(self):
+        return self.labels()
+
+    def samples(self) -> Iterator[str]:
+        if self.fn is not None:
+            yield f"{self.name} {_number(self.fn())}"
+            return
+        for key, child in self._children.items():
+            yield f"{self.name}{_labels(self.labelnames, key)} {_number(child.value)}"
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(Metric):
+    """Contador monotónico (o calculado con fn a partir de un contador existente)"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+
+class Gauge(Metric):
+    """Valor que sube y baja"""
+
+    kind = "gauge"
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default().dec(amount)
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(Metric):
+    """Histograma con buckets fijos (le = límite superior inclusivo)"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[Registry] = REGISTRY,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, registry=registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def samples(self) -> Iterator[str]:
+        for key, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {_number(child.sum)}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {child.count}"
+
+
+class LoopLagMonitor:
+    """Mide cuánto se atrasa el bucle de eventos respecto de un sleep periódico"""
+
+    def __init__(self, interval: float = 0.5, registry: Optional[Registry] = REGISTRY):
+        self.interval = interval
+        self.lag = Gauge("bot_event_loop_lag_seconds", "Atraso del último tick del bucle de eventos", registry=registry)
+        self.histogram = Histogram(
+            "bot_event_loop_tick_lag_seconds", "Distribución del atraso de los ticks del bucle de eventos", registry=registry
+        )
+        self._task: Optional[asyncio.Task] = None
+        # Para el watchdog, que lo lee desde otro hilo
+        self.last_tick = time.monotonic()
+        self.last_lag = 0.0
+
+    def start(self):
+        if self._task is None:
+            self.last_tick = time.monotonic()
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="loop-lag")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_tick = time.monotonic()
+            lag = self.last_lag = max(0.0, self.last_tick - expected)
+            self.lag.set(lag)
+            self.histogram.observe(lag)
+
+
+async def serve_metrics(request: Request) -> Response:
+    """Handler de httpd para GET /metrics"""
+    return Response(200, REGISTRY.render().encode("utf-8"), CONTENT_TYPE)
@@ -0,0 +1,144 @@
+"""
+Motor de envío de mensajes con límites de Telegram
+
+Todos los mensajes salientes pasan por aquí: un token bucket global
+(~30 msg/s), un token bucket por chat (~1 msg/s) y un límite de envíos
+concurrentes. Respeta RetryAfter pausando todos los envíos el tiempo
+indicado y lleva contadores de throughput.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from telegram.error import RetryAfter
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket simple; el tiempo viene del llamador"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """Toma un token si hay; si no, devuelve cuántos segundos esperar"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def is_idle(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class OutboundEngine:
+    """Despacha envíos respetando los límites globales y por chat"""
+
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        chat_burst: float = 3.0,
+        max_concurrency: int = 16,
+        max_retries: int = 3,
+    ):
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate, global_rate, time.monotonic())
+        self._chats: Dict[int, TokenBucket] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._paused_until = 0.0
+        # Métricas
+        self.started = time.monotonic()
+        self.attempted = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.in_flight = 0
+        self.waiting = 0
+
+    def _chat_bucket(self, chat_id: int, now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= 10_000:
+                self._evict_idle(now)
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst, now)
+        return bucket
+
+    def _evict_idle(self, now: float):
+        """Descarta los buckets de chats que ya recuperaron todos sus tokens"""
+        idle = [chat_id for chat_id, b in self._chats.items() if b.is_idle(now)]
+        for chat_id in idle:
+            del self._chats[chat_id]
+
+    async def _wait(self, bucket: TokenBucket):
+        while True:
+            now = time.monotonic()
+            wait = max(self._paused_until - now, 0.0) or bucket.reserve(now)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    async def call(self, chat_id: int, func: Callable[..., Awaitable[Any]], /, *args, **kwargs) -> Any:
+        """Ejecuta una llamada a la API dirigida a chat_id bajo los límites"""
+        self.waiting += 1
+        try:
+            await self._wait(self._chat_bucket(chat_id, time.monotonic()))
+            async with self._semaphore:
+                for attempt in range(self.max_retries + 1):
+                    await self._wait(self._global)
+                    self.attempted += 1
+                    self.in_flight += 1
+                    try:
+                        result = await func(*args, **kwargs)
+                    except RetryAfter as e:
+                        self.retried += 1
+                        delay = float(e.retry_after)
+                        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                        logger.warning(f"RetryAfter de Telegram: pausa de {delay}s (chat {chat_id})")
+                        if attempt == self.max_retries:
+                            self.failed += 1
+                            raise
+                        continue
+                    except Exception:
+                        self.failed += 1
+                        raise
+                    finally:
+                        self.in_flight -= 1
+                    self.sent += 1
+                    return result
+        finally:
+            self.waiting -= 1
+
+    async def send_message(self, bot, chat_id: int, text: str, **kwargs):
+        return await self.call(chat_id, bot.send_message, chat_id=chat_id, text=text, **kwargs)
+
+    async def reply(self, update, text: str, **kwargs):
+        """Responde al mensaje del update (equivalente a message.reply_text)"""
+        return await self.call(update.effective_chat.id, update.message.reply_text, text, **kwargs)
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, float]:
+        now = time.monotonic() if now is None else now
+        elapsed = max(now - self.started, 1e-9)
+        return {
+            "attempted": self.attempted,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "chat_buckets": len(self._chats),
+            "msgs_per_second": self.sent / elapsed,
+        }
@@ -0,0 +1,378 @@
+"""
+Bandeja de salida persistente para los mensajes que no responden a un comando
+
+Cada mensaje (p. ej. un recordatorio) se encola en un log de operaciones
+antes de enviarse, así que sobrevive a un reinicio. Un grupo de workers
+los envía a través de OutboundEngine; los errores se clasifican en:
+
+- permanentes del chat (Forbidden, chat not found): el mensaje se
+  descarta, igual que los pendientes del mismo chat, y se avisa con
+  on_blocked para dejar de enviarle;
+- chat migrado (un grupo que pasó a supergrupo): los pendientes del chat
+  pasan al id nuevo, el mensaje se reintenta de inmediato y se avisa con
+  on_migrated para que el resto del estado haga lo mismo;
+- permanentes del mensaje (otros BadRequest): se descarta el mensaje;
+- transitorios (red, timeouts, RetryAfter agotado, otros): se reintenta
+  con backoff exponencial con jitter hasta max_attempts.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import random
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from telegram.error import BadRequest, ChatMigrated, Forbidden
+
+from journal import Journal
+from outbound import OutboundEngine
+from persistence import SerialWriter, atomic_write, dump_json_mapping
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_VERSION = 1
+DRAIN_POLL = 0.02
+
+
+class OutboxMessage:
+    __slots__ = ("id", "chat_id", "text", "key", "attempts", "due")
+
+    def __init__(
+        self,
+        msg_id: int,
+        chat_id: int,
+        text: str,
+        key: Optional[str] = None,
+        attempts: int = 0,
+        due: float = 0.0,
+    ):
+        self.id = msg_id
+        self.chat_id = chat_id
+        self.text = text
+        self.key = key  # mensajes con la misma clave en un chat se reemplazan
+        self.attempts = attempts
+        self.due = due  # time.time() a partir del cual se puede enviar
+
+    def to_dict(self) -> dict:
+        data = {"chat": self.chat_id, "text": self.text, "attempts": self.attempts, "due": self.due}
+        if self.key:
+            data["key"] = self.key
+        return data
+
+
+def classify_error(error: Exception) -> str:
+    """"chat" (el chat ya no acepta mensajes), "migrated", "message" (no se puede enviar) o "retry\""""
+    if isinstance(error, ChatMigrated):
+        return "migrated"
+    if isinstance(error, Forbidden):
+        return "chat"
+    if isinstance(error, BadRequest):
+        if "chat not found" in str(error).lower():
+            return "chat"
+        return "message"
+    return "retry"
+
+
+class Outbox:
+    """Cola persistente de mensajes salientes con reintentos"""
+
+    def __init__(
+        self,
+        state_file: Optional[str] = "outbox.json",
+        engine: Optional[OutboundEngine] = None,
+        workers: int = 4,
+        max_attempts: int = 8,
+        base_delay: float = 2.0,
+        max_delay: float = 600.0,
+        on_blocked: Optional[Callable[[int, str], None]] = None,
+        on_migrated: Optional[Callable[[int, int], None]] = None,
+        sync_interval: float = 1.0,
+        sync_every: int = 64,
+        compact_every: int = 10_000,
+        writer: Optional[SerialWriter] = None,
+    ):
+        self.state_file = state_file
+        self.engine = engine or OutboundEngine()
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.on_blocked = on_blocked
+        self.on_migrated = on_migrated
+        self.compact_every = compact_every
+        self._pending: Dict[int, OutboxMessage] = {}
+        self._keys: Dict[Tuple[int, str], int] = {}
+        self._heap: List[Tuple[float, int]] = []
+        self._in_flight: Dict[int, OutboxMessage] = {}
+        self._next_id = 1
+        self._bot = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._journal: Optional[Journal] = None
+        # Métricas
+        self.started = time.monotonic()
+        self.enqueued = 0
+        self.delivered = 0
+        self.retried = 0
+        self.failed = 0
+        self.superseded = 0
+        self.snapshots = 0
+        if state_file:
+            self._journal = Journal(state_file + ".log", sync_interval, sync_every, writer)
+            self.load()
+
+    # --- Consultas ---
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def pending_for(self, chat_id: int) -> List[OutboxMessage]:
+        return [m for m in self._pending.values() if m.chat_id == chat_id]
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, float]:
+        now = time.time() if now is None else now
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        ready = sum(1 for m in self._pending.values() if m.due <= now and m.id not in self._in_flight)
+        oldest = min((m.due for m in self._pending.values()), default=now)
+        return {
+            "depth": len(self._pending),
+            "ready": ready,
+            "in_flight": len(self._in_flight),
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "retried": self.retried,
+            "failed": self.failed,
+            "superseded": self.superseded,
+            "oldest_seconds": max(0.0, now - oldest),
+            "delivered_per_second": self.delivered / elapsed,
+        }
+
+    # --- Encolar ---
+
+    def enqueue(self, chat_id: int, text: str, key: Optional[str] = None) -> int:
+        """Encola un mensaje; con `key`, reemplaza el pendiente del chat con la misma clave"""
+        if key:
+            old_id = self._keys.get((chat_id, key))
+            if old_id is not None and old_id not in self._in_flight:
+                self._record({"op": "drop", "id": old_id})
+                self.superseded += 1
+        msg_id = self._next_id
+        op = {"op": "enqueue", "id": msg_id, "chat": chat_id, "text": text, "due": time.time()}
+        if key:
+            op["key"] = key
+        self._record(op)
+        self.enqueued += 1
+        self._wake()
+        return msg_id
+
+    # --- Workers ---
+
+    def start(self, bot):
+        """Lanza los workers (dentro del bucle de eventos de la Application)"""
+        if self._tasks:
+            return
+        self._bot = bot
+        self._wakeup = asyncio.Event()
+        self._heap = [(m.due, m.id) for m in self._pending.values()]
+        heapq.heapify(self._heap)
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._worker(), name=f"outbox-{i}") for i in range(self.workers)]
+        logger.info(f"Outbox iniciado: {len(self._pending)} mensajes pendientes, {self.workers} workers")
+
+    async def stop(self):
+        """Detiene los workers; lo que estaba en envío queda pendiente para el próximo arranque"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._in_flight.clear()
+
+    async def drain(self, timeout: float) -> bool:
+        """Espera (hasta timeout) a que salga lo que ya está listo; los reintentos futuros quedan en disco"""
+        deadline = time.monotonic() + timeout
+        while self._tasks:
+            now = time.time()
+            if not self._in_flight and not any(m.due <= now for m in self._pending.values()):
+                return True
+            if time.monotonic() >= deadline:
+                logger.warning(f"Outbox sin drenar al apagar: {len(self._pending)} mensajes quedan pendientes")
+                return False
+            await asyncio.sleep(DRAIN_POLL)
+        return not self._pending
+
+    def _wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _next(self) -> OutboxMessage:
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            due, msg_id = self._heap[0]
+            wait = due - time.time()
+            if wait > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._heap)
+            msg = self._pending.get(msg_id)
+            # Entrada vieja: el mensaje ya se envió, se descartó o se reprogramó
+            if msg is None or msg.due != due or msg_id in self._in_flight:
+                continue
+            return msg
+
+    async def _worker(self):
+        while True:
+            msg = await self._next()
+            self._in_flight[msg.id] = msg
+            try:
+                await self.engine.call(msg.chat_id, self._bot.send_message, chat_id=msg.chat_id, text=msg.text)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._on_error(msg, e)
+            else:
+                self._record({"op": "done", "id": msg.id})
+                self.delivered += 1
+            finally:
+                self._in_flight.pop(msg.id, None)
+
+    def _on_error(self, msg: OutboxMessage, error: Exception):
+        kind = classify_error(error)
+        if kind == "chat":
+            logger.warning(f"Chat {msg.chat_id} no acepta mensajes ({error}); se descartan sus pendientes")
+            for pending in self.pending_for(msg.chat_id):
+                if pending.id == msg.id or pending.id not in self._in_flight:
+                    self._record({"op": "drop", "id": pending.id})
+                    self.failed += 1
+            if self.on_blocked:
+                self.on_blocked(msg.chat_id, str(error))
+        elif kind == "migrated":
+            old_id, new_id = msg.chat_id, error.new_chat_id
+            if old_id != new_id:  # otro envío en curso ya lo movió
+                logger.info(f"Chat {old_id} migrado a {new_id}; se reenvían sus pendientes")
+                self._record({"op": "move_chat", "chat": old_id, "to": new_id})
+                if self.on_migrated:
+                    self.on_migrated(old_id, new_id)
+            self._record({"op": "retry", "id": msg.id, "attempts": msg.attempts + 1, "due": time.time()})
+            self.retried += 1
+            self._wake()
+        elif kind == "message" or msg.attempts + 1 >= self.max_attempts:
+            logger.error(f"Mensaje {msg.id} a chat {msg.chat_id} descartado tras {msg.attempts + 1} intentos: {error}")
+            self._record({"op": "drop", "id": msg.id})
+            self.failed += 1
+        else:
+            delay = self.backoff(msg.attempts)
+            logger.warning(f"Error enviando mensaje {msg.id} a chat {msg.chat_id}: {error}; reintento en {delay:.1f}s")
+            self._record({"op": "retry", "id": msg.id, "attempts": msg.attempts + 1, "due": time.time() + delay})
+            self.retried += 1
+            self._wake()
+
+    def backoff(self, attempts: int) -> float:
+        """Backoff exponencial con jitter completo: uniforme en [0, min(tope, base * 2^n)]"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempts))
+
+    # --- Estado ---
+
+    def _record(self, op: dict):
+        self._apply(op)
+        if self._journal:
+            self._journal.append(op)
+            if self._journal.entries >= self.compact_every:
+                self.compact()
+
+    def _apply(self, op: dict):
+        """Aplica una operación a la cola en memoria (también al reaplicar el log)"""
+        kind = op["op"]
+        if kind == "move_chat":
+            self._move(op["chat"], op["to"])
+            return
+        msg_id = op["id"]
+        if kind == "enqueue":
+            msg = OutboxMessage(msg_id, op["chat"], op["text"], op.get("key"), 0, op.get("due", 0.0))
+            self._add(msg)
+        elif kind == "retry":
+            msg = self._pending.get(msg_id)
+            if msg is not None:
+                msg.attempts = op["attempts"]
+                msg.due = op["due"]
+                if self._wakeup is not None:
+                    heapq.heappush(self._heap, (msg.due, msg.id))
+        elif kind in ("done", "drop"):
+            msg = self._pending.pop(msg_id, None)
+            if msg is not None and msg.key and self._keys.get((msg.chat_id, msg.key)) == msg_id:
+                del self._keys[(msg.chat_id, msg.key)]
+        else:
+            logger.warning(f"Operación desconocida en el log del outbox: {kind}")
+
+    def _add(self, msg: OutboxMessage):
+        self._pending[msg.id] = msg
+        if msg.key:
+            self._keys[(msg.chat_id, msg.key)] = msg.id
+        if msg.id >= self._next_id:
+            self._next_id = msg.id + 1
+        if self._wakeup is not None:
+            heapq.heappush(self._heap, (msg.due, msg.id))
+
+    def _move(self, old_id: int, new_id: int):
+        for msg in self.pending_for(old_id):
+            if msg.key and self._keys.get((old_id, msg.key)) == msg.id:
+                del self._keys[(old_id, msg.key)]
+                self._keys[(new_id, msg.key)] = msg.id
+            msg.chat_id = new_id
+
+    def load(self):
+        """Carga el snapshot y reaplica las operaciones posteriores del log"""
+        seq = 0
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                for key, value in data.get("messages", {}).items():
+                    msg = OutboxMessage(int(key), value["chat"], value["text"], value.get("key"))
+                    msg.attempts = value.get("attempts", 0)
+                    msg.due = value.get("due", 0.0)
+                    self._add(msg)
+                self._next_id = max(self._next_id, data.get("next_id", 1))
+                seq = data.get("seq", 0)
+        except Exception as e:
+            logger.error(f"Error cargando outbox {self.state_file}: {e}")
+        self._journal.replay(self._apply, after_seq=seq)
+        if self._pending:
+            logger.info(f"Outbox cargado: {len(self._pending)} mensajes pendientes")
+
+    def compact(self):
+        """Escribe un snapshot con los mensajes pendientes y vacía el log"""
+        if not self._journal:
+            return
+        messages = [(m.id, m.to_dict()) for m in self._pending.values()]
+        self._journal.checkpoint(self._write_snapshot, (messages, self._next_id, self._journal.seq))
+
+    def _write_snapshot(self, snapshot: Tuple[list, int, int]) -> int:
+        messages, next_id, seq = snapshot
+        try:
+            header = {"version": OUTBOX_VERSION, "seq": seq, "next_id": next_id}
+            payload = dump_json_mapping(header, "messages", messages)
+            atomic_write(self.state_file, payload)
+        except Exception as e:
+            logger.error(f"Error escribiendo outbox {self.state_file}: {e}")
+            return 0
+        self.snapshots += 1
+        return len(payload)
+
+    def flush_if_due(self) -> bool:
+        return self._journal.sync_if_due() if self._journal else False
+
+    def close(self):
+        """Sincroniza el log y compacta antes de apagar"""
+        if self._journal:
+            self.compact()
+            self._journal.close()
@@ -0,0 +1,171 @@
+"""
+Primitivas de escritura a disco del estado
+
+Serialización JSON compacta y escritura atómica (archivo temporal, fsync
+y rename). journal.Journal las usa para los logs y snapshots.
+
+Con un SerialWriter las escrituras y los fsync salen del bucle de
+eventos: se ejecutan en un único hilo, en el mismo orden en que se
+pidieron, y el bucle solo espera cuando necesita durabilidad.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# os.umask solo se puede leer cambiándola: se lee una vez, al importar (antes de los hilos escritores)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _file_mode(path: str) -> int:
+    """Permisos del archivo existente, o los que le daría open() si no existe"""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except OSError:
+        return 0o666 & ~_UMASK
+
+
+def atomic_write(path: str, data: bytes):
+    """Escribe un archivo de forma atómica (temporal + fsync + rename)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        # mkstemp crea el temporal con 0600: el archivo conserva sus permisos
+        os.fchmod(fd, _file_mode(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def dump_json(data: Any) -> bytes:
+    """Serializa en JSON compacto (sin indentación)"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def dump_json_mapping(header: dict, key: str, items: Iterable[Tuple[str, Any]]) -> bytes:
+    """Serializa header con header[key] = dict(items), entrada por entrada
+
+    El resultado equivale a dump_json, pero con una llamada a json por
+    entrada: un hilo escritor suelta el GIL entre entradas y no congela
+    el bucle de eventos aunque el estado sea grande.
+    """
+    parts = [dump_json(header)[:-1]]
+    if header:
+        parts.append(b",")
+    parts.append(dump_json(key) + b":{")
+    first = True
+    for item_key, value in items:
+        if not first:
+            parts.append(b",")
+        parts.append(dump_json(str(item_key)) + b":" + dump_json(value))
+        first = False
+    parts.append(b"}}")
+    return b"".join(parts)
+
+
+def _noop():
+    return None
+
+
+class SerialWriter:
+    """Hilo escritor único: ejecuta las tareas de E/S en orden de llegada"""
+
+    def __init__(self, name: str = "state-writer"):
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        # Métricas
+        self.tasks = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def pending(self) -> int:
+        """Tareas encoladas que aún no terminan"""
+        return self._queue.qsize()
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Encola fn(*args); el Future se completa desde el hilo escritor"""
+        future: Future = Future()
+        if self._closed:
+            # Ya no hay hilo: se ejecuta en el llamador para no perder escrituras
+            self._execute(future, fn, args)
+        else:
+            self._queue.put((future, fn, args))
+        return future
+
+    def barrier(self) -> Future:
+        """Future que se completa cuando terminan todas las tareas anteriores"""
+        return self.submit(_noop)
+
+    async def wait(self):
+        """Espera (sin bloquear el bucle) a que se vacíe lo encolado hasta ahora"""
+        await asyncio.wrap_future(self.barrier())
+
+    def close(self, timeout: Optional[float] = None):
+        """Termina las tareas pendientes y detiene el hilo"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args = item
+            self._execute(future, fn, args)
+
+    def _execute(self, future: Future, fn: Callable, args: tuple):
+        if not future.set_running_or_notify_cancel():
+            return
+        start = time.perf_counter()
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            logger.error(f"Error en tarea de escritura {getattr(fn, '__name__', fn)}: {e}")
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        finally:
+            self.tasks += 1
+            self.busy_seconds += time.perf_counter() - start
+
+
+def run_io(writer: Optional[SerialWriter], fn: Callable, *args) -> Future:
+    """Ejecuta fn en el escritor si hay uno, o en el acto si no"""
+    if writer is not None:
+        return writer.submit(fn, *args)
+    future: Future = Future()
+    future.set_result(fn(*args))
+    return future
@@ -0,0 +1,355 @@
+"""
+Perfilado bajo demanda de handlers y jobs
+
+Los callbacks de los CommandHandler y de los jobs se envuelven una sola
+vez (instrument); mientras el perfilado está apagado el envoltorio solo
+revisa un set. Al activarlo para algunos callbacks (o todos):
+
+- un hilo muestrea cada pocos ms la pila del hilo del bucle de eventos
+  y, si está corriendo un callback perfilado, suma la pila a su nombre
+  (perfil de CPU por muestreo: el tiempo esperando E/S no aparece);
+- con memory=True, además se activa tracemalloc. Es global al proceso
+  y encarece cada asignación (varias veces), así que va aparte y se
+  compara contra un snapshot tomado al activarlo.
+
+dump() escribe las pilas en formato colapsado (flamegraph.pl,
+speedscope), el snapshot de tracemalloc y un resumen con los sitios más
+costosos en CPU y memoria, sin reiniciar el proceso. El análisis y la
+escritura corren en un hilo propio para no retrasar las escrituras del
+estado.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from types import FrameType
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from persistence import SerialWriter, atomic_write
+
+logger = logging.getLogger(__name__)
+
+ALL = "*"
+DEFAULT_INTERVAL = 0.005  # segundos entre muestras
+TRACEMALLOC_FRAMES = 1  # alcanza para agrupar por línea y es lo más barato
+TOP_SITES = 10
+
+
+def parse_targets(value: Optional[str]) -> Set[str]:
+    """"hecho,status" -> {"hecho", "status"}; "all" o "*" -> todos"""
+    targets = {name.strip().lstrip("/").lower() for name in (value or "").split(",") if name.strip()}
+    if targets & {"all", "todos", ALL}:
+        return {ALL}
+    return targets
+
+
+def _site(filename: str, lineno: int, name: str) -> str:
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+class _CallStats:
+    __slots__ = ("calls", "seconds", "max_seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+
+
+class Profiler:
+    """Perfilador por muestreo (y de memoria, opcional) activable en caliente por callback"""
+
+    def __init__(
+        self,
+        targets: Iterable[str] = (),
+        memory: bool = False,
+        directory: str = "profiles",
+        interval: float = DEFAULT_INTERVAL,
+    ):
+        self.targets: Set[str] = set(targets)
+        self.memory = memory
+        self.directory = directory
+        self.interval = interval
+        self.names: List[str] = []  # callbacks instrumentados
+        self._stacks: Counter = Counter()  # (callback, pila) -> muestras
+        self._lock = threading.Lock()  # entre el hilo muestreador y quien lee las pilas
+        self._calls: Dict[str, _CallStats] = {}
+        self._active: Dict[FrameType, str] = {}  # frame del envoltorio -> callback en curso
+        self._loop_thread: Optional[int] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._io: Optional[SerialWriter] = None
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._final: Optional[tracemalloc.Snapshot] = None  # al desactivar, para dump() posteriores
+        self._since = time.time()
+        self._own_tracemalloc = False
+        # Métricas
+        self.samples = 0
+        self.dumps = 0
+
+    def is_enabled(self, name: str) -> bool:
+        return name in self.targets or ALL in self.targets
+
+    # --- Instrumentación ---
+
+    def wrap(self, name: str, callback: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+        """Envuelve un callback async; solo mide cuando `name` está activado"""
+        self.names.append(name)
+        profiler = self
+
+        @functools.wraps(callback)
+        async def profiled(*args, **kwargs):
+            if not profiler.targets or not profiler.is_enabled(name):
+                return await callback(*args, **kwargs)
+            # El muestreador reconoce este frame al recorrer la pila del bucle
+            frame = sys._getframe()
+            profiler._active[frame] = name
+            start = time.perf_counter()
+            try:
+                return await callback(*args, **kwargs)
+            finally:
+                profiler._record_call(name, time.perf_counter() - start)
+                del profiler._active[frame]
+
+        profiled.profile_name = name
+        return profiled
+
+    def instrument(self, application):
+        """Envuelve los CommandHandler y los jobs ya registrados en la Application"""
+        from telegram.ext import CommandHandler
+
+        for handlers in application.handlers.values():
+            for handler in handlers:
+                if isinstance(handler, CommandHandler) and not hasattr(handler.callback, "profile_name"):
+                    handler.callback = self.wrap(min(handler.commands), handler.callback)
+        if application.job_queue:
+            for job in application.job_queue.jobs():
+                if not hasattr(job.callback, "profile_name"):
+                    job.callback = self.wrap(job.name, job.callback)
+
+    def _record_call(self, name: str, seconds: float):
+        stats = self._calls.get(name)
+        if stats is None:
+            stats = self._calls[name] = _CallStats()
+        stats.calls += 1
+        stats.seconds += seconds
+        if seconds > stats.max_seconds:
+            stats.max_seconds = seconds
+
+    # --- Activación (desde el bucle de eventos) ---
+
+    def start(self):
+        """Fija el hilo del bucle de eventos y activa lo pedido al arrancar (p. ej. por env)"""
+        self._loop_thread = threading.get_ident()
+        if self.targets:
+            self.enable(self.targets)
+
+    def enable(self, targets: Iterable[str], memory: Optional[bool] = None):
+        self.targets = set(targets)
+        if memory is not None:
+            self.memory = memory
+        if self._loop_thread is None:
+            self._loop_thread = threading.get_ident()
+        if self.memory:
+            self._start_tracemalloc()
+        else:
+            self._stop_tracemalloc()
+        if self._sampler is None:
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+            self._sampler.start()
+        memory_note = " (con memoria)" if self.memory else ""
+        logger.info(f"Perfilado activado para: {', '.join(sorted(self.targets))}{memory_note}")
+
+    def disable(self):
+        """Apaga el muestreo y tracemalloc; lo acumulado queda para dump()"""
+        if not self.targets and self._sampler is None:
+            return
+        self.targets = set()
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        self._stop_tracemalloc()
+        logger.info("Perfilado desactivado")
+
+    def reset(self):
+        """Descarta las muestras, los tiempos y la base de memoria acumulados"""
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+        self._calls.clear()
+        self._final = None
+        self._baseline = tracemalloc.take_snapshot() if self._own_tracemalloc else None
+        self._since = time.time()
+
+    def _start_tracemalloc(self):
+        if tracemalloc.is_tracing():
+            return
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._own_tracemalloc = True
+        self._baseline = tracemalloc.take_snapshot()
+        self._final = None
+
+    def _stop_tracemalloc(self):
+        if not self._own_tracemalloc:
+            return
+        self._final = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        self._own_tracemalloc = False
+
+    # --- Muestreo (hilo propio) ---
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            if not self._active:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = []
+            name = None
+            while frame is not None:
+                name = self._active.get(frame)
+                if name is not None:
+                    break
+                code = frame.f_code
+                stack.append((code.co_filename, frame.f_lineno, code.co_name))
+                frame = frame.f_back
+            del frame
+            if name is None:
+                # El bucle está en otra cosa (o el callback espera E/S)
+                continue
+            stack.reverse()
+            with self._lock:
+                self._stacks[(name, tuple(stack))] += 1
+                self.samples += 1
+
+    # --- Resultados ---
+
+    def status(self) -> str:
+        """Estado breve: qué se perfila, muestras y tiempos por callback"""
+        state = ", ".join(sorted(self.targets)) if self.targets else "apagado"
+        if self.targets and self.memory:
+            state += " + memoria"
+        lines = [f"Perfilado: {state}", f"Muestras: {self.samples} (cada {self.interval * 1000:.0f} ms)"]
+        lines.extend(self._call_lines())
+        return "\n".join(lines)
+
+    def _call_lines(self) -> List[str]:
+        if not self._calls:
+            return []
+        lines = ["Callbacks (llamadas, total, promedio, máx):"]
+        for name, stats in sorted(self._calls.items(), key=lambda item: -item[1].seconds):
+            lines.append(
+                f"  {name}: {stats.calls}, {stats.seconds * 1000:.1f} ms, "
+                f"{stats.seconds / stats.calls * 1000:.2f} ms, {stats.max_seconds * 1000:.1f} ms"
+            )
+        return lines
+
+    def _copy_stacks(self) -> Tuple[list, int]:
+        with self._lock:
+            return list(self._stacks.items()), self.samples
+
+    async def dump(self, top: int = TOP_SITES) -> Tuple[str, List[str]]:
+        """Escribe resumen, pilas y snapshot de memoria; devuelve (resumen, archivos)"""
+        stacks, samples = self._copy_stacks()
+        calls = self._call_lines()
+        snapshot = self._final
+        if self._own_tracemalloc:
+            snapshot = tracemalloc.take_snapshot()
+        base = os.path.join(self.directory, f"profile-{time.strftime('%Y%m%d-%H%M%S')}")
+        if self._io is None:
+            self._io = SerialWriter("profiler-io")
+        # Agrupar miles de trazas es Python puro: va fuera del bucle y del escritor del estado
+        future = self._io.submit(self._write_dump, base, stacks, samples, calls, snapshot, top)
+        summary, paths = await asyncio.wrap_future(future)
+        self.dumps += 1
+        logger.info(f"Perfil escrito en {', '.join(paths)}")
+        return summary, paths
+
+    def _write_dump(
+        self,
+        base: str,
+        stacks: list,
+        samples: int,
+        calls: List[str],
+        snapshot: Optional[tracemalloc.Snapshot],
+        top: int,
+    ) -> Tuple[str, List[str]]:
+        summary = self._summary(stacks, samples, calls, snapshot, top)
+        files = {f"{base}-summary.txt": summary.encode("utf-8") + b"\n"}
+        if stacks:
+            files[f"{base}-cpu.collapsed"] = self._collapsed(stacks).encode("utf-8")
+        paths = []
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            for path, payload in files.items():
+                atomic_write(path, payload)
+                paths.append(path)
+            if snapshot is not None:
+                snapshot.dump(f"{base}-alloc.tracemalloc")
+                paths.append(f"{base}-alloc.tracemalloc")
+        except Exception as e:
+            logger.error(f"Error escribiendo perfil en {self.directory}: {e}")
+        return summary, paths
+
+    def _summary(
+        self,
+        stacks: list,
+        samples: int,
+        calls: List[str],
+        snapshot: Optional[tracemalloc.Snapshot],
+        top: int,
+    ) -> str:
+        since = time.strftime("%d/%m %H:%M:%S", time.localtime(self._since))
+        lines = [f"Perfil desde {since}: {samples} muestras cada {self.interval * 1000:.0f} ms"]
+        lines.extend(calls)
+
+        own: Counter = Counter()  # muestras con la línea en la punta de la pila
+        total: Counter = Counter()  # muestras con la función en cualquier parte de la pila
+        for (name, stack), count in stacks:
+            if not stack:
+                continue
+            own[_site(*stack[-1])] += count
+            for filename, _, func in set(stack):
+                total[f"{func} ({os.path.basename(filename)})"] += count
+        if samples:
+            lines.append("CPU, línea en ejecución:")
+            lines.extend(f"  {count * 100 / samples:5.1f}%  {site}" for site, count in own.most_common(top))
+            lines.append("CPU, función en la pila:")
+            lines.extend(f"  {count * 100 / samples:5.1f}%  {site}" for site, count in total.most_common(top))
+
+        if snapshot is not None and self._baseline is not None:
+            lines.append("Memoria desde la activación (neto, bloques):")
+            shown = 0
+            for stat in snapshot.compare_to(self._baseline, "lineno"):
+                frame = stat.traceback[0]
+                if frame.filename in (__file__, tracemalloc.__file__):
+                    continue
+                lines.append(
+                    f"  {stat.size_diff / 1024:+9.1f} KiB {stat.count_diff:+7d}  "
+                    f"{os.path.basename(frame.filename)}:{frame.lineno}"
+                )
+                shown += 1
+                if shown >= top:
+                    break
+        return "\n".join(lines)
+
+    @staticmethod
+    def _collapsed(stacks: list) -> str:
+        """Pilas en formato colapsado: "callback;f1;f2 muestras" por línea"""
+        lines = []
+        for (name, stack), count in stacks:
+            frames = ";".join(_site(*frame) for frame in stack)
+            lines.append(f"{name};{frames} {count}" if frames else f"{name} {count}")
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        self.disable()
+        if self._io is not None:
+            self._io.close()
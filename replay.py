@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Grabación y reproducción offline de updates de Telegram
+
+Con BOT_RECORD_UPDATES=updates.jsonl el bot guarda cada update que recibe
+como una línea JSON con el formato de requests.jsonl (request_id, title,
+body) más la hora de llegada (ts); fake_api.py --record graba igual los
+updates que entrega. Este script reproduce esos archivos a través de los
+handlers reales (la misma Application, el mismo PerChatUpdateProcessor)
+contra un StubBot sin red, para benchmarks de regresión y para reproducir
+incidentes de producción:
+
+    python replay.py updates.jsonl --state prod/ --expect prod-after/ --speed 0
+
+- El archivo se lee línea a línea: la memoria no depende de su largo.
+  También acepta updates sueltos (un objeto de la Bot API por línea).
+- --speed 1 respeta los tiempos grabados, 10 va diez veces más rápido y
+  0 (por defecto) no espera; sin espera se quitan los límites de envío.
+- El reloj del motor sigue la hora grabada de cada update, así los días
+  (y "ya se marcó hoy") salen igual que en producción.
+- --state copia state.json, identities.json, updates.json y sus logs como estado
+  inicial; --expect compara el estado final con el de otro directorio y
+  lista los chats que divergen.
+
+Informa throughput, latencia por comando (p50/p95/p99, con un histograma
+de buckets logarítmicos de tamaño fijo) y errores; --output guarda el
+informe en JSON.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATE_FILES = ("state.json", "identities.json", "updates.json")
+BUCKET_RATIO = 1.05  # precisión de los percentiles (~5 %)
+MAX_IN_FLIGHT = 1024  # updates en curso a la vez durante la reproducción
+
+
+# --- Grabación ---
+
+class UpdateRecorder:
+    """Agrega cada update recibido a un JSONL; la serialización y la escritura van en el escritor"""
+
+    def __init__(self, path: str, writer=None):
+        self.path = path
+        self.writer = writer
+        self._file = open(path, "a", encoding="utf-8")
+        self._ids = itertools.count(1)
+        # Métricas
+        self.recorded = 0
+
+    async def record(self, update, context=None):
+        """Callback para un TypeHandler(Update, ...) en un grupo anterior a los comandos"""
+        record = {"request_id": next(self._ids), "title": "update", "ts": time.time(), "body": update.to_dict()}
+        self.recorded += 1
+        if self.writer:
+            self.writer.submit(self._write, record)
+        else:
+            self._write(record)
+
+    def _write(self, record: dict):
+        try:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+        except Exception as e:
+            logger.error(f"Error grabando update en {self.path}: {e}")
+
+    def close(self):
+        if self.writer:
+            self.writer.submit(self._file.close)
+        else:
+            self._file.close()
+
+
+def iter_updates(path: str) -> Iterator[Tuple[Optional[float], dict]]:
+    """(hora, update) de cada línea con un update; las demás peticiones grabadas se ignoran"""
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Línea {number} inválida en {path}")
+                continue
+            if "update_id" in record:
+                data = record
+            elif record.get("title") == "update":
+                data = record.get("body") or {}
+            else:
+                continue
+            ts = record.get("ts")
+            if ts is None:
+                message = data.get("message") or data.get("edited_message") or {}
+                ts = message.get("date")
+            yield ts, data
+
+
+# --- Medición ---
+
+class LatencyHistogram:
+    """Latencias en buckets logarítmicos: memoria fija sin importar cuántas se observen"""
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        index = int(math.log(seconds * 1e6, BUCKET_RATIO)) if seconds > 1e-6 else 0
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Segundos (el centro del bucket donde cae el percentil q)"""
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(BUCKET_RATIO ** (index + 0.5) / 1e6, self.max)
+        return self.max
+
+
+class ReplayClock:
+    """Reemplaza al módulo time del motor: time() devuelve la hora grabada del update en curso"""
+
+    def __init__(self):
+        self.now: Optional[float] = None
+
+    def time(self) -> float:
+        return self.now if self.now is not None else time.time()
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+def command_of(data: dict) -> str:
+    message = data.get("message") or data.get("edited_message") or {}
+    text = message.get("text") or ""
+    if not text.startswith("/"):
+        return "(otro)"
+    return text.split()[0].split("@")[0][1:].lower()
+
+
+class Replayer:
+    """Entrega los updates a la Application como lo haría el Updater y mide cada uno"""
+
+    def __init__(self, app, speed: float = 0.0, max_in_flight: int = MAX_IN_FLIGHT, clock: Optional[ReplayClock] = None):
+        self.app = app
+        self.speed = speed
+        self.clock = clock
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self.latencies: Dict[str, LatencyHistogram] = {}
+        # Métricas
+        self.updates = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self.lag = 0.0  # atraso máximo contra el horario grabado (con --speed)
+        app.add_error_handler(self._on_error)
+
+    async def _on_error(self, update, context):
+        self.errors += 1
+        logger.error(f"Error procesando update reproducido: {context.error}")
+
+    async def run(self, records):
+        from telegram import Update
+
+        processor = self.app.update_processor
+        pending = set()
+        start = time.perf_counter()
+        first_ts = None
+        for ts, data in records:
+            if ts is not None:
+                if first_ts is None:
+                    first_ts = ts
+                if self.speed:
+                    delay = (ts - first_ts) / self.speed - (time.perf_counter() - start)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    else:
+                        self.lag = max(self.lag, -delay)
+                if self.clock:
+                    self.clock.now = ts
+            update = Update.de_json(data, self.app.bot)
+            await self._slots.acquire()
+            task = asyncio.create_task(self._process(processor, update, command_of(data)))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            self.updates += 1
+        if pending:
+            await asyncio.gather(*pending)
+        self.elapsed = time.perf_counter() - start
+
+    async def _process(self, processor, update, command: str):
+        t0 = time.perf_counter()
+        try:
+            await processor.process_update(update, self.app.process_update(update))
+        finally:
+            histogram = self.latencies.get(command)
+            if histogram is None:
+                histogram = self.latencies[command] = LatencyHistogram()
+            histogram.observe(time.perf_counter() - t0)
+            self._slots.release()
+
+    def report(self) -> dict:
+        return {
+            "updates": self.updates,
+            "errors": self.errors,
+            "seconds": self.elapsed,
+            "updates_per_s": self.updates / self.elapsed if self.elapsed else 0.0,
+            "max_lag_s": self.lag,
+            "commands": {
+                command: {
+                    "count": h.count,
+                    "p50_us": h.percentile(0.50) * 1e6,
+                    "p95_us": h.percentile(0.95) * 1e6,
+                    "p99_us": h.percentile(0.99) * 1e6,
+                    "max_us": h.max * 1e6,
+                }
+                for command, h in sorted(self.latencies.items())
+            },
+        }
+
+
+# --- Divergencias ---
+
+def _by_chat(data: dict) -> Dict[str, dict]:
+    return data.get("chats", {})
+
+
+def diff_states(actual_dir: str, expected_dir: str) -> List[dict]:
+    """Chats cuyo estado (store e identidades) difiere entre dos directorios, con las claves distintas
+
+    Cada directorio se abre con ChatStore/IdentityRegistry, así que se
+    aplican también los logs pendientes. Se trabaja sobre copias para no
+    tocar los archivos originales.
+    """
+    from chat_store import ChatStore
+    from identity import IdentityRegistry
+
+    def load(directory: str) -> Tuple[Dict[str, dict], Dict[str, dict]]:
+        with tempfile.TemporaryDirectory() as copy:
+            copy_state(directory, copy)
+            store = ChatStore(os.path.join(copy, "state.json"))
+            identities = IdentityRegistry(os.path.join(copy, "identities.json"))
+            chats, users = _by_chat(store.to_dict()), _by_chat(identities.to_dict())
+            store.close()
+            identities.close()
+        return chats, users
+
+    actual_chats, actual_users = load(actual_dir)
+    expected_chats, expected_users = load(expected_dir)
+    divergences = []
+    for chat_id in sorted(set(actual_chats) | set(expected_chats) | set(actual_users) | set(expected_users), key=int):
+        actual, expected = actual_chats.get(chat_id, {}), expected_chats.get(chat_id, {})
+        keys = sorted(key for key in set(actual) | set(expected) if actual.get(key) != expected.get(key))
+        if actual_users.get(chat_id) != expected_users.get(chat_id):
+            keys.append("identidades")
+        if keys:
+            divergences.append({"chat_id": int(chat_id), "keys": keys})
+    return divergences
+
+
+def copy_state(source: str, target: str):
+    for name in STATE_FILES:
+        for path in (name, name + ".log"):
+            if os.path.exists(os.path.join(source, path)):
+                shutil.copy2(os.path.join(source, path), os.path.join(target, path))
+
+
+# --- CLI ---
+
+async def replay(args, workdir: str) -> dict:
+    os.environ.setdefault("TELEGRAM_TOKEN", "123:replay")
+    os.chdir(workdir)
+    from bot_core import engine
+    from config import Config
+    from fake_api import StubBot
+    from outbound import OutboundEngine
+
+    clock = None
+    if not args.real_clock:
+        clock = engine.time = ReplayClock()
+    if not args.speed:
+        # Sin espera entre updates los límites de envío dominarían la medición
+        engine.outbound = OutboundEngine(
+            global_rate=1e9, chat_rate=1e9, chat_burst=1e9, max_concurrency=10_000
+        )
+
+    config = Config()
+    bot = StubBot()
+    app = engine.build_application(config, bot=bot)
+    replayer = Replayer(app, args.speed, args.max_in_flight, clock)
+    await app.initialize()
+    await app.post_init(app)
+    try:
+        await replayer.run(iter_updates(args.updates))
+    finally:
+        await app.post_stop(app)
+        await app.shutdown()
+        await app.post_shutdown(app)
+    report = replayer.report()
+    report["messages_sent"] = len(bot.sent)
+    return report
+
+
+def print_report(report: dict):
+    print(
+        f"{report['updates']} updates en {report['seconds']:.2f} s "
+        f"({report['updates_per_s']:.0f}/s), {report['errors']} errores, {report['messages_sent']} mensajes"
+    )
+    if report["max_lag_s"]:
+        print(f"Atraso máximo contra lo grabado: {report['max_lag_s'] * 1e3:.1f} ms")
+    print(f"\n{'comando':<12} {'updates':>8} {'p50 µs':>9} {'p95 µs':>9} {'p99 µs':>9} {'máx µs':>10}")
+    for command, r in report["commands"].items():
+        print(
+            f"{command:<12} {r['count']:>8} {r['p50_us']:>9.0f} {r['p95_us']:>9.0f} "
+            f"{r['p99_us']:>9.0f} {r['max_us']:>10.0f}"
+        )
+    divergences = report.get("divergences")
+    if divergences is not None:
+        print(f"\nChats con estado distinto al esperado: {len(divergences)}")
+        for d in divergences[:20]:
+            print(f"  {d['chat_id']}: {', '.join(d['keys'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduce updates grabados contra los handlers reales")
+    parser.add_argument("updates", help="JSONL con los updates (BOT_RECORD_UPDATES o fake_api.py --record)")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = tiempo real, N = N veces más rápido, 0 = sin espera")
+    parser.add_argument("--state", help="directorio con el estado inicial (state.json, identities.json)")
+    parser.add_argument("--expect", help="directorio con el estado final esperado, para listar divergencias")
+    parser.add_argument("--output", help="archivo JSON donde guardar el informe")
+    parser.add_argument("--real-clock", action="store_true", help="usar la hora actual en vez de la grabada")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT)
+    args = parser.parse_args()
+    args.updates = os.path.abspath(args.updates)
+    logging.basicConfig(level=logging.WARNING)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.state:
+            copy_state(os.path.join(cwd, args.state), workdir)
+        report = asyncio.run(replay(args, workdir))
+        os.chdir(cwd)
+        if args.expect:
+            report["divergences"] = diff_states(workdir, args.expect)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if report["errors"] or report.get("divergences"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
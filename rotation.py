@@ -0,0 +1,253 @@
+"""
+Rotación de turnos entre N personas con pesos, saltos, vacaciones e intercambios
+
+El turno se elige con round-robin ponderado suave (el de nginx): en cada
+ronda cada persona activa suma su peso a su crédito, le toca a la de mayor
+crédito (en empate, la de menor índice) y esa resta el total de pesos
+activos. Con pesos 2 y 1 el orden queda A, B, A, A, B, A... sin rachas.
+
+- Vacaciones (rango de días) sacan a la persona de las rondas: no suma
+  crédito, así que al volver no arrastra deuda ni ventaja.
+- Quien salta su turno suma crédito igual pero no puede ser elegido en esa
+  ronda: queda con crédito a favor y le toca apenas sea el más alto
+  (normalmente en la ronda siguiente).
+- Peso 0 saca a la persona de la rotación del chat.
+- Un intercambio hace que otra persona cubra la ronda actual y que quien
+  tenía el turno cubra la próxima ronda de esa persona. La ronda se le
+  carga a quien estaba programado, así que los pesos se respetan.
+
+Los próximos turnos se precalculan suponiendo una ronda por día desde el
+día de la ronda actual. Quién tiene el turno y quién sigue se leen en O(1).
+Al avanzar se simula una sola ronda más al final de la lista. Cambiar pesos,
+vacaciones, saltos o intercambios, o que la ronda actual pase a otro día,
+recalcula la lista (UPCOMING rondas).
+"""
+
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+UPCOMING = 14  # rondas precalculadas
+DEFAULT_WEIGHT = 1
+
+
+class _Tail:
+    """Estado de la simulación después de la última ronda precalculada"""
+
+    __slots__ = ("credit", "swaps", "skipped", "day")
+
+    def __init__(self, credit: List[int], swaps: List[Tuple[int, int]], skipped: Sequence[int], day: Optional[int]):
+        self.credit = credit
+        self.swaps = swaps
+        self.skipped = skipped
+        self.day = day
+
+
+class Rotation:
+    """Estado de la rotación de un chat (lo persistente) y sus próximas rondas (derivadas)"""
+
+    __slots__ = (
+        "weights", "credit", "vacations", "skipped", "swaps",
+        "_scheduled", "_served", "_members", "_day", "_tail",
+    )
+
+    def __init__(self):
+        self.weights: Dict[int, int] = {}  # solo los distintos de DEFAULT_WEIGHT
+        self.credit: List[int] = []  # crédito antes de la ronda actual
+        self.vacations: Dict[int, Tuple[int, int]] = {}  # persona -> (desde, hasta), ordinales inclusive
+        self.skipped: List[int] = []  # fuera solo de la ronda actual
+        self.swaps: List[Tuple[int, int]] = []  # (programada, quien la cubre), en orden
+        # Próximas rondas: persona programada y quien la hace; _tail sigue desde ahí
+        self._scheduled = array("b")
+        self._served = array("b")
+        self._members = 0
+        self._day: Optional[int] = None
+        self._tail: Optional[_Tail] = None
+
+    @classmethod
+    def starting_at(cls, turn: int) -> "Rotation":
+        """Rotación que empieza en `turn` (para migrar el antiguo campo turno)
+
+        `turn` queda con el crédito más alto y los de índice mayor en 0 (el
+        empate lo gana el menor índice); los de índice menor quedan debajo en
+        orden, así el orden sigue siendo turn, turn + 1, ..., 0, 1, ... para
+        cualquier cantidad de personas.
+        """
+        rotation = cls()
+        if turn > 0:
+            rotation.credit = [-1 - i for i in range(turn)] + [1]
+        return rotation
+
+    # --- Consultas (O(1) una vez precalculado) ---
+
+    def current(self, members: int, day: Optional[int] = None) -> int:
+        """Quién tiene el turno en la ronda del día `day` (None = sin mirar vacaciones)"""
+        self._ensure(members, day)
+        return self._served[0]
+
+    def scheduled(self, members: int, day: Optional[int] = None) -> int:
+        """A quién le corresponde la ronda actual antes de aplicar intercambios"""
+        self._ensure(members, day)
+        return self._scheduled[0]
+
+    def upcoming(self, members: int, day: Optional[int] = None, count: int = UPCOMING) -> List[int]:
+        """Quién hace cada una de las próximas rondas, empezando por la actual"""
+        self._ensure(members, day)
+        return self._served[:count].tolist()
+
+    def weight(self, person: int) -> int:
+        return self.weights.get(person, DEFAULT_WEIGHT)
+
+    def on_vacation(self, person: int, day: Optional[int]) -> bool:
+        vacation = self.vacations.get(person)
+        return vacation is not None and day is not None and vacation[0] <= day <= vacation[1]
+
+    # --- Mutaciones ---
+
+    def advance(self, members: int, day: Optional[int] = None):
+        """Cierra la ronda actual y pasa a la siguiente"""
+        self._ensure(members, day)
+        picked = self._pick(self.credit, members, day, self.skipped)
+        self.skipped = []
+        self._consume_swap(self.swaps, picked)
+        # Incremental: la lista pierde la primera ronda y se simula una más al final
+        del self._scheduled[0]
+        del self._served[0]
+        scheduled, served = self._step(self._tail, members)
+        self._scheduled.append(scheduled)
+        self._served.append(served)
+        self._day = None if day is None else day + 1
+
+    def skip(self, members: int, day: Optional[int] = None):
+        """La persona programada no hace esta ronda y queda con crédito a favor"""
+        self.skipped.append(self.scheduled(members, day))
+        self._invalidate()
+
+    def swap(self, members: int, day: Optional[int], person: int):
+        """`person` hace la ronda actual; quien la tenía cubre la próxima ronda de `person`"""
+        scheduled = self.scheduled(members, day)
+        holder = self._served[0]
+        if person == holder:
+            return
+        index = next((i for i, (s, _) in enumerate(self.swaps) if s == scheduled), None)
+        if person == scheduled:
+            # Vuelve a hacerla quien estaba programado: se anula la cobertura
+            del self.swaps[index]
+        else:
+            if index is None:
+                self.swaps.insert(0, (scheduled, person))
+            else:
+                self.swaps[index] = (scheduled, person)
+            self.swaps.append((person, holder))
+        self._invalidate()
+
+    def set_weight(self, person: int, weight: int):
+        if weight == DEFAULT_WEIGHT:
+            self.weights.pop(person, None)
+        else:
+            self.weights[person] = weight
+        self._invalidate()
+
+    def set_vacation(self, person: int, start: Optional[int], end: Optional[int]):
+        if start is None:
+            self.vacations.pop(person, None)
+        else:
+            self.vacations[person] = (start, end)
+        self._invalidate()
+
+    # --- Simulación ---
+
+    def _round(self, credit: List[int], members: int, day: Optional[int], excluded: Sequence[int]) -> int:
+        # Quien salta suma crédito pero no puede ser elegido; de vacaciones no suma
+        best = -1
+        best_value = 0
+        total = 0
+        for person in range(members):
+            weight = self.weights.get(person, DEFAULT_WEIGHT)
+            if weight <= 0 or self.on_vacation(person, day):
+                continue
+            total += weight
+            value = credit[person] + weight
+            if person not in excluded and (best < 0 or value > best_value):
+                best, best_value = person, value
+        if best < 0:
+            return best
+        for person in range(members):
+            weight = self.weights.get(person, DEFAULT_WEIGHT)
+            if weight > 0 and not self.on_vacation(person, day):
+                credit[person] += weight
+        credit[best] -= total
+        return best
+
+    def _pick(self, credit: List[int], members: int, day: Optional[int], excluded: Sequence[int]) -> int:
+        if len(credit) < members:
+            credit.extend([0] * (members - len(credit)))
+        picked = self._round(credit, members, day, excluded)
+        if picked < 0 and excluded:
+            picked = self._round(credit, members, day, ())  # saltaron todos
+        if picked < 0:
+            picked = self._round(credit, members, None, ())  # todos de vacaciones
+        return max(picked, 0)
+
+    @staticmethod
+    def _consume_swap(swaps: List[Tuple[int, int]], picked: int) -> int:
+        for i, (scheduled, substitute) in enumerate(swaps):
+            if scheduled == picked:
+                del swaps[i]
+                return substitute
+        return picked
+
+    def _step(self, tail: _Tail, members: int) -> Tuple[int, int]:
+        picked = self._pick(tail.credit, members, tail.day, tail.skipped)
+        tail.skipped = ()
+        if tail.day is not None:
+            tail.day += 1
+        return picked, self._consume_swap(tail.swaps, picked)
+
+    def _ensure(self, members: int, day: Optional[int]):
+        if self._tail is not None and members == self._members and day == self._day:
+            return
+        tail = _Tail(list(self.credit), list(self.swaps), tuple(self.skipped), day)
+        scheduled = array("b")
+        served = array("b")
+        for _ in range(UPCOMING):
+            s, d = self._step(tail, members)
+            scheduled.append(s)
+            served.append(d)
+        self._scheduled, self._served, self._tail = scheduled, served, tail
+        self._members, self._day = members, day
+
+    def _invalidate(self):
+        self._tail = None
+
+    # --- Persistencia ---
+
+    def copy(self) -> "Rotation":
+        rotation = Rotation()
+        rotation.weights = dict(self.weights)
+        rotation.credit = list(self.credit)
+        rotation.vacations = dict(self.vacations)
+        rotation.skipped = list(self.skipped)
+        rotation.swaps = list(self.swaps)
+        return rotation
+
+    def to_dict(self) -> dict:
+        data: dict = {"credito": self.credit}
+        if self.weights:
+            data["pesos"] = {str(person): weight for person, weight in self.weights.items()}
+        if self.vacations:
+            data["vacaciones"] = {str(person): list(days) for person, days in self.vacations.items()}
+        if self.skipped:
+            data["saltados"] = self.skipped
+        if self.swaps:
+            data["cambios"] = [list(swap) for swap in self.swaps]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Rotation":
+        rotation = cls()
+        rotation.credit = list(data.get("credito", ()))
+        rotation.weights = {int(person): weight for person, weight in data.get("pesos", {}).items()}
+        rotation.vacations = {int(person): tuple(days) for person, days in data.get("vacaciones", {}).items()}
+        rotation.skipped = list(data.get("saltados", ()))
+        rotation.swaps = [tuple(swap) for swap in data.get("cambios", ())]
+        return rotation
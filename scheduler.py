@@ -0,0 +1,86 @@
+"""
+Planificador de recordatorios por hora de vencimiento
+
+Guarda el próximo recordatorio de cada chat en un min-heap. En cada tick
+solo se extraen los chats vencidos, así que el costo es O(vencidos) y no
+O(todos los chats). Reprogramar un chat es O(log n): la entrada anterior
+queda obsoleta en el heap y se descarta al salir. Los vencimientos son
+epoch enteros ya ajustados al horario del chat (ver timezones.py).
+"""
+
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+from timezones import ReminderWindow
+
+REMINDER_INTERVAL = 10800  # 3 horas
+
+
+class ReminderScheduler:
+    """Min-heap de (vencimiento, chat_id) con invalidación diferida"""
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int]] = []
+        self._due: Dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, chat_id: int) -> bool:
+        return chat_id in self._due
+
+    def due_at(self, chat_id: int) -> Optional[float]:
+        return self._due.get(chat_id)
+
+    def schedule(self, chat_id: int, when: float):
+        """Programa (o reprograma) el próximo recordatorio de un chat"""
+        self._due[chat_id] = when
+        heapq.heappush(self._heap, (when, chat_id))
+        # Si se acumulan demasiadas entradas obsoletas, se reconstruye el heap
+        if len(self._heap) > 2 * len(self._due) + 64:
+            self._heap = [(t, c) for c, t in self._due.items()]
+            heapq.heapify(self._heap)
+
+    def cancel(self, chat_id: int):
+        self._due.pop(chat_id, None)
+
+    def pop_due(self, now: float) -> List[int]:
+        """Extrae los chats cuyo recordatorio ya venció"""
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            when, chat_id = heapq.heappop(heap)
+            if self._due.get(chat_id) == when:
+                del self._due[chat_id]
+                due.append(chat_id)
+        return due
+
+    def entries(self) -> Tuple[List[int], List[float]]:
+        """Chats y vencimientos programados (para el checkpoint de apagado)"""
+        return list(self._due), list(self._due.values())
+
+    def restore(self, chats: List[int], due: List[float]):
+        """Reemplaza lo programado; armar el heap de una vez es O(n)"""
+        self._due = dict(zip(chats, due))
+        self._heap = [(t, c) for c, t in self._due.items()]
+        heapq.heapify(self._heap)
+
+    def next_due(self) -> Optional[float]:
+        """Hora (epoch) del próximo vencimiento, o None si no hay"""
+        heap = self._heap
+        while heap and self._due.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+
+def next_reminder_at(now: int, last_day: Optional[int], window: ReminderWindow, delay: int = REMINDER_INTERVAL) -> int:
+    """Calcula el próximo recordatorio de un chat (epoch)
+
+    Si la tarea ya se hizo hoy (last_day es un ordinal de día local), el
+    próximo recordatorio es al abrir el horario del día siguiente; si no,
+    dentro de `delay` segundos, corrido a la próxima apertura si cae fuera
+    del horario. Todo se resuelve con la tabla precalculada de la ventana.
+    """
+    if last_day is not None and last_day >= window.day_of(now):
+        return window.clamp(window.next_day_start(now))
+    return window.clamp(now + delay)
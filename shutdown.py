@@ -0,0 +1,121 @@
+"""
+Apagado ordenado y checkpoint para el arranque en caliente
+
+Al recibir SIGINT/SIGTERM (o al terminar el webhook) el bot:
+
+1. corta la entrada de updates (detiene el Updater o el servidor del webhook);
+2. espera a que se vacíe la cola y terminen los updates en curso, hasta
+   un plazo; los que siguen colgados al vencer se cancelan;
+3. detiene la Application (jobs incluidos) y, en post_stop, le da al
+   outbox lo que quede del plazo para enviar lo que ya estaba listo;
+4. en post_shutdown compacta el estado y escribe un checkpoint con lo
+   que cuesta recalcular al arrancar: el heap de recordatorios (el
+   offset de updates lo guarda dedup.py con cada update).
+
+El checkpoint vale solo para el estado con el que se escribió (mismo seq
+del log de chats y misma configuración de horarios) y se consume al
+leerlo: si el proceso siguiente se corta, el arranque vuelve a ser en frío.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Callable, Optional
+
+from persistence import SerialWriter, atomic_write, dump_json, run_io
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_VERSION = 1
+DEFAULT_TIMEOUT = 10.0  # segundos para drenar updates y el outbox
+DRAIN_POLL = 0.02
+
+_deadline: Optional[float] = None  # time.monotonic() en que vence el apagado en curso
+
+
+def reset():
+    """Olvida el plazo del apagado terminado (después de post_stop)"""
+    global _deadline
+    _deadline = None
+
+
+def remaining(default: float) -> float:
+    """Segundos que quedan del plazo de apagado (o `default` si no hay uno en curso)"""
+    if _deadline is None:
+        return default
+    return max(0.0, _deadline - time.monotonic())
+
+
+async def wait_until(idle: Callable[[], bool], timeout: float) -> bool:
+    """Espera hasta que idle() sea verdadero o venza el plazo"""
+    deadline = time.monotonic() + timeout
+    while not idle():
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(DRAIN_POLL)
+    return True
+
+
+async def graceful_stop(application, stop_intake: Optional[Callable[[], Awaitable]], timeout: float = DEFAULT_TIMEOUT):
+    """Pasos 1 a 3: corta la entrada, drena con plazo y detiene la Application"""
+    global _deadline
+    _deadline = time.monotonic() + timeout
+    start = time.perf_counter()
+    if stop_intake:
+        try:
+            await stop_intake()
+        except Exception as e:
+            logger.error(f"Error deteniendo la entrada de updates: {e}")
+
+    processor = application.update_processor
+    queue = application.update_queue
+
+    def idle() -> bool:
+        return not queue.qsize() and not getattr(processor, "in_flight", 0)
+
+    if application.running and not await wait_until(idle, remaining(0)):
+        cancel = getattr(processor, "cancel_in_flight", None)
+        stuck = cancel() if cancel else 0
+        logger.warning(f"Plazo de apagado vencido: {queue.qsize()} updates en cola y {stuck} cancelados")
+    if application.running:
+        await application.stop()
+    logger.info(f"Updates drenados en {(time.perf_counter() - start) * 1e3:.0f} ms")
+
+
+# --- Checkpoint ---
+
+def write_checkpoint(path: str, data: dict, writer: Optional[SerialWriter] = None):
+    """Escribe el checkpoint (en el escritor, después de lo ya encolado)"""
+    data = dict(data, version=CHECKPOINT_VERSION, written_at=time.time())
+    run_io(writer, _write, path, dump_json(data))
+
+
+def _write(path: str, payload: bytes):
+    try:
+        atomic_write(path, payload)
+    except Exception as e:
+        logger.error(f"Error escribiendo checkpoint {path}: {e}")
+        return
+    logger.info(f"Checkpoint de arranque escrito ({len(payload)} bytes)")
+
+
+def load_checkpoint(path: str, **expected) -> Optional[dict]:
+    """Lee y borra el checkpoint; None si no hay o no corresponde a `expected` (p. ej. seq=...)"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        os.unlink(path)
+    except Exception as e:
+        logger.error(f"Error leyendo checkpoint {path}: {e}")
+        return None
+    if data.get("version") != CHECKPOINT_VERSION:
+        return None
+    for key, value in expected.items():
+        if data.get(key) != value:
+            logger.info(f"Checkpoint descartado: {key} no coincide con el estado actual")
+            return None
+    return data
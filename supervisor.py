@@ -0,0 +1,221 @@
+"""
+Supervisor del ciclo de vida en polling: reinicios con backoff sobre la misma Application
+
+PTB ya reintenta cada getUpdates fallido, pero hay fallas que lo dejan
+fuera: que getMe o deleteWebhook fallen al arrancar (antes el proceso
+terminaba) o que la tarea de polling termine, lo que PTB hace solo con un
+token inválido (antes el bot quedaba vivo sin recibir nada). El
+supervisor clasifica la falla: con un token inválido o el puerto HTTP
+ocupado se apaga y sale con código 1; con lo demás reintenta con backoff exponencial con jitter
+completo, o lo que pida un RetryAfter.
+
+Al reintentar no se arma nada de nuevo: se detiene la Application (con
+el drenado de shutdown.graceful_stop) y se vuelve a arrancar la misma,
+con sus handlers, jobs y clientes HTTP. post_init y post_stop corren una
+sola vez por proceso, así que el outbox, el servidor HTTP y la medición
+del bucle siguen vivos entre reinicios y no se duplican. Tras cada
+reinicio se revisa que no queden tareas de asyncio del ciclo anterior.
+
+En /metrics: bot_restarts_total (por tipo de falla),
+bot_restart_recovery_seconds (de la falla a volver a atender) y
+bot_asyncio_tasks.
+"""
+
+import asyncio
+import errno
+import logging
+import random
+import signal
+import time
+from typing import Dict, Optional, Set
+
+from telegram.error import Conflict, InvalidToken, NetworkError, RetryAfter, TelegramError
+
+import shutdown
+from metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+POLLING_TASK = "Updater:start_polling:polling_task"  # nombre que PTB le da a la tarea de getUpdates
+
+
+def _task_count() -> int:
+    try:
+        return len(asyncio.all_tasks())
+    except RuntimeError:  # sin bucle corriendo
+        return 0
+
+
+RESTARTS = Counter("bot_restarts_total", "Reinicios del ciclo de la Application por tipo de falla", ["kind"])
+RECOVERY_SECONDS = Histogram(
+    "bot_restart_recovery_seconds",
+    "Tiempo desde la falla hasta volver a atender",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+TASKS = Gauge("bot_asyncio_tasks", "Tareas vivas en el bucle de eventos", fn=_task_count)
+LEAKED_TASKS = Counter("bot_tasks_leaked_total", "Tareas que siguieron vivas después de detener un ciclo")
+
+
+def classify_error(error: BaseException) -> str:
+    """"fatal" (reintentar no sirve), "rate", "conflict", "network", "api" (otra respuesta de error) o "unexpected\""""
+    if isinstance(error, InvalidToken):
+        return "fatal"
+    if isinstance(error, OSError) and error.errno == errno.EADDRINUSE:
+        return "fatal"  # otro proceso tiene el puerto de salud/métricas: reintentar no lo libera
+    if isinstance(error, RetryAfter):
+        return "rate"
+    if isinstance(error, Conflict):
+        return "conflict"  # otra instancia con el mismo token (p. ej. durante un deploy)
+    if isinstance(error, (NetworkError, OSError)):
+        return "network"
+    if isinstance(error, TelegramError):
+        return "api"  # p. ej. un 5xx sin cuerpo ("Invalid server response")
+    return "unexpected"
+
+
+class Supervisor:
+    """Ejecuta la Application en polling y la reinicia ante fallas recuperables"""
+
+    def __init__(
+        self,
+        application,
+        timeout: float = shutdown.DEFAULT_TIMEOUT,
+        base_delay: float = BASE_DELAY,
+        max_delay: float = MAX_DELAY,
+    ):
+        self.application = application
+        self.timeout = timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._stop: Optional[asyncio.Event] = None
+        self._hooks_started = False
+        self._baseline: Set[asyncio.Task] = set()  # tareas vivas antes de arrancar el ciclo
+        self._failed_at: Optional[float] = None
+        self.fatal: Optional[BaseException] = None  # la falla que apagó el bot, si la hubo
+        # Métricas
+        self.attempts = 0  # reintentos desde la última vez que atendió
+        self.restarts = 0
+        self.failures: Dict[str, int] = {}
+        self.last_recovery = 0.0
+        self.leaked = 0
+
+    def backoff(self, attempts: int) -> float:
+        """Backoff exponencial con jitter completo: uniforme en [0, min(tope, base * 2^n)]"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempts))
+
+    def stop(self):
+        """Pide el apagado (lo mismo que SIGINT/SIGTERM)"""
+        if self._stop is not None:
+            self._stop.set()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._stop.set)
+            except NotImplementedError:
+                pass
+
+        app = self.application
+        try:
+            while not self._stop.is_set():
+                error = await self._cycle()
+                if error is None:
+                    logger.info("Señal de apagado recibida")
+                    break
+                kind = classify_error(error)
+                self.failures[kind] = self.failures.get(kind, 0) + 1
+                if kind == "fatal":
+                    logger.error(f"Error no recuperable, se detiene el bot: {error}")
+                    self.fatal = error
+                    break
+                RESTARTS.labels(kind).inc()
+                if self._failed_at is None:
+                    self._failed_at = time.monotonic()
+                await self._stop_cycle()
+                self._check_leaks()
+                delay = error.retry_after if kind == "rate" else self.backoff(self.attempts)
+                self.attempts += 1
+                log = logger.error if kind == "unexpected" else logger.warning
+                log(f"Falla ({kind}): {error}; reintento {self.attempts} en {delay:.1f}s", exc_info=kind == "unexpected")
+                await self._sleep(delay)
+        finally:
+            await self._stop_cycle()
+            if self._hooks_started and app.post_stop:
+                await app.post_stop(app)
+            shutdown.reset()
+            await app.shutdown()
+            if app.post_shutdown:
+                await app.post_shutdown(app)
+
+    async def _cycle(self) -> Optional[BaseException]:
+        """Arranca la Application y espera la señal (devuelve None) o una falla (la devuelve)"""
+        app = self.application
+        self._baseline = set(asyncio.all_tasks())
+        try:
+            await app.initialize()  # no hace nada si ya estaba inicializada
+            if not self._hooks_started:
+                # Aunque post_init falle a medias, lo que alcanzó a arrancar vive todo el
+                # proceso: no cuenta como tarea del ciclo y post_stop lo cierra al apagar
+                self._hooks_started = True
+                try:
+                    if app.post_init:
+                        await app.post_init(app)
+                finally:
+                    self._baseline = set(asyncio.all_tasks())
+            await app.updater.start_polling()
+            await app.start()
+        except Exception as e:
+            return e
+        self._recovered()
+
+        polling = next((t for t in asyncio.all_tasks() if t.get_name() == POLLING_TASK), None)
+        stopped = asyncio.ensure_future(self._stop.wait())
+        await asyncio.wait({stopped, polling} - {None}, return_when=asyncio.FIRST_COMPLETED)
+        stopped.cancel()
+        if self._stop.is_set() or polling is None or polling.cancelled():
+            return None
+        return polling.exception() or RuntimeError("La tarea de getUpdates terminó sola")
+
+    async def _stop_cycle(self):
+        app = self.application
+        updater = app.updater
+        if not app.running and not updater.running:
+            return
+        await shutdown.graceful_stop(app, updater.stop if updater.running else None, self.timeout)
+        shutdown.reset()
+
+    def _recovered(self):
+        if self._failed_at is None:
+            return
+        self.last_recovery = time.monotonic() - self._failed_at
+        RECOVERY_SECONDS.observe(self.last_recovery)
+        self.restarts += 1
+        logger.info(f"Recuperado en {self.last_recovery * 1e3:.0f} ms tras {self.attempts} reintentos ({_task_count()} tareas)")
+        self._failed_at = None
+        self.attempts = 0
+
+    def _check_leaks(self):
+        """Avisa si quedaron tareas creadas durante el ciclo que ya se detuvo"""
+        leaked = [t for t in asyncio.all_tasks() if t not in self._baseline and not t.done()]
+        if leaked:
+            self.leaked += len(leaked)
+            LEAKED_TASKS.inc(len(leaked))
+            logger.warning(f"{len(leaked)} tareas siguen vivas tras detener el ciclo: {', '.join(t.get_name() for t in leaked)}")
+
+    async def _sleep(self, delay: float):
+        """Espera el backoff; una señal de apagado lo corta"""
+        try:
+            await asyncio.wait_for(self._stop.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
+
+
+def run_polling(application, timeout: float = shutdown.DEFAULT_TIMEOUT):
+    supervisor = Supervisor(application, timeout)
+    asyncio.run(supervisor.run())
+    if supervisor.fatal:
+        raise SystemExit(1)
@@ -0,0 +1,320 @@
+"""
+Plantillas de mensajes del bot con soporte de idiomas
+
+Cada plantilla se analiza una sola vez con string.Formatter: se validan
+sus campos y se guardan sus partes (texto fijo y campo), que al
+renderizar se unen con un solo join; las que no tienen campos devuelven
+siempre la misma cadena. Las salidas que no dependen del estado, como
+/help o la lista de personas para un turno dado, se cachean por
+configuración.
+"""
+
+import string
+from datetime import date
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+DEFAULT_LOCALE = "es"
+
+MESSAGES: Dict[str, Dict[str, str]] = {
+    "es": {
+        "saludo": "👋 ¡Hola {nombre}!\n\n",
+        "start": (
+            "{saludo}🤖 Bot activado!\n\n"
+            "👤 Turno: {persona}\n"
+            "📅 Último día: {ultimo_dia}\n\n"
+            "Comandos:\n"
+            "/start - Iniciar\n"
+            "/registrar <nombre> - Identificarte (ej: /registrar {ejemplo})\n"
+            "/hecho - Marcar realizada\n"
+            "/status - Ver estado\n"
+            "/help - Ayuda"
+        ),
+        "status": (
+            "{saludo}📊 Estado:\n\n"
+            "👤 Turno: {persona}\n"
+            "📅 Último día: {ultimo_dia}\n"
+            "🕐 Hora ({zona}): {hora}\n\n"
+            "Personas:\n"
+            "{personas}"
+        ),
+        "help": (
+            "🤖 Bot de Recordatorios\n\n"
+            "Comandos:\n"
+            "/start - Iniciar bot\n"
+            "/registrar <nombre> - Identificarte (ej: /registrar {ejemplo})\n"
+            "/hecho - Marcar tarea realizada\n"
+            "/status - Ver estado\n"
+            "/idioma <es|en> - Cambiar idioma\n"
+            "/turnos - Próximos turnos (saltar, cambiar, vacaciones, peso)\n"
+            "/stats - Estadísticas\n"
+            "/zona <zona> - Cambiar zona horaria\n"
+            "/horario <inicio-fin> - Horas para recordar\n"
+            "/help - Ayuda\n\n"
+            "👥 Personas: {personas}\n"
+            "🌍 Zona horaria: {zona}"
+        ),
+        "nunca": "Nunca",
+        "registrar_uso": "Por favor escribe: {opciones}",
+        "registrar_invalido": "Nombre inválido. Debe ser uno de: {personas}",
+        "registrado": "✅ Registrado como {nombre}. Gracias!",
+        "no_registrado": "❌ No estás registrado. Usa {opciones} para registrarte.",
+        "o": " o ",
+        "no_es_tu_turno": "❌ No es tu turno {nombre}. Le toca a {persona}",
+        "ya_marcado": "✅ Ya se marcó hoy",
+        "hecho": "✅ ¡Gracias {nombre}!\n🔄 Ahora le toca a: {persona}\n📅 {dia}",
+        "recordatorio": "🔔 {persona}, te toca recoger las cacas 💩\nMarca /hecho cuando termines",
+        "recordatorio_atrasado": "⚠️ {persona}, han pasado {dias} días!\nRecoger las cacas 💩 y marca /hecho",
+        "idioma_uso": "Idiomas disponibles: {idiomas}",
+        "idioma_cambiado": "🌍 Idioma cambiado a español",
+        "zona_uso": "Zona actual: {zona}\nUso: /zona America/Santiago (zonas IANA)",
+        "zona_invalida": "❌ Zona horaria desconocida: {zona}",
+        "zona_cambiada": "🌍 Zona horaria: {zona}\n🕐 Hora local: {hora}",
+        "horario_uso": "Horario actual: {horario}\nUso: /horario 8-23 (horas locales, de 0 a 24)",
+        "horario_cambiado": "🕐 Recordatorios entre {horario} ({zona})",
+        "stats": (
+            "📈 Estadísticas\n\n"
+            "✅ Total: {total}\n"
+            "🔥 Racha: {racha} días (récord: {record})\n"
+            "⚖️ Equidad: {equidad}%\n\n"
+            "{personas}"
+        ),
+        "stats_persona": "👤 {nombre}: {mes} este mes, {total} en total, atraso medio {atraso} días\n",
+        "stats_vacio": "📈 Aún no hay tareas marcadas en este chat",
+        "turnos": "📅 Próximos turnos:\n{lista}",
+        "turnos_linea": "{dia} - {persona}\n",
+        "turnos_uso": (
+            "Uso:\n"
+            "/turnos - Próximos turnos\n"
+            "/turnos saltar - Pasar tu turno (te toca después)\n"
+            "/turnos cambiar <nombre> - Que otra persona haga tu turno; tú haces el suyo\n"
+            "/turnos vacaciones <nombre> <días|off>\n"
+            "/turnos peso <nombre> <n> - Cuántos turnos le tocan en proporción (0 = fuera)"
+        ),
+        "turno_saltado": "⏭️ {nombre} pasa su turno. Ahora le toca a {persona}",
+        "turno_cambiado": "🔁 {nombre} hace este turno y {persona} hará el próximo de {nombre}",
+        "turno_no_disponible": "❌ {nombre} no puede tomar este turno",
+        "vacaciones": "🏖️ {nombre} de vacaciones hasta el {dia}",
+        "vacaciones_fin": "👋 {nombre} vuelve a la rotación",
+        "peso": "⚖️ {nombre} ahora tiene peso {peso}",
+        "peso_invalido": "❌ El peso va de 0 a {maximo} y debe quedar al menos una persona con peso mayor a 0",
+        "status_detallado": (
+            "📊 **Estado del Bot**\n\n"
+            "👤 **Turno actual:** {persona}\n"
+            "📅 **Último día realizado:** {ultimo_dia}\n"
+            "🔔 **Estado:** {estado}\n"
+            "💬 **Chat ID:** {chat_id}\n\n"
+            "👥 **Personas registradas:**\n"
+            "{personas}"
+        ),
+        "recordando": "🔔 Recordando",
+        "esperando": "😴 Esperando",
+        "no_configurado": "No configurado",
+    },
+    "en": {
+        "saludo": "👋 Hi {nombre}!\n\n",
+        "start": (
+            "{saludo}🤖 Bot activated!\n\n"
+            "👤 Turn: {persona}\n"
+            "📅 Last day: {ultimo_dia}\n\n"
+            "Commands:\n"
+            "/start - Start\n"
+            "/registrar <name> - Identify yourself (e.g. /registrar {ejemplo})\n"
+            "/hecho - Mark as done\n"
+            "/status - Show status\n"
+            "/help - Help"
+        ),
+        "status": (
+            "{saludo}📊 Status:\n\n"
+            "👤 Turn: {persona}\n"
+            "📅 Last day: {ultimo_dia}\n"
+            "🕐 Time ({zona}): {hora}\n\n"
+            "People:\n"
+            "{personas}"
+        ),
+        "help": (
+            "🤖 Reminder Bot\n\n"
+            "Commands:\n"
+            "/start - Start the bot\n"
+            "/registrar <name> - Identify yourself (e.g. /registrar {ejemplo})\n"
+            "/hecho - Mark the task as done\n"
+            "/status - Show status\n"
+            "/idioma <es|en> - Change language\n"
+            "/turnos - Upcoming turns (skip, swap, vacation, weight)\n"
+            "/stats - Statistics\n"
+            "/zona <zone> - Change time zone\n"
+            "/horario <start-end> - Reminder hours\n"
+            "/help - Help\n\n"
+            "👥 People: {personas}\n"
+            "🌍 Time zone: {zona}"
+        ),
+        "nunca": "Never",
+        "registrar_uso": "Please type: {opciones}",
+        "registrar_invalido": "Invalid name. Must be one of: {personas}",
+        "registrado": "✅ Registered as {nombre}. Thanks!",
+        "no_registrado": "❌ You are not registered. Use {opciones} to register.",
+        "o": " or ",
+        "no_es_tu_turno": "❌ It's not your turn {nombre}. It's {persona}'s turn",
+        "ya_marcado": "✅ Already marked today",
+        "hecho": "✅ Thanks {nombre}!\n🔄 Now it's {persona}'s turn\n📅 {dia}",
+        "recordatorio": "🔔 {persona}, it's your turn to pick up the poop 💩\nSend /hecho when you're done",
+        "recordatorio_atrasado": "⚠️ {persona}, {dias} days have passed!\nPick up the poop 💩 and send /hecho",
+        "idioma_uso": "Available languages: {idiomas}",
+        "idioma_cambiado": "🌍 Language changed to English",
+        "zona_uso": "Current zone: {zona}\nUsage: /zona America/Santiago (IANA zones)",
+        "zona_invalida": "❌ Unknown time zone: {zona}",
+        "zona_cambiada": "🌍 Time zone: {zona}\n🕐 Local time: {hora}",
+        "horario_uso": "Current hours: {horario}\nUsage: /horario 8-23 (local hours, 0 to 24)",
+        "horario_cambiado": "🕐 Reminders between {horario} ({zona})",
+        "stats": (
+            "📈 Statistics\n\n"
+            "✅ Total: {total}\n"
+            "🔥 Streak: {racha} days (best: {record})\n"
+            "⚖️ Fairness: {equidad}%\n\n"
+            "{personas}"
+        ),
+        "stats_persona": "👤 {nombre}: {mes} this month, {total} in total, {atraso} days late on average\n",
+        "stats_vacio": "📈 No tasks have been marked in this chat yet",
+        "turnos": "📅 Upcoming turns:\n{lista}",
+        "turnos_linea": "{dia} - {persona}\n",
+        "turnos_uso": (
+            "Usage:\n"
+            "/turnos - Upcoming turns\n"
+            "/turnos saltar - Pass your turn (you go after)\n"
+            "/turnos cambiar <name> - Someone else takes your turn; you take theirs\n"
+            "/turnos vacaciones <name> <days|off>\n"
+            "/turnos peso <name> <n> - Relative share of turns (0 = out)"
+        ),
+        "turno_saltado": "⏭️ {nombre} passes their turn. Now it's {persona}'s turn",
+        "turno_cambiado": "🔁 {nombre} takes this turn and {persona} will take {nombre}'s next one",
+        "turno_no_disponible": "❌ {nombre} can't take this turn",
+        "vacaciones": "🏖️ {nombre} on vacation until {dia}",
+        "vacaciones_fin": "👋 {nombre} is back in the rotation",
+        "peso": "⚖️ {nombre} now has weight {peso}",
+        "peso_invalido": "❌ Weight goes from 0 to {maximo} and at least one person must keep a weight above 0",
+        "status_detallado": (
+            "📊 **Bot Status**\n\n"
+            "👤 **Current turn:** {persona}\n"
+            "📅 **Last day done:** {ultimo_dia}\n"
+            "🔔 **State:** {estado}\n"
+            "💬 **Chat ID:** {chat_id}\n\n"
+            "👥 **Registered people:**\n"
+            "{personas}"
+        ),
+        "recordando": "🔔 Reminding",
+        "esperando": "😴 Waiting",
+        "no_configurado": "Not configured",
+    },
+}
+
+LOCALES = tuple(MESSAGES)
+
+
+class Template:
+    """Plantilla analizada una vez: campos validados y partes (texto, campo) para unir"""
+
+    __slots__ = ("source", "fields", "static", "render", "_parts")
+
+    def __init__(self, source: str):
+        self.source = source
+        fields = []
+        parts = []
+        plain = True  # sin formato ni conversión en ningún campo
+        for literal, field, spec, conversion in string.Formatter().parse(source):
+            parts.append((literal, field))
+            if field is None:
+                continue
+            if not field.isidentifier():
+                raise ValueError(f"Campo inválido en plantilla: {field!r}")
+            plain = plain and not spec and not conversion
+            if field not in fields:
+                fields.append(field)
+        self.fields = tuple(fields)
+        self._parts = tuple(parts)
+        # Sin campos el texto es fijo: se devuelve siempre la misma cadena
+        self.static: Optional[str] = None if fields else source.replace("{{", "{").replace("}}", "}")
+        if not fields:
+            self.render: Callable[..., str] = lambda _static=self.static: _static
+        elif plain:
+            self.render = self._join
+        else:
+            self.render = self._format_map
+
+    def _join(self, **values) -> str:
+        return "".join([f"{literal}{values[field]}" if field else literal for literal, field in self._parts])
+
+    def _format_map(self, **values) -> str:
+        return self.source.format_map(values)
+
+
+def _compile_all() -> Dict[Tuple[str, str], Template]:
+    return {
+        (locale, key): Template(text)
+        for locale, messages in MESSAGES.items()
+        for key, text in messages.items()
+    }
+
+
+_TEMPLATES = _compile_all()
+# Acceso directo (idioma, clave) -> función, incluyendo idioma None
+_RENDERERS: Dict[Tuple[Optional[str], str], Callable[..., str]] = {
+    key: template.render for key, template in _TEMPLATES.items()
+}
+_RENDERERS.update({(None, key): _RENDERERS[(DEFAULT_LOCALE, key)] for key in MESSAGES[DEFAULT_LOCALE]})
+
+
+def get_template(key: str, locale: Optional[str] = None) -> Template:
+    template = _TEMPLATES.get((locale or DEFAULT_LOCALE, key))
+    if template is None:
+        template = _TEMPLATES[(DEFAULT_LOCALE, key)]
+    return template
+
+
+def get_renderer(key: str, locale: Optional[str] = None) -> Callable[..., str]:
+    """Función de renderizado de `key`; útil para reutilizarla en bucles"""
+    renderer = _RENDERERS.get((locale, key))
+    if renderer is None:
+        renderer = _RENDERERS[(DEFAULT_LOCALE, key)]
+    return renderer
+
+
+def render(key: str, locale: Optional[str] = None, **values) -> str:
+    """Renderiza el mensaje `key` en el idioma del chat"""
+    renderer = _RENDERERS.get((locale, key))
+    if renderer is None:
+        renderer = _RENDERERS[(DEFAULT_LOCALE, key)]
+    return renderer(**values)
+
+
+def format_day(day: Optional[date], locale: Optional[str] = None) -> str:
+    return _format_date(day) if day else render("nunca", locale)
+
+
+@lru_cache(maxsize=1024)
+def _format_date(day: date) -> str:
+    # strftime es lo más caro de /status; los días se repiten mucho entre chats
+    return day.strftime("%d/%m/%Y")
+
+
+@lru_cache(maxsize=256)
+def personas_list(personas: Tuple[str, ...], turn: int) -> str:
+    """Lista de personas marcando la que tiene el turno (cacheada)"""
+    return "".join(f"{'👉' if i == turn else '   '} {persona}\n" for i, persona in enumerate(personas))
+
+
+@lru_cache(maxsize=64)
+def help_text(locale: Optional[str], personas: Tuple[str, ...], zona: str) -> str:
+    """Texto completo de /help; no depende del estado, se cachea por configuración"""
+    return render("help", locale, ejemplo=personas[0], personas=", ".join(personas), zona=zona)
+
+
+@lru_cache(maxsize=64)
+def options_text(locale: Optional[str], personas: Tuple[str, ...]) -> str:
+    """"/registrar A o /registrar B" para los mensajes de registro"""
+    return render("o", locale).join(f"/registrar {p}" for p in personas)
+
+
+@lru_cache(maxsize=256)
+def reminder_text(locale: Optional[str], persona: str) -> str:
+    """Recordatorio estándar; solo depende del idioma y la persona, se cachea"""
+    return render("recordatorio", locale, persona=persona)
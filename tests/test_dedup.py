@@ -0,0 +1,72 @@
+"""
+Pruebas de dedup.UpdateWindow y UpdateDeduplicator
+
+Uso: python -m pytest -q tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import RESET_GAP, RESET_RUN, UpdateDeduplicator, UpdateWindow
+
+
+def filled(high: int, size: int = 64) -> UpdateWindow:
+    window = UpdateWindow(size)
+    for update_id in range(high - size + 1, high + 1):
+        window.add(update_id)
+    return window
+
+
+def test_duplicates_in_window():
+    window = filled(1000)
+    assert not window.add(1000)
+    assert not window.add(990)
+    assert window.add(1001)
+    assert window.high == 1001
+
+
+def test_stale_id_below_window_is_ignored():
+    window = filled(1000)
+    assert 500 in window
+    assert not window.add(500)
+    assert window.high == 1000
+
+
+def test_backward_jump_smaller_than_reset_gap_starts_new_sequence():
+    window = filled(10_000)
+    start = 10_000 - RESET_GAP // 2
+    accepted = [window.add(update_id) for update_id in range(start, start + RESET_RUN + 2)]
+    # Los primeros de la racha se ignoran; desde RESET_RUN ids seguidos es una secuencia nueva
+    assert accepted == [False] * (RESET_RUN - 1) + [True] * 3
+    assert window.high == start + RESET_RUN + 1
+    assert start + RESET_RUN + 2 not in window
+    assert not window.add(start + RESET_RUN + 1)
+
+
+def test_backward_jump_larger_than_reset_gap_resets_at_once():
+    window = filled(RESET_GAP * 3)
+    assert window.add(5)
+    assert window.high == 5
+    assert 6 not in window
+
+
+def test_first_update_after_restart_starts_new_sequence(tmp_path):
+    state = str(tmp_path / "updates.json")
+    dedup = UpdateDeduplicator(state, window=64)
+    for update_id in range(10_000, 10_010):
+        assert dedup.check(update_id)
+    dedup.close()
+
+    dedup = UpdateDeduplicator(state, window=64)
+    assert dedup.offset == 10_010
+    assert dedup.check(7)
+    assert dedup.check(8)
+    dedup.close()
+
+    # Al reaplicar el log el reinicio de secuencia se repite igual
+    dedup = UpdateDeduplicator(state, window=64)
+    assert dedup.offset == 9
+    assert not dedup.check(8)
+    dedup.close()
@@ -0,0 +1,163 @@
+"""
+Zonas horarias y horarios de recordatorio por chat
+
+Cada chat puede tener su zona (IANA, p. ej. America/Santiago) y su
+horario permitido [apertura, cierre) en horas locales. Para no localizar
+fechas por chat en cada tick, cada combinación (zona, apertura, cierre)
+precalcula como epoch enteros los inicios de día, las aperturas y los
+cierres de las próximas semanas, con los cambios de horario incluidos.
+Las consultas son búsquedas binarias sobre enteros y la tabla se
+comparte entre todos los chats con la misma configuración (se guardan
+las 256 combinaciones usadas más recientemente).
+
+Las horas locales que no existen (en Chile, el salto de 00:00 a 01:00 de
+septiembre) se corren hacia adelante lo que dura el salto; las que se
+repiten (23:00-23:59 del sábado de abril) toman la primera ocurrencia.
+"""
+
+import logging
+from bisect import bisect_right
+from datetime import date, datetime
+from functools import lru_cache
+from typing import List, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEZONE = "America/Santiago"
+DEFAULT_WINDOW = (8, 23)  # de 8:00 a 23:00 (la hora 22 incluida)
+HORIZON_DAYS = 35  # días precalculados por tabla; se recalcula al salirse
+
+
+@lru_cache(maxsize=256)
+def get_zone(name: str) -> ZoneInfo:
+    """ZoneInfo de la zona (ValueError si no existe)"""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError, OSError):
+        raise ValueError(f"Zona horaria desconocida: {name}") from None
+
+
+def is_valid_timezone(name: str) -> bool:
+    try:
+        get_zone(name)
+    except ValueError:
+        return False
+    return True
+
+
+def in_window(hour: int, start: int, end: int) -> bool:
+    """Si la hora local cae en [start, end); con start > end el horario cruza la medianoche"""
+    if start < end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def validate_window(start: int, end: int) -> Tuple[int, int]:
+    if not (0 <= start <= 23 and 1 <= end <= 24 and start != end):
+        raise ValueError(f"Horario inválido: {start}-{end} (horas de 0 a 24, apertura distinta del cierre)")
+    return start, end
+
+
+def parse_window(text: str) -> Tuple[int, int]:
+    """"8-23" o "8 23" -> (8, 23)"""
+    parts = text.replace("-", " ").split()
+    if len(parts) != 2:
+        raise ValueError(f"Horario inválido: {text}")
+    try:
+        start, end = int(parts[0]), int(parts[1])
+    except ValueError:
+        raise ValueError(f"Horario inválido: {text}") from None
+    return validate_window(start, end)
+
+
+def wall_epoch(zone: ZoneInfo, day: int, hour: int) -> int:
+    """Epoch de las `hour`:00 locales del día (ordinal); hour=24 es la medianoche siguiente"""
+    d = date.fromordinal(day + hour // 24)
+    return int(datetime(d.year, d.month, d.day, hour % 24, tzinfo=zone).timestamp())
+
+
+class ReminderWindow:
+    """Tabla de días y horarios de una zona como epoch enteros"""
+
+    __slots__ = (
+        "zone_name", "zone", "start", "end", "first_day", "midnights", "opens", "closes", "valid_from", "valid_until",
+        "rebuilds",
+    )
+
+    def __init__(self, zone_name: str, start: int, end: int):
+        self.zone_name = zone_name
+        self.zone = get_zone(zone_name)
+        self.start, self.end = validate_window(start, end)
+        self.first_day = 0
+        # midnights[i] es el inicio del día first_day + i; opens/closes, su horario
+        self.midnights: List[int] = []
+        self.opens: List[int] = []
+        self.closes: List[int] = []
+        # Rango de t que la tabla responde sin recalcular: un día de margen atrás
+        # (horarios que cruzan la medianoche) y dos adelante
+        self.valid_from = self.valid_until = 0
+        # Métricas
+        self.rebuilds = 0
+
+    def _build(self, t: int):
+        zone = self.zone
+        first = datetime.fromtimestamp(t, zone).date().toordinal() - 1
+        days = range(first, first + HORIZON_DAYS)
+        # Con cierre <= apertura, el horario termina al día siguiente
+        close_offset = 0 if self.end > self.start else 24
+        self.first_day = first
+        self.midnights = [wall_epoch(zone, day, 0) for day in range(first, first + HORIZON_DAYS + 1)]
+        self.opens = [wall_epoch(zone, day, self.start) for day in days]
+        self.closes = [wall_epoch(zone, day, self.end + close_offset) for day in days]
+        self.valid_from = self.midnights[1]
+        self.valid_until = self.midnights[-3]
+        self.rebuilds += 1
+
+    # Cada consulta revisa el rango en línea: es el camino caliente del tick
+    def day_of(self, t: int) -> int:
+        """Día local (ordinal) del instante t"""
+        if not self.valid_from <= t < self.valid_until:
+            self._build(t)
+        return self.first_day + bisect_right(self.midnights, t) - 1
+
+    def next_day_start(self, t: int) -> int:
+        """Inicio del día local siguiente al de t"""
+        if not self.valid_from <= t < self.valid_until:
+            self._build(t)
+        return self.midnights[bisect_right(self.midnights, t)]
+
+    def is_open(self, t: int) -> bool:
+        if not self.valid_from <= t < self.valid_until:
+            self._build(t)
+        i = bisect_right(self.opens, t) - 1
+        return i >= 0 and t < self.closes[i]
+
+    def clamp(self, t: int) -> int:
+        """t si está dentro del horario; si no, la próxima apertura"""
+        if not self.valid_from <= t < self.valid_until:
+            self._build(t)
+        i = bisect_right(self.opens, t) - 1
+        if i >= 0 and t < self.closes[i]:
+            return t
+        # Un horario que cae entero en el salto de septiembre queda vacío ese día
+        i += 1
+        while self.opens[i] >= self.closes[i]:
+            i += 1
+        return self.opens[i]
+
+    def local_time(self, t: float) -> datetime:
+        """Fecha y hora local (solo para mostrar)"""
+        return datetime.fromtimestamp(t, self.zone)
+
+
+# Acotado: zona y horario vienen de /zona y /horario, y cada tabla guarda HORIZON_DAYS días
+@lru_cache(maxsize=256)
+def get_window(zone_name: str = DEFAULT_TIMEZONE, start: int = DEFAULT_WINDOW[0], end: int = DEFAULT_WINDOW[1]) -> ReminderWindow:
+    """Tabla compartida para una combinación de zona y horario"""
+    return ReminderWindow(zone_name, start, end)
+
+
+def format_window(start: int, end: int) -> str:
+    return f"{start:02d}:00-{end % 24:02d}:00"
+
@@ -2,29 +2,95 @@
 Utilidades del bot de Telegram
 """
 
+import atexit
+import gzip
+import json
 import logging
 import logging.handlers
+import os
+import queue
+import shutil
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+from templates import personas_list, render
+from timezones import in_window
+
+class JsonFormatter(logging.Formatter):
+    """Formato estructurado: un objeto JSON por línea"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+def _gzip_namer(name: str) -> str:
+    return name + ".gz"
+
+def _gzip_rotator(source: str, dest: str):
+    """Comprime el archivo rotado (corre en el hilo que escribe los logs)"""
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+class _EnqueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que solo resuelve el mensaje: sin copiar el registro ni formatearlo
+
+    El formato completo lo aplican los handlers del QueueListener, en su hilo.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Igual que QueueHandler: la traza se formatea aquí para no retener los frames
+            record.exc_text = _exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+_exc_formatter = logging.Formatter()
+_listener: Optional[logging.handlers.QueueListener] = None
+_stop_registered = False  # stop_logging ya está en atexit
+
 def setup_logging(
     log_file: str = "telegram_bot.log",
     log_level: str = "INFO",
     max_bytes: int = 10 * 1024 * 1024,  # 10 MB
-    backup_count: int = 5
+    backup_count: int = 5,
+    use_queue: bool = False,
+    json_format: bool = False,
+    compress: bool = False,
 ) -> logging.Logger:
-    """Configura el sistema de logging"""
-    
+    """Configura el sistema de logging
+
+    Con use_queue=True los handlers de archivo y consola corren en un hilo
+    aparte (QueueListener): loguear desde el bucle de eventos solo encola
+    el registro. compress=True guarda las rotaciones en .gz y json_format
+    escribe un objeto JSON por línea.
+    """
+    global _listener, _stop_registered
+
     # Crear logger principal
     logger = logging.getLogger()
     logger.setLevel(getattr(logging, log_level.upper()))
     
     # Formato de logs
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if json_format:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
     
     # Handler para archivo con rotación
     file_handler = logging.handlers.RotatingFileHandler(
@@ -34,19 +100,50 @@ def setup_logging(
         encoding='utf-8'
     )
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    if compress:
+        file_handler.namer = _gzip_namer
+        file_handler.rotator = _gzip_rotator
     
     # Handler para consola
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
     
-    logger.info("Sistema de logging configurado")
+    if not use_queue:
+        logger.addHandler(file_handler)
+        logger.addHandler(console_handler)
+        logger.info("Sistema de logging configurado")
+        return logger
+    
+    # Modo cola: se reemplazan los handlers existentes (p. ej. de basicConfig)
+    if _listener is not None:
+        _listener.stop()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+    logger.addHandler(_EnqueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    if not _stop_registered:  # una sola vez aunque se reconfigure el logging
+        atexit.register(stop_logging)
+        _stop_registered = True
+    
+    logger.info("Sistema de logging configurado (cola en segundo plano)")
     return logger
 
-def is_valid_time_for_reminder(now: datetime, start_hour: int = 8, end_hour: int = 22) -> bool:
-    """Verifica si es un horario válido para enviar recordatorios"""
-    return start_hour <= now.hour <= end_hour
+def stop_logging():
+    """Escribe los registros encolados y detiene el hilo de logging"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def is_valid_time_for_reminder(now: datetime, start_hour: int = 8, end_hour: int = 23) -> bool:
+    """Verifica si es un horario válido para enviar recordatorios ([start_hour, end_hour) en la hora local de now)
+
+    El motor no localiza fechas: usa las tablas de timezones.get_window.
+    """
+    return in_window(now.hour, start_hour, end_hour)
 
 def format_date_chile(date_obj: datetime) -> str:
     """Formatea una fecha para mostrar en Chile"""
@@ -106,23 +203,17 @@ def create_status_message(
     last_day: Optional[str],
     is_reminding: bool,
     chat_id: Optional[int],
-    personas: list
+    personas: list,
+    locale: Optional[str] = None
 ) -> str:
     """Crea mensaje de estado formateado"""
-    status = "🔔 Recordando" if is_reminding else "😴 Esperando"
-    
-    message = f"""📊 **Estado del Bot**
-
-👤 **Turno actual:** {current_person}
-📅 **Último día realizado:** {last_day or 'Nunca'}
-🔔 **Estado:** {status}
-💬 **Chat ID:** {chat_id or 'No configurado'}
-
-👥 **Personas registradas:**
-"""
-    
-    for i, persona in enumerate(personas):
-        icon = "👉" if persona == current_person else "   "
-        message += f"{icon} {persona}\n"
-    
-    return message
+    personas = tuple(personas)
+    return render(
+        "status_detallado",
+        locale,
+        persona=current_person,
+        ultimo_dia=last_day or render("nunca", locale),
+        estado=render("recordando" if is_reminding else "esperando", locale),
+        chat_id=chat_id or render("no_configurado", locale),
+        personas=personas_list(personas, personas.index(current_person) if current_person in personas else -1),
+    )
@@ -0,0 +1,116 @@
+"""
+Modo webhook: recibe updates de Telegram por HTTP
+
+El servidor HTTP corre en el mismo bucle de eventos que la Application.
+Cada POST se valida con el secret token, se parsea y se deja en la cola
+de updates de la Application; la respuesta 200 sale de inmediato y el
+procesamiento del update ocurre después, fuera de la petición HTTP.
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import signal
+from typing import Optional
+
+from telegram import Update
+from telegram.ext import Application
+
+import shutdown
+from httpd import HTTPServer, Request, Response
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+
+class WebhookServer:
+    """Recibe updates de Telegram y los encola en la Application"""
+
+    def __init__(
+        self,
+        application: Application,
+        path: str,
+        secret: Optional[str] = None,
+        server: Optional[HTTPServer] = None,
+    ):
+        self.application = application
+        self.path = path
+        self.secret = secret
+        self.server = server or HTTPServer()
+        self.server.route("POST", path, self.handle_update)
+        # Métricas
+        self.received = 0
+        self.rejected = 0
+
+    async def handle_update(self, request: Request) -> Response:
+        if self.secret:
+            token = request.headers.get(SECRET_HEADER, "")
+            if not hmac.compare_digest(token, self.secret):
+                self.rejected += 1
+                return Response(403)
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            self.rejected += 1
+            return Response(400)
+        try:
+            update = Update.de_json(data, self.application.bot)
+        except (AttributeError, TypeError, KeyError, ValueError):
+            update = None  # JSON válido pero no es un update (p. ej. una lista o sin update_id)
+        if update is None:
+            self.rejected += 1
+            return Response(400)
+        self.received += 1
+        self.application.update_queue.put_nowait(update)
+        return Response(200)
+
+
+async def _home(request: Request) -> Response:
+    return Response(200, b"Bot activo")
+
+
+async def serve_webhook(application: Application, config, server: Optional[HTTPServer] = None):
+    """Ciclo de vida completo del bot en modo webhook
+
+    server permite compartir el servidor con otras rutas (p. ej. /metrics).
+    """
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+
+    webhook = WebhookServer(application, config.WEBHOOK_PATH, config.WEBHOOK_SECRET, server)
+    if server is None:
+        webhook.server.route("GET", "/", _home)  # compartido, / ya es la salud del motor
+
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    try:
+        await application.bot.set_webhook(
+            url=config.WEBHOOK_URL.rstrip("/") + config.WEBHOOK_PATH,
+            secret_token=config.WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES,
+        )
+        await webhook.server.start(config.HOST, config.PORT)
+        await application.start()
+        logger.info(f"Webhook activo en {config.WEBHOOK_URL}{config.WEBHOOK_PATH}")
+        await stop.wait()
+    finally:
+        # Primero deja de aceptar updates; los ya encolados se drenan con plazo
+        await shutdown.graceful_stop(application, webhook.server.stop, config.SHUTDOWN_TIMEOUT)
+        if application.post_stop:
+            await application.post_stop(application)
+        shutdown.reset()
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
+
+
+def run_webhook(application: Application, config, server: Optional[HTTPServer] = None):
+    asyncio.run(serve_webhook(application, config, server))